@@ -1,5 +1,8 @@
-from itertools import combinations
-from typing import List, Union
+import heapq
+import random
+
+from collections.abc import Sequence
+from typing import Callable, Dict, List, Union
 
 from monopoly_deal.cards import *
 from monopoly_deal.game import *
@@ -8,133 +11,312 @@ MAX_CARDS_IN_HAND = 7
 
 
 class Action:
+    """Actions are immutable values: equal, and hashed alike, when they are of one type and carry the same choice.
+
+    Players, cards and sets are compared by index, since each game position has objects of its own. Actions that
+    recur in every game (`EndTurn`, `NoResponse`, `PlayAsCash`, `PlayProperty`) are interned, so building them again
+    returns the shared instance; never change an action's attributes.
+    """
+    __slots__ = ()
     respondable = False
 
+    def _key(self) -> Tuple:
+        return ()
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other._key() == self._key()
+
+    def __hash__(self):
+        return hash((type(self).__name__, self._key()))
+
 
 class EndTurn(Action):
-    pass
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
 
 class NoResponse(Action):
-    pass
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
 
 class Charge(Action):
+    __slots__ = ('target_player', 'amount')
+    respondable = True
+
     def __init__(self, charge_player: Player, amount: int):
         self.target_player = charge_player
         self.amount = amount
-        self.respondable = True
+
+    def _key(self):
+        return self.target_player.index, self.amount
 
     def __repr__(self):
         return f'<Charge ${self.amount} to player {self.target_player.index}>'
 
 
 class StealCard(Action):
+    __slots__ = ('target_player', 'steal_card')
+    respondable = True
+
     def __init__(self, steal_from_player: Player, steal_card: PropertyCard):
         self.target_player = steal_from_player
         self.steal_card = steal_card
-        self.respondable = True
+
+    def _key(self):
+        return self.target_player.index, self.steal_card.index
 
     def __repr__(self):
         return f'<StealCard {self.steal_card}>>'
 
 
 class StealSet(Action):
+    __slots__ = ('target_player', 'steal_set')
+    respondable = True
+
     def __init__(self, steal_from_player: Player, steal_set: PropertySet):
         self.target_player = steal_from_player
         self.steal_set = steal_set
-        self.respondable = True
+
+    def _key(self):
+        return self.target_player.index, self.steal_set.color, self.steal_set.serialize()
 
     def __repr__(self):
         return f'<StealSet {self.steal_set.color} from player {self.target_player.index}>'
 
 class Swap(Action):
+    __slots__ = ('target_player', 'steal_card', 'give_card')
+    respondable = True
+
     def __init__(self, steal_from_player: Player, steal_card: PropertyCard, give_card: PropertyCard):
         self.target_player = steal_from_player
         self.steal_card = steal_card
         self.give_card = give_card
-        self.respondable = True
+
+    def _key(self):
+        return self.target_player.index, self.steal_card.index, self.give_card.index
 
     def __repr__(self):
         return f'<Swap {self.steal_card} for {self.give_card}>'
 
 class Pay(Action):
+    __slots__ = ('target_player', 'cash_cards', 'property_cards')
+
     def __init__(self, pay_to_player: Player, cash_cards: Tuple[Card], property_cards: Tuple[PropertyCard]):
         self.target_player = pay_to_player
         self.cash_cards = cash_cards
         self.property_cards = property_cards
-        self.respondable = False
 
     def get_amount(self):
         return Board.get_value_of_cards(cards=self.cash_cards + self.property_cards)
 
+    def _key(self):
+        return (
+            self.target_player.index,
+            tuple(card.index for card in self.cash_cards),
+            tuple(card.index for card in self.property_cards)
+        )
+
     def __repr__(self):
         return f'<Pay {self.cash_cards} + {self.property_cards} to {self.target_player.index}'
 
 
 class Discard(Action):
+    __slots__ = ('discard_cards',)
+
     def __init__(self, discard_cards: Tuple[Card]):
         self.discard_cards = discard_cards
-        self.respondable = False
+
+    def _key(self):
+        return tuple(card.index for card in self.discard_cards)
 
 
 class ChangeColor(Action):
+    __slots__ = ('property_card', 'to_color')
+
     def __init__(self, property_card: PropertyCard, to_color: Color):
         self.property_card = property_card
         self.to_color = to_color
-        self.respondable = False
+
+    def _key(self):
+        return self.property_card.index, self.to_color
 
     def __repr__(self):
         return f'<ChangeColor {self.property_card} to {self.to_color}>'
 
 class Draw(Action):
+    __slots__ = ('num_to_draw',)
+
     def __init__(self, num_to_draw: int):
-        self.respondable = False
         self.num_to_draw = num_to_draw
 
+    def _key(self):
+        return self.num_to_draw,
+
 
 class SayNo(Action):
+    __slots__ = ('target_player',)
+    respondable = True
+
     def __init__(self, to_player: Player):
-        self.respondable = True
         self.target_player = to_player
 
+    def _key(self):
+        return self.target_player.index,
+
 
 class DoubleCharge(Action):
-    def __init__(self):
-        self.respondable = True
+    __slots__ = ()
+    respondable = True
 
 
 class PlayProperty(Action):
-    def __init__(self, property_card: PropertyCard, color: Color):
-        self.property_card = property_card
-        self.color = color
-        self.respondable = False
+    __slots__ = ('property_card', 'color')
+    _interned = {}
+
+    def __new__(cls, property_card: PropertyCard, color: Color):
+        action = cls._interned.get((property_card.index, color))
+        if action is None:
+            action = super().__new__(cls)
+            action.property_card = property_card
+            action.color = color
+            cls._interned[property_card.index, color] = action
+        return action
+
+    def __getnewargs__(self):
+        return self.property_card, self.color
+
+    def _key(self):
+        return self.property_card.index, self.color
 
     def __repr__(self):
         return f'<PlayProperty {self.property_card.name}> as {self.color}>'
 
 
 class PlayAsCash(Action):
-    def __init__(self, cash_card: Cashable):
-        self.cash_card = cash_card
-        self.respondable = False
+    __slots__ = ('cash_card',)
+    _interned = {}
+
+    def __new__(cls, cash_card: Cashable):
+        action = cls._interned.get(cash_card.index)
+        if action is None:
+            action = super().__new__(cls)
+            action.cash_card = cash_card
+            cls._interned[cash_card.index] = action
+        return action
+
+    def __getnewargs__(self):
+        return self.cash_card,
+
+    def _key(self):
+        return self.cash_card.index,
 
     def __repr__(self):
         return f'<PlayAsCash {self.cash_card}>'
 
 
+class SwapTarget(Action):
+    """A Forced Deal with the card to steal chosen and the card to give still open"""
+    __slots__ = ('target_player', 'steal_card', 'give_cards')
+
+    def __init__(self, steal_from_player: Player, steal_card: PropertyCard, give_cards: List[PropertyCard]):
+        self.target_player = steal_from_player
+        self.steal_card = steal_card
+        self.give_cards = give_cards
+
+    def expand(self):
+        return [
+            Swap(steal_from_player=self.target_player, steal_card=self.steal_card, give_card=give_card)
+            for give_card in self.give_cards
+        ]
+
+    def _key(self):
+        return self.target_player.index, self.steal_card.index, tuple(card.index for card in self.give_cards)
+
+    def __repr__(self):
+        return f'<SwapTarget {self.steal_card}>'
+
+
+class SwapOptions(Sequence):
+    """Forced Deal swaps as the product of cards to steal and cards to give, built on demand.
+
+    Flat consumers can index or iterate it like a list of `Swap`s, while search can expand it one level at a time
+    through `targets()` and `SwapTarget.expand()`.
+    """
+    def __init__(self, steal_options: List[Tuple[Player, PropertyCard]], give_cards: List[PropertyCard]):
+        self.steal_options = steal_options
+        self.give_cards = give_cards
+
+    def __len__(self):
+        return len(self.steal_options) * len(self.give_cards)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Swap index out of range")
+        steal_from_player, steal_card = self.steal_options[index // len(self.give_cards)]
+        give_card = self.give_cards[index % len(self.give_cards)]
+        return Swap(steal_from_player=steal_from_player, steal_card=steal_card, give_card=give_card)
+
+    def targets(self):
+        if not self.give_cards:
+            return []
+        return [
+            SwapTarget(steal_from_player=steal_from_player, steal_card=steal_card, give_cards=self.give_cards)
+            for steal_from_player, steal_card in self.steal_options
+        ]
+
+    def sample(self, rng: random.Random = random):
+        return self[rng.randrange(len(self))]
+
+
+class ChainedActions(Sequence):
+    """Several sequences of actions presented as one flat sequence"""
+    def __init__(self, *parts: Sequence):
+        self.parts = [part for part in parts if len(part) > 0]
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if index >= 0:
+            for part in self.parts:
+                if index < len(part):
+                    return part[index]
+                index -= len(part)
+        raise IndexError("Action index out of range")
+
+
+def get_first_level_actions(actions: Sequence) -> List[Action]:
+    """Flatten `actions`, leaving factorized choices such as Forced Deals at their first level"""
+    parts = actions.parts if isinstance(actions, ChainedActions) else [actions]
+    first_level_actions = []
+    for part in parts:
+        first_level_actions.extend(part.targets() if isinstance(part, SwapOptions) else part)
+    return first_level_actions
+
+
 def get_available_actions(card: Card, players: Tuple[Player], current_player: Player):
     available_actions = []
     if isinstance(card, CashCard):
         available_actions = [PlayAsCash(cash_card=card)]
     elif isinstance(card, PropertyCard):
         if card.buildable:
-            if Color.ALL not in card.colors:
-                for color in card.colors:
-                    available_actions.append(PlayProperty(property_card=card, color=color))
-            else:
-                for color in Color:
-                    if color != Color.ALL:
-                        available_actions.append(PlayProperty(property_card=card, color=color))
+            for color in mask_colors(card.color_mask):
+                available_actions.append(PlayProperty(property_card=card, color=color))
         else:
             for property_set in current_player.board.get_complete_sets():
                 if property_set.can_add_house() and card.name == HOUSE:
@@ -143,7 +325,7 @@ def get_available_actions(card: Card, players: Tuple[Player], current_player: Pl
                     available_actions.append(PlayProperty(property_card=card, color=property_set.color))
     elif isinstance(card, RentCard):
         available_actions = [PlayAsCash(cash_card=card)]
-        matching_property_sets = current_player.board.get_property_sets_matching_colors(colors=card.colors)
+        matching_property_sets = current_player.board.get_property_sets_matching_mask(color_mask=card.color_mask)
         if len(matching_property_sets) > 0:
             best_rent = max([pset.get_rent_due() for pset in matching_property_sets])
             for opposing_player in players:
@@ -153,6 +335,21 @@ def get_available_actions(card: Card, players: Tuple[Player], current_player: Pl
         available_actions = [PlayAsCash(cash_card=card)]
         if card.action_type == ActionType.PASS_GO:
             available_actions.append(Draw(2))
+        elif card.action_type == ActionType.FORCED_DEAL:
+            steal_options = [
+                (opposing_player, property_card)
+                for opposing_player in players if opposing_player != current_player
+                for property_set in opposing_player.board.property_sets if not property_set.is_complete()
+                for property_card in distinct_cards(property_set.cards)
+            ]
+            give_cards = [
+                own_property_card
+                for own_property_set in current_player.board.property_sets if not own_property_set.is_complete()
+                for own_property_card in distinct_cards(own_property_set.cards)
+            ]
+            available_actions = ChainedActions(
+                available_actions, SwapOptions(steal_options=steal_options, give_cards=give_cards)
+            )
         else:
             for opposing_player in players:
                 if opposing_player != current_player:
@@ -163,29 +360,71 @@ def get_available_actions(card: Card, players: Tuple[Player], current_player: Pl
                             available_actions.append(StealSet(steal_from_player=opposing_player, steal_set=complete_set))
                     elif card.action_type == ActionType.DEBT_COLLECTOR:
                         available_actions.append(Charge(charge_player=opposing_player, amount=5))
-                    elif card.action_type in (ActionType.SLY_DEAL, ActionType.FORCED_DEAL):
+                    elif card.action_type == ActionType.SLY_DEAL:
                         for property_set in opposing_player.board.property_sets:
                             if not property_set.is_complete():
-                                for property_card in property_set.cards:
-                                    if card.action_type == ActionType.SLY_DEAL:
-                                        available_actions.append(
-                                            StealCard(steal_from_player=opposing_player, steal_card=property_card)
-                                        )
-                                    else:
-                                        for own_property_set in current_player.board.property_sets:
-                                            if not own_property_set.is_complete():
-                                                for own_property_card in own_property_set.cards:
-                                                    available_actions.append(
-                                                        Swap(
-                                                            steal_from_player=opposing_player,
-                                                            steal_card=property_card,
-                                                            give_card=own_property_card
-                                                        )
-                                                    )
+                                for property_card in distinct_cards(property_set.cards):
+                                    available_actions.append(
+                                        StealCard(steal_from_player=opposing_player, steal_card=property_card)
+                                    )
     return available_actions
 
 
-def get_available_responses(player: Player, actions: List[Tuple[Player, Card, Action]]):
+# What `get_available_actions` reads for each card, besides the card itself
+OWN_SETS = 1  # The property sets of the player whose turn it is
+OPPONENTS = 2  # The other players, whose objects the actions also refer to
+
+
+def _dependencies(card: Card) -> int:
+    if isinstance(card, PropertyCard):
+        return 0 if card.buildable else OWN_SETS
+    if isinstance(card, RentCard):
+        return OWN_SETS | OPPONENTS
+    if isinstance(card, ActionCard):
+        if card.action_type == ActionType.FORCED_DEAL:
+            return OWN_SETS | OPPONENTS
+        if card.action_type in (ActionType.BDAY, ActionType.DEBT_COLLECTOR, ActionType.SLY_DEAL,
+                                ActionType.DEAL_BREAKER):
+            return OPPONENTS
+    return 0
+
+
+CARD_DEPENDENCIES = {index: _dependencies(card) for index, card in deck.items()}
+
+
+class ActionCache:
+    """`get_available_actions` per card, kept until something the card's actions depend on is replaced.
+
+    Games are immutable and transitions reuse every object they leave alone, so a play that only touches a hand or
+    a cash pile keeps the property sets and the other players it did not affect. Each entry remembers the objects it
+    was generated from and is regenerated only when one of them is no longer the same object. Cached action lists
+    are shared; treat them as read-only.
+    """
+    def __init__(self):
+        self.entries: Dict[int, Tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_available_actions(self, card: Card, players: Tuple[Player], current_player: Player):
+        dependencies = CARD_DEPENDENCIES[card.index]
+        own_sets = current_player.board.property_sets if dependencies & OWN_SETS else None
+        opponents = tuple(player for player in players if player is not current_player) \
+            if dependencies & OPPONENTS else None
+        entry = self.entries.get(card.index)
+        # Players compare by identity, so equal tuples of opponents are the same objects
+        if entry is not None and entry[0] is own_sets and entry[1] == opponents:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        available_actions = get_available_actions(card=card, players=players, current_player=current_player)
+        self.entries[card.index] = (own_sets, opponents, available_actions)
+        return available_actions
+
+
+def get_available_responses(player: Player, actions: List[Tuple[Player, Card, Action]], limit: int = None,
+                            order: str = None):
+    """Responses `player` can make to the last of `actions`; `limit` and `order` cap and order the payment options
+    as in `payments.find_minimal_payments`"""
     available_responses = {None: [NoResponse()]}
     current_hand = player.hand
     for current_player, card_to_play, action in actions:
@@ -213,7 +452,9 @@ def get_available_responses(player: Player, actions: List[Tuple[Player, Card, Ac
             else:
                 payment_options = player.board.find_additional_cards_to_pay_bill(
                     bill_amount=action.amount,
-                    cards_in_payment=cash_cards_to_pay
+                    cards_in_payment=cash_cards_to_pay,
+                    limit=limit,
+                    order=order
                 )
                 for payment_set in payment_options:
                     cash_cards: Tuple[Cashable] = tuple([card for card in payment_set if isinstance(card, Cashable)])
@@ -230,7 +471,89 @@ def get_available_responses(player: Player, actions: List[Tuple[Player, Card, Ac
     return available_responses
 
 
+class DiscardOptions(Sequence):
+    """Every distinct way of discarding `num_to_discard` cards from `cards`, built on demand.
+
+    Cards of the same kind are interchangeable, so an option is how many cards of each kind to discard. Options can
+    be indexed, sampled or ranked without materializing the full list of combinations.
+    """
+    def __init__(self, cards: Tuple[Card], num_to_discard: int):
+        groups = {}
+        for card in cards:
+            groups.setdefault(CARD_KINDS[card.index], []).append(card)
+        self.groups = list(groups.values())
+        self.num_to_discard = num_to_discard
+
+        # ways[i][r] is the number of options discarding r cards from groups i onwards
+        self.ways = [[0] * (num_to_discard + 1) for _ in range(len(self.groups) + 1)]
+        self.ways[-1][0] = 1
+        for i in range(len(self.groups) - 1, -1, -1):
+            for r in range(num_to_discard + 1):
+                self.ways[i][r] = sum(self.ways[i + 1][r - c] for c in range(min(len(self.groups[i]), r) + 1))
+
+    def __len__(self):
+        return self.ways[0][self.num_to_discard]
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Discard option index out of range")
+        counts = []
+        remaining = self.num_to_discard
+        for i, group in enumerate(self.groups):
+            for c in range(min(len(group), remaining) + 1):
+                ways = self.ways[i + 1][remaining - c]
+                if index < ways:
+                    break
+                index -= ways
+            counts.append(c)
+            remaining -= c
+        return self._discard(counts)
+
+    def sample(self, rng: random.Random = random):
+        return self[rng.randrange(len(self))]
+
+    def best(self, k: int, card_score: Callable[[Card], float]):
+        """Return up to `k` options with the lowest total `card_score` over the discarded cards, best first"""
+        order = sorted(range(len(self.groups)), key=lambda i: card_score(self.groups[i][0]))
+        rank = {group: position for position, group in enumerate(order)}
+        scores = [card_score(self.groups[i][0]) for i in order]
+        capacities = [len(self.groups[i]) for i in order]
+
+        # Greedily discard the lowest scoring cards, then explore by moving one card to a higher scoring kind
+        start = []
+        remaining = self.num_to_discard
+        for capacity in capacities:
+            start.append(min(capacity, remaining))
+            remaining -= start[-1]
+        if remaining > 0:
+            return []
+        start = tuple(start)
+        heap = [(sum(c * score for c, score in zip(start, scores)), start)]
+        seen = {start}
+        options = []
+        while heap and len(options) < k:
+            score, counts = heapq.heappop(heap)
+            options.append(self._discard([counts[rank[i]] for i in range(len(self.groups))]))
+            for i in range(len(counts)):
+                if counts[i] == 0:
+                    continue
+                for j in range(i + 1, len(counts)):
+                    if counts[j] < capacities[j]:
+                        moved = list(counts)
+                        moved[i] -= 1
+                        moved[j] += 1
+                        moved = tuple(moved)
+                        if moved not in seen:
+                            seen.add(moved)
+                            heapq.heappush(heap, (score - scores[i] + scores[j], moved))
+        return options
+
+    def _discard(self, counts: List[int]):
+        return Discard(discard_cards=tuple(card for group, c in zip(self.groups, counts) for card in group[:c]))
+
+
 def get_discard_options(player: Player):
     num_needed_to_discard = len(player.hand.cards_in_hand) - MAX_CARDS_IN_HAND
-    potential_discards = combinations(player.hand.cards_in_hand, num_needed_to_discard)
-    return {None: [Discard(discard_cards=tuple(cards)) for cards in potential_discards]}
+    return {None: DiscardOptions(cards=player.hand.cards_in_hand, num_to_discard=num_needed_to_discard)}
@@ -5,7 +5,7 @@ from typing import List, Dict
 
 from monopoly_deal.actions import Action
 from monopoly_deal.cards import Card
-from monopoly_deal.game import Game
+from monopoly_deal.game import Game, Player
 
 
 class Agent:
@@ -21,8 +21,15 @@ class Agent:
     def get_discard_action(self, game: Game, actions: List[Action], discard_options: List[Action]):
         pass
 
+    def close(self):
+        """Release anything held for the game, e.g. worker processes"""
+        pass
+
 
 class RandomAgent(Agent):
+    def __init__(self, player: Player = None):
+        self.player = player
+
     def get_action(self, game: Game, actions: List[Action], available_actions: Dict[Card, List[Action]]):
         card_to_play = random.choice(list(available_actions.keys()))
         action_to_happen = random.choice(available_actions[card_to_play])
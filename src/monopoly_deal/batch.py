@@ -0,0 +1,909 @@
+import random
+
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from monopoly_deal.actions import (
+    MAX_CARDS_IN_HAND, Action, Charge, Discard, Draw, EndTurn, NoResponse, Pay, PlayAsCash, PlayProperty, SayNo,
+    StealCard, StealSet, Swap, SwapTarget, get_first_level_actions
+)
+from monopoly_deal.cards import *
+from monopoly_deal.compact import (
+    CASH, COLOR_CODES, DECK, DISCARD, HAND, HOTELS, HOUSES, MAX_SETS, NUM_CARDS, ORDER_BITS, ORDER_MASK, PLAYER_BASE,
+    PLAYER_STRIDE, SET_SIZES, SETS, CompactGame, cash_location, hand_location, set_location
+)
+from monopoly_deal.equivalence import choice_signature
+from monopoly_deal.game import MAX_PLAYS_PER_TURN, Game, Player
+from monopoly_deal.play import new_game, step
+
+MAX_PLAYERS = 5
+NUM_COLORS = len(SET_COLORS)  # Color codes run from 1, code 0 marks an unused set slot
+CARDS_TO_DRAW = 2
+
+# Phases of the decision each game is waiting for
+PLAY = 0
+RESPOND = 1
+GIVE = 2  # Forced Deal with the card to steal chosen, waiting for the card to give
+DISCARD_PHASE = 3
+OVER = 4
+
+# Respondable actions waiting in a chain
+CHARGE = 1
+STEAL = 2
+SWAP = 3
+STEAL_SET = 4
+
+# Action ids are laid out the same way whatever the number of players:
+#   END_TURN, PASS_GO, ACCEPT (no response, or pay), SAY_NO,
+#   CASH + card, PROPERTY + card x color, CHARGE + card x target offset, SLY_DEAL + card to steal,
+#   FORCED_DEAL + card to steal, GIVE + card to give, DEAL_BREAKER + target offset x set slot, DISCARD + card
+END_TURN = 0
+PASS_GO = 1
+ACCEPT = 2
+SAY_NO = 3
+CASH_BASE = 4
+PROPERTY_BASE = CASH_BASE + NUM_CARDS
+CHARGE_BASE = PROPERTY_BASE + NUM_CARDS * NUM_COLORS
+SLY_DEAL_BASE = CHARGE_BASE + NUM_CARDS * (MAX_PLAYERS - 1)
+FORCED_DEAL_BASE = SLY_DEAL_BASE + NUM_CARDS
+GIVE_BASE = FORCED_DEAL_BASE + NUM_CARDS
+DEAL_BREAKER_BASE = GIVE_BASE + NUM_CARDS
+DISCARD_BASE = DEAL_BREAKER_BASE + (MAX_PLAYERS - 1) * MAX_SETS
+NUM_ACTIONS = DISCARD_BASE + NUM_CARDS
+
+# Action types, for decoding ids
+(T_END_TURN, T_PASS_GO, T_ACCEPT, T_SAY_NO, T_CASH, T_PROPERTY, T_CHARGE, T_SLY_DEAL, T_FORCED_DEAL, T_GIVE,
+ T_DEAL_BREAKER, T_DISCARD) = range(12)
+
+
+# Card tables from the deck catalogue in `cards`
+VALUES = np.array(CARD_VALUES, dtype=np.int64)
+TYPES = np.array(CARD_TYPES, dtype=np.int64)
+ACTION_TYPES = np.array(CARD_ACTION_TYPES, dtype=np.int64)
+COLOR_MASKS = np.array(CARD_COLOR_MASKS, dtype=np.int64)
+
+IS_CASHABLE = np.isin(TYPES, (TYPE_CASH, TYPE_ACTION, TYPE_RENT))
+IS_BUILDABLE = np.array(CARD_BUILDABLE, dtype=bool)
+IS_HOUSE = np.isin(np.arange(NUM_CARDS + 1), sorted(HOUSES))
+IS_HOTEL = np.isin(np.arange(NUM_CARDS + 1), sorted(HOTELS))
+IS_RENT = TYPES == TYPE_RENT
+IS_PASS_GO = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.PASS_GO]
+IS_SLY_DEAL = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.SLY_DEAL]
+IS_FORCED_DEAL = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.FORCED_DEAL]
+IS_DEAL_BREAKER = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.DEAL_BREAKER]
+IS_JUST_SAY_NO = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.JUST_SAY_NO]
+IS_BIRTHDAY = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.BDAY]
+IS_DEBT_COLLECTOR = ACTION_TYPES == ACTION_TYPE_CODES[ActionType.DEBT_COLLECTOR]
+
+# Card x color code tables of the set colors each card can be used with, unpacked from the color masks (color code
+# 0 marks an unused set slot and matches nothing)
+_COLOR_TABLE = np.concatenate([
+    np.zeros((NUM_CARDS + 1, 1), dtype=bool),
+    (COLOR_MASKS[:, None] >> np.arange(NUM_COLORS)) & 1 == 1
+], axis=1)
+PLAYABLE_COLORS = _COLOR_TABLE & IS_BUILDABLE[:, None]
+RENT_COLORS = _COLOR_TABLE & IS_RENT[:, None]
+RENT_COLORS_T = RENT_COLORS.T.astype(np.float32)  # Colors owned @ RENT_COLORS_T counts the sets a rent card covers
+
+
+def _card_range(table: np.ndarray) -> slice:
+    """The card indices a table marks, which the deck keeps together, as a slice"""
+    indices = np.flatnonzero(table)
+    assert (np.diff(indices) == 1).all(), "Cards of a kind are expected to be dealt consecutive indices"
+    return slice(indices[0], indices[-1] + 1)
+
+
+def _shifted(cards: slice) -> slice:
+    """Positions of a range of cards in an action block, which has no column for index 0"""
+    return slice(cards.start - 1, cards.stop - 1)
+
+
+BUILDABLE_CARDS = _card_range(IS_BUILDABLE)
+HOUSE_CARDS = _card_range(IS_HOUSE)
+HOTEL_CARDS = _card_range(IS_HOTEL)
+
+SET_SIZE = np.array([NUM_CARDS + 1] + [SET_SIZES[code] for code in range(1, NUM_COLORS + 1)], dtype=np.int64)
+RENTS = np.zeros((NUM_COLORS + 1, max(SET_SIZE[1:])), dtype=np.int64)
+for _color, _rents in property_set_rents.items():
+    RENTS[COLOR_CODES[_color]] = _rents + _rents[-1:] * (RENTS.shape[1] - len(_rents))
+FULL_RENT = RENTS[:, -1]
+
+# Owner, set slot and whether a location is a set slot at all, by location code
+_LOCATIONS = np.arange(PLAYER_BASE + MAX_PLAYERS * PLAYER_STRIDE)
+LOCATION_OWNER = np.clip((_LOCATIONS - PLAYER_BASE) // PLAYER_STRIDE, 0, None)
+LOCATION_SLOT = np.clip((_LOCATIONS - PLAYER_BASE) % PLAYER_STRIDE - SETS, 0, None)
+LOCATION_IN_SET = (_LOCATIONS >= PLAYER_BASE) & ((_LOCATIONS - PLAYER_BASE) % PLAYER_STRIDE >= SETS)
+LOCATION_SET_SLOT = np.where(LOCATION_IN_SET, LOCATION_OWNER * MAX_SETS + LOCATION_SLOT, -1)  # Owner x set slot
+
+# Cards sorted by kind, so the first card of each kind in a hand can be found with one cumulative sum
+_kind_ids = {kind: i for i, kind in enumerate(sorted(set(CARD_KINDS.values())))}
+_BY_KIND = np.array(sorted(deck, key=lambda index: (_kind_ids[CARD_KINDS[index]], index)))
+_KIND_START = np.zeros(NUM_CARDS, dtype=np.int64)
+for _position in range(1, NUM_CARDS):
+    same_kind = CARD_KINDS[_BY_KIND[_position]] == CARD_KINDS[_BY_KIND[_position - 1]]
+    _KIND_START[_position] = _KIND_START[_position - 1] if same_kind else _position
+
+
+def _build_action_tables():
+    types = np.zeros(NUM_ACTIONS, dtype=np.int64)
+    cards = np.zeros(NUM_ACTIONS, dtype=np.int64)
+    arguments = np.zeros(NUM_ACTIONS, dtype=np.int64)
+    types[[END_TURN, PASS_GO, ACCEPT, SAY_NO]] = [T_END_TURN, T_PASS_GO, T_ACCEPT, T_SAY_NO]
+    card_indices = np.arange(1, NUM_CARDS + 1)
+    for base, action_type in ((CASH_BASE, T_CASH), (SLY_DEAL_BASE, T_SLY_DEAL), (FORCED_DEAL_BASE, T_FORCED_DEAL),
+                              (GIVE_BASE, T_GIVE), (DISCARD_BASE, T_DISCARD)):
+        types[base:base + NUM_CARDS] = action_type
+        cards[base:base + NUM_CARDS] = card_indices
+    types[PROPERTY_BASE:CHARGE_BASE] = T_PROPERTY
+    cards[PROPERTY_BASE:CHARGE_BASE] = np.repeat(card_indices, NUM_COLORS)
+    arguments[PROPERTY_BASE:CHARGE_BASE] = np.tile(np.arange(1, NUM_COLORS + 1), NUM_CARDS)
+    types[CHARGE_BASE:SLY_DEAL_BASE] = T_CHARGE
+    cards[CHARGE_BASE:SLY_DEAL_BASE] = np.repeat(card_indices, MAX_PLAYERS - 1)
+    arguments[CHARGE_BASE:SLY_DEAL_BASE] = np.tile(np.arange(1, MAX_PLAYERS), NUM_CARDS)
+    types[DEAL_BREAKER_BASE:DISCARD_BASE] = T_DEAL_BREAKER
+    arguments[DEAL_BREAKER_BASE:DISCARD_BASE] = np.arange((MAX_PLAYERS - 1) * MAX_SETS)
+    return types, cards, arguments
+
+
+# Type, card and argument (color code, target offset, or target offset x MAX_SETS + slot) of every action id
+ACTION_TYPES, ACTION_CARDS, ACTION_ARGUMENTS = _build_action_tables()
+
+
+def first_of_kind(cards: np.ndarray) -> np.ndarray:
+    """Keep only the lowest indexed card of each kind in a (games x card index) mask"""
+    by_kind = cards[:, _BY_KIND]
+    counts = np.cumsum(by_kind, axis=1)
+    before = np.concatenate([np.zeros((len(cards), 1), dtype=counts.dtype), counts], axis=1)[:, _KIND_START]
+    first = np.zeros_like(cards)
+    first[:, _BY_KIND] = by_kind & (counts - before == 1)
+    return first
+
+
+def sample_actions(legal: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Pick a legal action uniformly at random for every game (0 for games without any)"""
+    rows, action_ids = np.divmod(np.flatnonzero(legal), legal.shape[1])  # Far quicker than a 2-d nonzero
+    if len(action_ids) == 0:
+        return np.zeros(len(legal), dtype=np.int64)
+    counts = np.bincount(rows, minlength=len(legal))
+    starts = np.cumsum(counts) - counts
+    choice = starts + (rng.random(len(legal)) * counts).astype(np.int64)
+    return np.where(counts > 0, action_ids[np.minimum(choice, len(action_ids) - 1)], 0)
+
+
+def choice_action_ids(player: Player, num_players: int, card: Optional[Card], action: Action) -> Tuple[int, ...]:
+    """Action ids a `play.step` choice of `player` stands for.
+
+    Cards played map to the lowest indexed card of their kind in hand, as `legal_actions` offers them, every payment
+    is ACCEPT, a Forced Deal is its `SwapTarget` (card to take) and then its `Swap` (card to give), and a discard of
+    several cards stands for the id of each of them.
+    """
+    def played(card: Card) -> int:
+        kind = CARD_KINDS[card.index]
+        return min(other.index for other in player.hand.cards_in_hand if CARD_KINDS[other.index] == kind)
+
+    def offset(target: Player) -> int:
+        return (target.index - player.index) % num_players
+
+    if isinstance(action, EndTurn):
+        return END_TURN,
+    if isinstance(action, Draw):
+        return PASS_GO,
+    if isinstance(action, (NoResponse, Pay)):
+        return ACCEPT,
+    if isinstance(action, SayNo):
+        return SAY_NO,
+    if isinstance(action, PlayAsCash):
+        return CASH_BASE + played(card) - 1,
+    if isinstance(action, PlayProperty):
+        return PROPERTY_BASE + (played(card) - 1) * NUM_COLORS + COLOR_CODES[action.color] - 1,
+    if isinstance(action, Charge):
+        return CHARGE_BASE + (played(card) - 1) * (MAX_PLAYERS - 1) + offset(action.target_player) - 1,
+    if isinstance(action, StealCard):
+        return SLY_DEAL_BASE + action.steal_card.index - 1,
+    if isinstance(action, SwapTarget):
+        return FORCED_DEAL_BASE + action.steal_card.index - 1,
+    if isinstance(action, Swap):
+        return GIVE_BASE + action.give_card.index - 1,
+    if isinstance(action, StealSet):
+        slot = action.target_player.board.property_sets.index(action.steal_set)
+        return DEAL_BREAKER_BASE + (offset(action.target_player) - 1) * MAX_SETS + slot,
+    if isinstance(action, Discard):
+        return tuple(sorted({DISCARD_BASE + played(card) - 1 for card in action.discard_cards}))
+    raise ValueError(f"No action id for {action}")
+
+
+class SlotStats:
+    """Per game, player and set slot: buildable cards, houses, hotels, completeness and rent due"""
+    def __init__(self, buildable: np.ndarray, houses: np.ndarray, hotels: np.ndarray, colors: np.ndarray):
+        self.buildable = buildable
+        self.houses = houses
+        self.hotels = hotels
+        self.colors = colors
+        self.complete = (colors > 0) & (buildable >= SET_SIZE[colors])
+
+    @property
+    def rent(self) -> np.ndarray:
+        partial_rent = RENTS[self.colors, np.clip(self.buildable - 1, 0, RENTS.shape[1] - 1)]
+        full_rent = FULL_RENT[self.colors] + 3 * self.houses + 4 * self.hotels
+        return np.where(self.buildable == 0, 0, np.where(self.complete, full_rent, partial_rent))
+
+
+class BatchGame:
+    """Many games held as arrays and advanced one decision at a time, all at once.
+
+    Cards are tracked like `CompactGame`: each card has a location code and the arrival stamp that orders the cards
+    in a location, and each player has up to `MAX_SETS` set slots holding a color code. Every game is always waiting
+    on a decision from one player, given by `phase`; `legal_actions()` masks the action ids available to it and
+    `step()` applies one id per game and plays on to the next decision.
+
+    Rules follow `play.step`, including how it resolves chains: a Just Say No only stops a charge from being paid,
+    and any Just Say No in a chain resets the number of cards played this turn. The choice of cards to pay with is
+    not an action; a random minimal set of cards is paid like the options `get_available_responses` offers.
+    """
+    def __init__(self, num_games: int, num_players: int, rng: np.random.Generator = None,
+                 shuffle: Callable[[List[int]], None] = None):
+        if not 2 <= num_players <= MAX_PLAYERS:
+            raise ValueError(f"Between 2 and {MAX_PLAYERS} players are supported")
+        self.num_games = num_games
+        self.num_players = num_players
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.shuffle = shuffle  # Shuffles a list of card indices in place when the deck is rebuilt; defaults to rng
+        self.record_payments = False
+
+        self.location = np.zeros((num_games, NUM_CARDS + 1), dtype=np.int64)
+        self.order = np.zeros((num_games, NUM_CARDS + 1), dtype=np.int64)
+        self.clock = np.zeros(num_games, dtype=np.int64)
+        self.set_color = np.zeros((num_games, num_players, MAX_SETS), dtype=np.int64)
+        self.turn = np.zeros(num_games, dtype=np.int64)
+        self.cards_played = np.zeros(num_games, dtype=np.int64)
+        self.phase = np.full(num_games, PLAY, dtype=np.int64)
+        self.winner = np.full(num_games, -1, dtype=np.int64)
+
+        # The respondable action waiting in each game's chain
+        self.pending = np.zeros(num_games, dtype=np.int64)
+        self.pending_target = np.zeros(num_games, dtype=np.int64)
+        self.pending_card = np.zeros(num_games, dtype=np.int64)  # Card to steal
+        self.pending_give = np.zeros(num_games, dtype=np.int64)
+        self.pending_slot = np.zeros(num_games, dtype=np.int64)
+        self.pending_amount = np.zeros(num_games, dtype=np.int64)
+        self.responder = np.zeros(num_games, dtype=np.int64)
+        self.said_no = np.zeros(num_games, dtype=bool)
+
+        # Cash and property cards paid in each game during the last step, when `record_payments` is set
+        self.payments: Dict[int, Tuple[List[int], List[int]]] = {}
+
+    @classmethod
+    def new(cls, num_games: int, num_players: int, seed: int = None, shuffle: Callable[[List[int]], None] = None):
+        """Shuffle and deal fresh games, as `play.new_game`, and start the first turn"""
+        batch = cls(num_games=num_games, num_players=num_players, rng=np.random.default_rng(seed), shuffle=shuffle)
+        batch.deal(np.arange(num_games))
+        return batch
+
+    @classmethod
+    def from_games(cls, games: Sequence[Game], rng: np.random.Generator = None,
+                   shuffle: Callable[[List[int]], None] = None):
+        """Load games that are at the start of a turn (state 0) or waiting for a play (state 1)"""
+        batch = cls(num_games=len(games), num_players=len(games[0].players), rng=rng, shuffle=shuffle)
+        for row, game in enumerate(games):
+            if game.state not in (0, 1, 1.5):
+                raise ValueError("Games can only be loaded at the start of a turn or of a play")
+            compact = CompactGame.from_game(game)
+            cells = np.array(compact.cells, dtype=np.int64)
+            batch.location[row, 1:] = cells[1:NUM_CARDS + 1] >> ORDER_BITS
+            batch.order[row, 1:] = cells[1:NUM_CARDS + 1] & ORDER_MASK
+            batch.clock[row] = cells[0]
+            batch.set_color[row] = cells[NUM_CARDS + 1:].reshape(batch.num_players, MAX_SETS)
+            batch.turn[row] = game.current_turn_index
+            batch.cards_played[row] = game.cards_played
+        batch._start_turn(np.array([row for row, game in enumerate(games) if game.state == 0], dtype=np.int64))
+        return batch
+
+    def deal(self, rows: np.ndarray):
+        """Start fresh games in `rows`, whatever state they were in"""
+        rows = np.asarray(rows, dtype=np.int64)
+        for table in (self.location, self.order, self.set_color, self.turn, self.cards_played, self.pending,
+                      self.pending_target, self.pending_card, self.pending_give, self.pending_slot,
+                      self.pending_amount, self.responder, self.said_no):
+            table[rows] = 0
+        self.winner[rows] = -1
+        game_decks = np.argsort(self.rng.random((len(rows), NUM_CARDS)), axis=1) + 1
+        self.location[rows[:, None], game_decks] = DECK
+        self.order[rows[:, None], game_decks] = np.arange(NUM_CARDS)
+        self.clock[rows] = NUM_CARDS
+        for player_index in range(self.num_players):
+            self._draw(rows, np.full(len(rows), player_index), 5)
+        self._start_turn(rows)
+
+    def to_compact(self, row: int) -> CompactGame:
+        cells = np.zeros(1 + NUM_CARDS + self.num_players * MAX_SETS, dtype=np.int64)
+        cells[0] = self.clock[row]
+        cells[1:NUM_CARDS + 1] = (self.location[row, 1:] << ORDER_BITS) | self.order[row, 1:]
+        cells[NUM_CARDS + 1:] = self.set_color[row].ravel()
+        state = {PLAY: 1, RESPOND: 2, GIVE: 2, DISCARD_PHASE: 3, OVER: 3}[int(self.phase[row])]
+        return CompactGame(cells=array('L', cells.tolist()), num_players=self.num_players,
+                           current_turn_index=int(self.turn[row]), cards_played=int(self.cards_played[row]),
+                           state=state)
+
+    def to_game(self, row: int) -> Game:
+        return self.to_compact(row).to_game()
+
+    def is_over(self) -> np.ndarray:
+        return self.phase == OVER
+
+    def current_player(self) -> np.ndarray:
+        """Index of the player each game is waiting on"""
+        return np.where(self.phase == RESPOND, self.responder, self.turn)
+
+    # Legal moves
+
+    def legal_actions(self, rows: np.ndarray = None) -> np.ndarray:
+        """Mask of the legal action ids of the games in `rows` (every game by default), (len(rows) x NUM_ACTIONS)"""
+        if rows is None:
+            rows = np.arange(self.num_games)
+            turn, phase, location, responder = self.turn, self.phase, self.location, self.responder
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            turn, phase, location, responder = self.turn[rows], self.phase[rows], self.location[rows], \
+                self.responder[rows]
+        num_games, num_players = len(rows), self.num_players
+        local = np.arange(num_games)
+        legal = np.zeros((num_games, NUM_ACTIONS), dtype=bool)
+        stats = self._slot_stats(rows)
+        hand = location == hand_location(turn)[:, None]
+        representatives = first_of_kind(hand)
+
+        play = phase == PLAY
+        legal[:, END_TURN] = play
+        legal[:, PASS_GO] = play & (hand & IS_PASS_GO).any(axis=1)
+        playing = representatives & play[:, None]
+        legal[:, CASH_BASE:PROPERTY_BASE] = (playing & IS_CASHABLE)[:, 1:]
+
+        own_colors = self.set_color[rows, turn]
+        own_complete = stats.complete[local, turn]
+        own_houses = stats.houses[local, turn]
+        # Colors the player has a set, a complete set or a complete set with a house of, column 0 soaking up the rest
+        has_set = np.zeros((num_games, NUM_COLORS + 1), dtype=bool)
+        has_complete, has_hotel_site = np.zeros_like(has_set), np.zeros_like(has_set)
+        has_set[local[:, None], own_colors] = True
+        has_complete[local[:, None], np.where(own_complete, own_colors, 0)] = True
+        has_hotel_site[local[:, None], np.where(own_complete & (own_houses > 0), own_colors, 0)] = True
+        has_set[:, 0] = has_complete[:, 0] = has_hotel_site[:, 0] = False
+        # Filled in place through a view of the mask, the card x color block is most of its width
+        playable = self._action_block(legal, PROPERTY_BASE, NUM_COLORS)
+        np.logical_and(playing[:, BUILDABLE_CARDS, None], PLAYABLE_COLORS[BUILDABLE_CARDS, 1:],
+                       out=playable[:, _shifted(BUILDABLE_CARDS)])
+        np.logical_and(playing[:, HOUSE_CARDS, None], has_complete[:, None, 1:], out=playable[:, _shifted(HOUSE_CARDS)])
+        np.logical_and(playing[:, HOTEL_CARDS, None], has_hotel_site[:, None, 1:],
+                       out=playable[:, _shifted(HOTEL_CARDS)])
+
+        rent_due = playing & IS_RENT & (has_set.astype(np.float32) @ RENT_COLORS_T > 0)
+        chargeable = rent_due | (playing & (IS_BIRTHDAY | IS_DEBT_COLLECTOR))
+        charges = self._action_block(legal, CHARGE_BASE, MAX_PLAYERS - 1)
+        charges[:, :, :num_players - 1] = chargeable[:, 1:, None]
+        offsets = np.arange(1, MAX_PLAYERS) < num_players
+
+        owner, slot, in_set = self._card_slots(location)
+        card_complete = stats.complete[local[:, None], owner, slot] & in_set
+        incomplete = in_set & ~card_complete
+        theirs = incomplete & (owner != turn[:, None])
+        mine = incomplete & (owner == turn[:, None])
+        can_sly = play & (hand & IS_SLY_DEAL).any(axis=1)
+        can_force = play & (hand & IS_FORCED_DEAL).any(axis=1) & mine.any(axis=1)
+        legal[:, SLY_DEAL_BASE:FORCED_DEAL_BASE] = (theirs & can_sly[:, None])[:, 1:]
+        legal[:, FORCED_DEAL_BASE:GIVE_BASE] = (theirs & can_force[:, None])[:, 1:]
+        can_break = play & (hand & IS_DEAL_BREAKER).any(axis=1)
+        targets = (turn[:, None] + np.arange(1, MAX_PLAYERS)) % num_players
+        breakable = stats.complete[local[:, None], targets] & offsets[:, None] & can_break[:, None, None]
+        legal[:, DEAL_BREAKER_BASE:DISCARD_BASE] = breakable.reshape(num_games, -1)
+
+        respond = phase == RESPOND
+        responder_hand = location == hand_location(responder)[:, None]
+        legal[:, ACCEPT] = respond
+        legal[:, SAY_NO] = respond & (responder_hand & IS_JUST_SAY_NO).any(axis=1)
+
+        legal[:, GIVE_BASE:DEAL_BREAKER_BASE] = (mine & (phase == GIVE)[:, None])[:, 1:]
+        legal[:, DISCARD_BASE:] = (representatives & (phase == DISCARD_PHASE)[:, None])[:, 1:]
+        return legal
+
+    @staticmethod
+    def _action_block(legal: np.ndarray, base: int, width: int) -> np.ndarray:
+        """Writable (games x card x width) view of the card-indexed block of action ids starting at `base`"""
+        block = legal[:, base:base + NUM_CARDS * width]
+        block.shape = (len(legal), NUM_CARDS, width)  # Raises rather than silently copying
+        return block
+
+    # Transitions
+
+    def step(self, actions: Sequence[int], check: bool = False):
+        """Apply one action id per game (ignored for games that are over) and play on to the next decision"""
+        actions = np.asarray(actions, dtype=np.int64)
+        active = np.nonzero(self.phase != OVER)[0]
+        if check:
+            legal = self.legal_actions()
+            assert legal[active, actions[active]].all(), "Illegal action"
+        self.payments = {}
+        action_types = ACTION_TYPES[actions[active]]
+        touched = []
+
+        def rows_of(action_type: int) -> np.ndarray:
+            rows = active[action_types == action_type]
+            touched.append(rows)
+            return rows
+
+        rows = rows_of(T_END_TURN)
+        self._end_turn(rows)
+
+        rows = rows_of(T_PASS_GO)
+        self._draw(rows, self.turn[rows], CARDS_TO_DRAW)  # Pass Go stays in hand, as in `play.execute_actions`
+        self.cards_played[rows] += 1
+
+        rows = rows_of(T_CASH)
+        self._move(rows, ACTION_CARDS[actions[rows]], cash_location(self.turn[rows]))
+        self.cards_played[rows] += 1
+
+        rows = rows_of(T_PROPERTY)
+        self._place_property(rows, self.turn[rows], ACTION_CARDS[actions[rows]], ACTION_ARGUMENTS[actions[rows]],
+                             is_bounty=False)
+        self.cards_played[rows] += 1
+
+        rows = rows_of(T_CHARGE)
+        cards = ACTION_CARDS[actions[rows]]
+        amounts = np.where(IS_BIRTHDAY[cards], 2, np.where(IS_DEBT_COLLECTOR[cards], 5, 0))
+        rent_rows = IS_RENT[cards]
+        amounts[rent_rows] = self.rent_due(rows[rent_rows], cards[rent_rows])
+        self._move(rows, cards, DISCARD)
+        self._open_chain(rows, CHARGE, (self.turn[rows] + ACTION_ARGUMENTS[actions[rows]]) % self.num_players)
+        self.pending_amount[rows] = amounts
+
+        rows = rows_of(T_SLY_DEAL)
+        cards = ACTION_CARDS[actions[rows]]
+        self._move(rows, self._first_in_hand(rows, self.turn[rows], IS_SLY_DEAL), DISCARD)
+        self._open_chain(rows, STEAL, self._card_slots(self.location[rows, cards])[0])
+        self.pending_card[rows] = cards
+
+        rows = rows_of(T_FORCED_DEAL)
+        cards = ACTION_CARDS[actions[rows]]
+        self._move(rows, self._first_in_hand(rows, self.turn[rows], IS_FORCED_DEAL), DISCARD)
+        self.pending_target[rows] = self._card_slots(self.location[rows, cards])[0]
+        self.pending_card[rows] = cards
+        self.phase[rows] = GIVE
+
+        rows = rows_of(T_GIVE)
+        self.pending_give[rows] = ACTION_CARDS[actions[rows]]
+        self._open_chain(rows, SWAP, self.pending_target[rows])
+
+        rows = rows_of(T_DEAL_BREAKER)
+        offsets, slots = np.divmod(ACTION_ARGUMENTS[actions[rows]], MAX_SETS)
+        self._move(rows, self._first_in_hand(rows, self.turn[rows], IS_DEAL_BREAKER), DISCARD)
+        self._open_chain(rows, STEAL_SET, (self.turn[rows] + offsets + 1) % self.num_players)
+        self.pending_slot[rows] = slots
+
+        rows = rows_of(T_SAY_NO)
+        self._move(rows, self._first_in_hand(rows, self.responder[rows], IS_JUST_SAY_NO), DISCARD)
+        self.said_no[rows] = True
+        self.responder[rows] = np.where(
+            self.responder[rows] == self.turn[rows], self.pending_target[rows], self.turn[rows]
+        )
+
+        rows = rows_of(T_ACCEPT)
+        self._resolve(rows)
+
+        rows = rows_of(T_DISCARD)
+        self._move(rows, ACTION_CARDS[actions[rows]], DISCARD)
+        done = self._hand_sizes(rows, self.turn[rows]) <= MAX_CARDS_IN_HAND
+        self._next_turn(rows[done])
+
+        # A winner ends the game straight away, otherwise the turn ends after the last card it may play
+        rows = np.concatenate(touched)
+        rows = rows[self.phase[rows] != OVER]
+        complete_sets = self._slot_stats(rows).complete.sum(axis=2) >= 3
+        won = complete_sets.any(axis=1)
+        self.winner[rows[won]] = complete_sets[won].argmax(axis=1)
+        self.phase[rows[won]] = OVER
+        rows = rows[~won]
+        self._end_turn(rows[(self.phase[rows] == PLAY) & (self.cards_played[rows] >= MAX_PLAYS_PER_TURN)])
+
+    def rent_due(self, rows: np.ndarray, cards: np.ndarray) -> np.ndarray:
+        """Best rent the current player can charge with each rent card, over every set of its colors"""
+        stats = self._slot_stats(rows)
+        players = self.turn[rows]
+        local = np.arange(len(rows))
+        matching = RENT_COLORS[cards[:, None], self.set_color[rows, players]]
+        return np.where(matching, stats.rent[local, players], 0).max(axis=1, initial=0)
+
+    # Helpers; `rows` never holds the same game twice
+
+    def _slot_stats(self, rows: np.ndarray) -> SlotStats:
+        num_rows = len(rows)
+        set_slots = LOCATION_SET_SLOT[self.location[rows]]
+        positions = np.flatnonzero(set_slots >= 0)
+        cards = positions % (NUM_CARDS + 1)
+        flat = positions // (NUM_CARDS + 1) * (self.num_players * MAX_SETS) + set_slots.ravel()[positions]
+        size = num_rows * self.num_players * MAX_SETS
+
+        def count(table: np.ndarray) -> np.ndarray:
+            counts = np.bincount(flat, weights=table[cards], minlength=size).astype(np.int64)
+            return counts.reshape(num_rows, self.num_players, MAX_SETS)
+
+        return SlotStats(
+            buildable=count(IS_BUILDABLE),
+            houses=count(IS_HOUSE),
+            hotels=count(IS_HOTEL),
+            colors=self.set_color[rows]
+        )
+
+    def _card_slots(self, locations: np.ndarray):
+        """Owner and set slot of the cards at `locations`, and whether they are in a set at all"""
+        return LOCATION_OWNER[locations], LOCATION_SLOT[locations], LOCATION_IN_SET[locations]
+
+    def _hand_sizes(self, rows: np.ndarray, players: np.ndarray) -> np.ndarray:
+        return (self.location[rows] == hand_location(players)[:, None]).sum(axis=1)
+
+    def _first_in_hand(self, rows: np.ndarray, players: np.ndarray, table: np.ndarray) -> np.ndarray:
+        return np.argmax((self.location[rows] == hand_location(players)[:, None]) & table, axis=1)
+
+    def _cards_at(self, row: int, location: int) -> List[int]:
+        cards = np.nonzero(self.location[row] == location)[0]
+        return cards[np.argsort(self.order[row, cards])].tolist()
+
+    def _move(self, rows: np.ndarray, cards: np.ndarray, locations):
+        self.location[rows, cards] = locations
+        self.order[rows, cards] = self.clock[rows]
+        self.clock[rows] += 1
+
+    def _open_chain(self, rows: np.ndarray, pending: int, targets: np.ndarray):
+        self.pending[rows] = pending
+        self.pending_target[rows] = targets
+        self.responder[rows] = targets
+        self.said_no[rows] = False
+        self.phase[rows] = RESPOND
+
+    def _resolve(self, rows: np.ndarray):
+        """Carry out the chains that nobody responded to any further"""
+        pending = self.pending[rows]
+        said_no = self.said_no[rows]
+        players = self.turn[rows]
+        targets = self.pending_target[rows]
+
+        paying = (pending == CHARGE) & ~said_no
+        self._pay(rows[paying], payers=targets[paying], payees=players[paying], amounts=self.pending_amount[rows[paying]])
+
+        stealing = (pending == STEAL) | (pending == SWAP)
+        self._transfer_property(rows[stealing], self.pending_card[rows[stealing]], players[stealing])
+        swapping = pending == SWAP
+        self._transfer_property(rows[swapping], self.pending_give[rows[swapping]], targets[swapping])
+
+        for row, player, target in zip(rows[pending == STEAL_SET], players[pending == STEAL_SET],
+                                       targets[pending == STEAL_SET]):
+            self._steal_set(row, stolen_to=player, stolen_from=target, slot=self.pending_slot[row])
+
+        self.cards_played[rows] = np.where(said_no, 0, self.cards_played[rows] + 1)
+        self.pending[rows] = 0
+        self.pending_amount[rows] = 0
+        self.said_no[rows] = False
+        self.phase[rows] = PLAY
+
+    def _place_property(self, rows: np.ndarray, players: np.ndarray, cards: np.ndarray, colors: np.ndarray,
+                        is_bounty: bool):
+        """Add property cards to sets as `Board.play_property_card` does, opening new sets where needed"""
+        if len(rows) == 0:
+            return
+        local = np.arange(len(rows))
+        stats = self._slot_stats(rows)
+        own_colors = self.set_color[rows, players]
+        complete = stats.complete[local, players]
+        matches = own_colors == colors[:, None]
+        candidates = matches & np.where(IS_BUILDABLE[cards][:, None], ~complete, complete)
+        if not is_bounty:
+            candidates &= ~IS_HOTEL[cards][:, None] | (stats.houses[local, players] > 0)
+        has_candidate = candidates.any(axis=1)
+        slots = np.where(has_candidate, candidates.argmax(axis=1), (own_colors > 0).sum(axis=1))
+        assert (slots < MAX_SETS).all(), "Too many property sets"
+        new = ~has_candidate
+        self.set_color[rows[new], players[new], slots[new]] = colors[new]
+        self._move(rows, cards, set_location(players, slots))
+
+    def _transfer_property(self, rows: np.ndarray, cards: np.ndarray, to_players: np.ndarray):
+        """Move property cards into `to_players`' sets, keeping the color of the set they came from"""
+        owner, slot, _ = self._card_slots(self.location[rows, cards])
+        self._place_property(rows, to_players, cards, self.set_color[rows, owner, slot], is_bounty=True)
+
+    def _steal_set(self, row: int, stolen_to: int, stolen_from: int, slot: int):
+        color = self.set_color[row, stolen_from, slot]
+        cards = self._cards_at(row, set_location(stolen_from, slot))
+        # Later sets shift down a slot, keeping the order of their cards
+        later = (self.location[row] > set_location(stolen_from, slot)) & \
+                (self.location[row] <= set_location(stolen_from, MAX_SETS - 1))
+        self.location[row, later] -= 1
+        self.set_color[row, stolen_from, slot:-1] = self.set_color[row, stolen_from, slot + 1:]
+        self.set_color[row, stolen_from, -1] = 0
+
+        new_slot = int((self.set_color[row, stolen_to] > 0).sum())
+        assert new_slot < MAX_SETS, "Too many property sets"
+        self.set_color[row, stolen_to, new_slot] = color
+        self.location[row, cards] = set_location(stolen_to, new_slot)
+
+    def _pay(self, rows: np.ndarray, payers: np.ndarray, payees: np.ndarray, amounts: np.ndarray):
+        """Settle charges like the options of `get_available_responses`.
+
+        Players who cannot cover the bill pay everything. Others pay with their largest cash first, as far as it goes
+        without overpaying, and cover any rest with a random minimal set of their other valuable cards.
+        """
+        if len(rows) == 0:
+            return
+        locations = self.location[rows]
+        relative = locations - (PLAYER_BASE + payers * PLAYER_STRIDE)[:, None]
+        cash = relative == CASH
+        properties = (relative >= SETS) & (relative < PLAYER_STRIDE)
+        owned = cash | properties
+        total = (owned * VALUES).sum(axis=1)
+
+        everything = amounts >= total
+        paid = owned & everything[:, None]
+        remaining = np.where(everything, 0, amounts)
+        for value in sorted(set(VALUES[IS_CASHABLE]), reverse=True):
+            of_value = cash & (VALUES == value) & ~everything[:, None]
+            used = np.minimum(of_value.sum(axis=1), remaining // value)
+            paid |= of_value & (np.cumsum(of_value, axis=1) <= used[:, None])
+            remaining -= used * value
+
+        if (remaining > 0).any():
+            eligible = owned & ~paid & (VALUES > 0) & (remaining > 0)[:, None]
+            shuffled = np.argsort(np.where(eligible, self.rng.random(eligible.shape), 2.0), axis=1)
+            shuffled_values = np.take_along_axis(np.where(eligible, VALUES, 0), shuffled, axis=1)
+            before = np.cumsum(shuffled_values, axis=1) - shuffled_values
+            extra = np.zeros_like(eligible)
+            np.put_along_axis(extra, shuffled, (before < remaining[:, None]) & (shuffled_values > 0), axis=1)
+            # Drop the smallest cards while the rest still cover the bill, so that the payment is minimal
+            excess = (extra * VALUES).sum(axis=1) - remaining
+            for value in sorted(set(VALUES[VALUES > 0])):
+                of_value = extra & (VALUES == value)
+                dropped = np.minimum(of_value.sum(axis=1), excess // value)
+                extra &= ~(of_value & (np.cumsum(of_value, axis=1) <= dropped[:, None]))
+                excess -= dropped * value
+            paid |= extra
+
+        paid_cash = paid & cash
+        if self.record_payments:
+            for row, cash_cards, property_cards in zip(rows, paid_cash, paid & properties):
+                self.payments[int(row)] = (np.nonzero(cash_cards)[0].tolist(), np.nonzero(property_cards)[0].tolist())
+
+        local, cards = np.nonzero(paid_cash)
+        counts = paid_cash.sum(axis=1)
+        arrival = np.arange(len(cards)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.location[rows[local], cards] = cash_location(payees[local])
+        self.order[rows[local], cards] = self.clock[rows[local]] + arrival
+        self.clock[rows] += counts
+
+        # Property cards go over one at a time, since each can change which set the next one joins
+        paid_properties = paid & properties
+        while paid_properties.any():
+            local = np.nonzero(paid_properties.any(axis=1))[0]
+            cards = paid_properties[local].argmax(axis=1)
+            self._transfer_property(rows[local], cards, payees[local])
+            paid_properties[local, cards] = False
+
+    def _draw(self, rows: np.ndarray, players: np.ndarray, num_to_draw: int):
+        in_deck = self.location[rows] == DECK
+        short = in_deck.sum(axis=1) <= num_to_draw
+        for row, player in zip(rows[short], players[short]):
+            self._draw_and_reshuffle(row, player, num_to_draw)
+        rows, players, in_deck = rows[~short], players[~short], in_deck[~short]
+        top = np.argsort(np.where(in_deck, self.order[rows], np.iinfo(np.int64).max), axis=1)[:, :num_to_draw]
+        for i in range(num_to_draw):
+            self._move(rows, top[:, i], hand_location(players))
+
+    def _draw_and_reshuffle(self, row: int, player: int, num_to_draw: int):
+        """Draw what is left of the deck, rebuild it from the discard pile, and draw the rest, as `Game.draw_cards`"""
+        rows = np.array([row])
+        drawn = self._cards_at(row, DECK)
+        for card in drawn:
+            self._move(rows, card, hand_location(player))
+        game_deck = self._cards_at(row, DISCARD)
+        if self.shuffle is not None:
+            self.shuffle(game_deck)
+        else:
+            self.rng.shuffle(game_deck)
+        for card in game_deck:
+            self._move(rows, card, DECK)
+        for card in game_deck[:num_to_draw - len(drawn)]:
+            self._move(rows, card, hand_location(player))
+
+    def _start_turn(self, rows: np.ndarray):
+        self._draw(rows, self.turn[rows], CARDS_TO_DRAW)
+        self.phase[rows] = PLAY
+
+    def _end_turn(self, rows: np.ndarray):
+        discarding = self._hand_sizes(rows, self.turn[rows]) > MAX_CARDS_IN_HAND
+        self.phase[rows[discarding]] = DISCARD_PHASE
+        self._next_turn(rows[~discarding])
+
+    def _next_turn(self, rows: np.ndarray):
+        self.turn[rows] = (self.turn[rows] + 1) % self.num_players
+        self.cards_played[rows] = 0
+        out_of_cards = (self.location[rows] == DECK).sum(axis=1) == 0
+        self.phase[rows[out_of_cards]] = OVER
+        self._start_turn(rows[~out_of_cards])
+
+
+# Games masked at once by `play_random`; beyond about this many, masks stop fitting in cache and throughput drops
+MASK_BLOCK = 1024
+
+
+def play_random(num_games: int, num_players: int = 2, seed: int = None, max_steps: int = 100000) -> BatchGame:
+    """Play games to the end with uniformly random legal actions"""
+    batch = BatchGame.new(num_games=num_games, num_players=num_players, seed=seed)
+    actions = np.zeros(num_games, dtype=np.int64)
+    for _ in range(max_steps):
+        # Only games still going are masked and sampled, so the long tail of a batch costs what is left of it
+        active = np.flatnonzero(batch.phase != OVER)
+        if len(active) == 0:
+            break
+        # A block at a time, so that the masks and their temporaries stay in cache however large the batch
+        for start in range(0, len(active), MASK_BLOCK):
+            rows = active[start:start + MASK_BLOCK]
+            actions[rows] = sample_actions(batch.legal_actions(rows), batch.rng)
+        batch.step(actions)
+    return batch
+
+
+# Cross-checking against the reference engine
+
+def _snapshot(game: Game):
+    return game.serialize(), game.game_deck, game.current_turn_index, game.cards_played
+
+
+def _batch_signature(batch: BatchGame, row: int, action_id: int):
+    """`choice_signature` of the reference choice an action id stands for"""
+    action_type, card, argument = ACTION_TYPES[action_id], ACTION_CARDS[action_id], ACTION_ARGUMENTS[action_id]
+    player = int(batch.turn[row])
+    rows = np.array([row])
+
+    def played(table: np.ndarray):
+        return card_kind(deck[int(batch._first_in_hand(rows, np.array([player]), table)[0])])
+
+    def set_of(card: int):
+        owner, slot, _ = batch._card_slots(batch.location[row, card])
+        return int(owner), int(slot)
+
+    if action_type == T_END_TURN:
+        return None, ('EndTurn',)
+    if action_type == T_PASS_GO:
+        return played(IS_PASS_GO), ('draw', CARDS_TO_DRAW)
+    kind = card_kind(deck[int(card)]) if card else None
+    if action_type == T_CASH:
+        return kind, ('cash', kind)
+    if action_type == T_PROPERTY:
+        return kind, ('property', kind, SET_COLORS[argument - 1])
+    if action_type == T_CHARGE:
+        if IS_RENT[card]:
+            amount = int(batch.rent_due(rows, np.array([card]))[0])
+        else:
+            amount = 2 if IS_BIRTHDAY[card] else 5
+        return kind, ('charge', (player + int(argument)) % batch.num_players, amount)
+    if action_type == T_SLY_DEAL:
+        return played(IS_SLY_DEAL), ('steal',) + set_of(card) + (kind,)
+    if action_type == T_FORCED_DEAL:
+        return played(IS_FORCED_DEAL), ('swap_target',) + set_of(card) + (kind,)
+    if action_type == T_DEAL_BREAKER:
+        offset, slot = divmod(int(argument), MAX_SETS)
+        return played(IS_DEAL_BREAKER), ('steal_set', (player + offset + 1) % batch.num_players, slot)
+    raise ValueError(f"Action {action_id} is not a play")
+
+
+def _reference_choice(batch: BatchGame, row: int, game: Game, actions: Tuple, action_id: int):
+    """The reference (card, action) for an action id, taken before the batch applies it"""
+    action_type, card, argument = ACTION_TYPES[action_id], ACTION_CARDS[action_id], ACTION_ARGUMENTS[action_id]
+    player = int(batch.current_player()[row])
+    rows = np.array([row])
+
+    def played(table: np.ndarray):
+        return deck[int(batch._first_in_hand(rows, np.array([player]), table)[0])]
+
+    def owner_of(card: int):
+        return game.players[int(batch._card_slots(batch.location[row, card])[0])]
+
+    if action_type == T_END_TURN:
+        return None, EndTurn()
+    if action_type == T_PASS_GO:
+        return played(IS_PASS_GO), Draw(CARDS_TO_DRAW)
+    if action_type == T_CASH:
+        return deck[card], PlayAsCash(cash_card=deck[card])
+    if action_type == T_PROPERTY:
+        return deck[card], PlayProperty(property_card=deck[card], color=SET_COLORS[argument - 1])
+    if action_type == T_CHARGE:
+        _, (_, target, amount) = _batch_signature(batch, row, action_id)
+        return deck[card], Charge(charge_player=game.players[target], amount=amount)
+    if action_type == T_SLY_DEAL:
+        return played(IS_SLY_DEAL), StealCard(steal_from_player=owner_of(card), steal_card=deck[card])
+    if action_type == T_DEAL_BREAKER:
+        offset, slot = divmod(int(argument), MAX_SETS)
+        target = game.players[(player + offset + 1) % batch.num_players]
+        return played(IS_DEAL_BREAKER), StealSet(steal_from_player=target, steal_set=target.board.property_sets[slot])
+    if action_type == T_SAY_NO:
+        return played(IS_JUST_SAY_NO), SayNo(to_player=actions[-1][0])
+    return None, None  # Decided once the batch has applied it
+
+
+def validate(num_games: int, num_players: int = 2, seed: int = 0, max_decisions: int = 20000) -> int:
+    """Play random games on a batch of one and on `play.step` in lockstep, asserting that they agree.
+
+    After every play the games must be identical, and the batch must offer the same choices as the reference, up to
+    interchangeable cards. Returns the number of decisions checked.
+    """
+    rng = np.random.default_rng(seed)
+    checked = 0
+    for game_index in range(num_games):
+        random.seed(seed + game_index)
+        game = new_game(num_players)
+        # Both engines shuffle with the global random module from the same state, so rebuilt decks agree
+        batch = BatchGame.from_games([game], rng=rng, shuffle=random.shuffle)
+        batch.record_payments = True
+        player, game, actions, available_actions, is_over = step(game=game, actions=tuple(), card_to_play=None,
+                                                                 action=None)
+        forced_deal = None
+        discards = []
+        for _ in range(max_decisions):
+            phase = batch.phase[0]
+            if phase == OVER or is_over:
+                winner = game.winner()
+                assert phase == OVER and is_over, "Only one engine finished the game"
+                assert batch.winner[0] == (-1 if winner is None else winner.index), "Engines disagree on the winner"
+                break
+            legal = batch.legal_actions()
+            if phase == PLAY:
+                assert _snapshot(batch.to_game(0)) == _snapshot(game), "Games diverged"
+                expected = {
+                    choice_signature(player=player, card=card, action=action)
+                    for card, choices in available_actions.items() for action in get_first_level_actions(choices)
+                }
+                offered = {_batch_signature(batch, 0, action_id) for action_id in np.nonzero(legal[0])[0]}
+                assert offered == expected, f"Batch offers {offered - expected}, misses {expected - offered}"
+            elif phase == RESPOND:
+                assert player.index == batch.responder[0], "Engines wait on different players"
+                can_say_no = any(isinstance(action, SayNo) for choices in available_actions.values()
+                                 for action in choices)
+                assert legal[0, SAY_NO] == can_say_no, "Engines disagree on Just Say No"
+            elif phase == DISCARD_PHASE and not discards:
+                assert _snapshot(batch.to_game(0)) == _snapshot(game), "Games diverged"
+            checked += 1
+
+            action_id = int(sample_actions(legal, rng)[0])
+            card, action = _reference_choice(batch, 0, game, actions, action_id)
+            action_type = ACTION_TYPES[action_id]
+            if action_type == T_FORCED_DEAL:
+                forced_deal = (batch._first_in_hand(np.array([0]), batch.turn[:1], IS_FORCED_DEAL)[0],
+                               ACTION_CARDS[action_id])
+
+            random_state = random.getstate()
+            batch.step([action_id], check=True)
+            if action_type == T_FORCED_DEAL:
+                continue  # The reference takes the whole swap as one choice
+            if action_type == T_GIVE:
+                forced_card, steal_card = forced_deal
+                card, action = deck[forced_card], Swap(
+                    steal_from_player=game.players[batch.pending_target[0]], steal_card=deck[steal_card],
+                    give_card=deck[ACTION_CARDS[action_id]]
+                )
+            elif action_type == T_ACCEPT:
+                if 0 in batch.payments:
+                    cash_cards, property_cards = batch.payments[0]
+                    action = Pay(pay_to_player=actions[-1][0],
+                                 cash_cards=tuple(deck[i] for i in cash_cards),
+                                 property_cards=tuple(deck[i] for i in property_cards))
+                else:
+                    action = NoResponse()
+            elif action_type == T_DISCARD:
+                discards.append(ACTION_CARDS[action_id])
+                if batch.phase[0] == DISCARD_PHASE:
+                    continue
+                action = Discard(discard_cards=tuple(deck[i] for i in discards))
+                discards = []
+            random.setstate(random_state)
+            player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card,
+                                                                     action=action)
+        else:
+            raise AssertionError(f"Game {game_index} did not finish in {max_decisions} decisions")
+    return checked
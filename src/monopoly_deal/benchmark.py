@@ -0,0 +1,340 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from monopoly_deal.actions import ActionCache, Charge, get_available_responses, get_discard_options
+from monopoly_deal.batch import play_random
+from monopoly_deal.cards import CARD_BUILDABLE, CARD_TYPES, TYPE_ACTION, TYPE_CASH, TYPE_PROPERTY, TYPE_RENT, deck, \
+    mask_colors
+from monopoly_deal.game import Board, DiscardPile, Game, Hand, Player
+from monopoly_deal.mcts import MCTS, ParallelMCTS, State, random_policy
+from monopoly_deal.play import advance, drive, get_available_actions_for_player, new_game, step
+from monopoly_deal.rollout import FastRollout, HeuristicRolloutPolicy
+
+# Changes smaller than this fraction of the baseline rate are treated as noise by `compare`
+DEFAULT_THRESHOLD = 0.1
+
+
+def random_choice(rng: random.Random, available_actions: Dict):
+    card = rng.choice(list(available_actions.keys()))
+    return card, rng.choice(available_actions[card])
+
+
+def play_with_step(num_players: int, rng: random.Random) -> int:
+    """Play one random game through the re-entrant `step`, returning the number of decisions made"""
+    decisions = 0
+    player, game, actions, available_actions, is_over = step(game=new_game(num_players), actions=tuple(),
+                                                             card_to_play=None, action=None)
+    while not is_over:
+        card, action = random_choice(rng, available_actions)
+        player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card,
+                                                                 action=action)
+        decisions += 1
+    return decisions
+
+
+def play_with_drive(num_players: int, rng: random.Random) -> int:
+    """Play one random game through the `drive` coroutine, returning the number of decisions made"""
+    decisions = 0
+    driver = drive(game=new_game(num_players))
+    player, game, actions, available_actions, is_over = advance(driver)
+    while not is_over:
+        player, game, actions, available_actions, is_over = advance(driver, random_choice(rng, available_actions))
+        decisions += 1
+    return decisions
+
+
+DRIVERS = {'step': play_with_step, 'drive': play_with_drive}
+
+
+def decisions_per_second(play, num_games: int, num_players: int = 2, seed: int = 0) -> float:
+    """Decisions a second of random play over `num_games` seeded games"""
+    decisions, seconds = 0, 0.0
+    for game_index in range(num_games):
+        random.seed(seed + game_index)
+        rng = random.Random(seed + game_index)
+        start = time.perf_counter()
+        decisions += play(num_players, rng)
+        seconds += time.perf_counter() - start
+    return decisions / seconds
+
+
+def dense_game(num_properties: int, num_cash: int, hand: Sequence[int] = ()) -> Game:
+    """Two players with `num_properties` property cards and `num_cash` cash cards each on their boards, and
+    player 0 holding the card ids in `hand`"""
+    properties = [index for index in deck if CARD_TYPES[index] == TYPE_PROPERTY and CARD_BUILDABLE[index]]
+    cash = [index for index in deck if CARD_TYPES[index] == TYPE_CASH]
+    players = []
+    for player_index in range(2):
+        board = Board(cash_cards=tuple(deck[index] for index in cash[player_index::2][:num_cash]), property_sets=())
+        for index in properties[player_index::2][:num_properties]:
+            board = board.play_property_card(card=deck[index], color=mask_colors(deck[index].color_mask)[0])
+        cards_in_hand = tuple(deck[index] for index in hand) if player_index == 0 else ()
+        players.append(Player(index=player_index, hand=Hand(cards_in_hand=cards_in_hand), board=board))
+    return Game(players=tuple(players), discard_pile=DiscardPile(discarded_cards=()), current_turn_index=0,
+                cards_played=0, game_deck=(), state=0)
+
+
+# Games played out by each call of the randomized benchmarks, the same every call so that every round and every
+# saved run times the same workload
+SEEDS = range(10)
+
+
+# Each benchmark builds its fixture and returns an operation that does a fixed amount of work and says how many units,
+# or `(operation, teardown)` when the fixture holds something that must be stopped once it has been timed
+Operation = Callable[[], int]
+Fixture = Callable[[], Union[Operation, Tuple[Operation, Callable[[], None]]]]
+
+
+def _new_game():
+    def operation():
+        new_game(2)
+        return 1
+    return operation
+
+
+def _playout(play: Callable[[int, random.Random], int]):
+    def setup():
+        def operation():
+            for seed in SEEDS:
+                random.seed(seed)
+                play(2, random.Random(seed))
+            return len(SEEDS)
+        return operation
+    return setup
+
+
+def _batch_playout(num_games: int):
+    def setup():
+        def operation():
+            play_random(num_games=num_games, seed=0)
+            return num_games
+        return operation
+    return setup
+
+
+def _available_actions():
+    # Every action, rent, house and hotel card in hand, against two well stocked boards
+    hand = [index for index in deck if CARD_TYPES[index] in (TYPE_ACTION, TYPE_RENT) or not CARD_BUILDABLE[index]]
+    game = dense_game(num_properties=12, num_cash=6, hand=hand)
+    player = game.players[0]
+
+    def operation():
+        get_available_actions_for_player(player=player, game=game, cache=ActionCache())
+        return 1
+    return operation
+
+
+def _responses(num_properties: int):
+    def setup():
+        game = dense_game(num_properties=num_properties, num_cash=4)
+        charger, payer = game.players
+        # More than the cash covers, so the rest is made up from every combination of properties
+        amount = payer.board.cash_value + 5
+        actions = ((charger, None, Charge(charge_player=payer, amount=amount)),)
+
+        def operation():
+            get_available_responses(player=payer, actions=actions)
+            return 1
+        return operation
+    return setup
+
+
+def _discards(hand_size: int):
+    def setup():
+        player = Player(index=0, hand=Hand(cards_in_hand=tuple(deck[index] for index in range(7, 7 + hand_size))),
+                        board=Board(cash_cards=(), property_sets=()))
+
+        def operation():
+            list(get_discard_options(player=player)[None])
+            return 1
+        return operation
+    return setup
+
+
+def _rollouts(rollout_policy: Callable[[State], float]):
+    def setup():
+        random.seed(0)
+        player, game, actions, available_actions, is_over = step(game=new_game(2), actions=tuple(), card_to_play=None,
+                                                                 action=None)
+        state = State(ai_player=player, player=player, game=game, actions=actions,
+                      available_actions=available_actions)
+
+        def operation():
+            for seed in SEEDS:
+                random.seed(seed)
+                rollout_policy(state)
+            return len(SEEDS)
+        return operation
+    return setup
+
+
+def _mcts_iterations():
+    random.seed(0)
+    player, game, actions, available_actions, is_over = step(game=new_game(2), actions=tuple(), card_to_play=None,
+                                                             action=None)
+    state = State(ai_player=player, player=player, game=game, actions=actions, available_actions=available_actions)
+
+    def operation():
+        random.seed(0)
+        MCTS(iteration_limit=50, reuse_tree=False).search(initial_state=state)
+        return 50
+    return operation
+
+
+def _parallel_iterations(workers: int):
+    def setup():
+        random.seed(0)
+        player, game, actions, available_actions, is_over = step(game=new_game(2), actions=tuple(), card_to_play=None,
+                                                                 action=None)
+        state = State(ai_player=player, player=player, game=game, actions=actions,
+                      available_actions=available_actions)
+        # Started once for every round, as an agent's workers are kept for the whole game
+        search = ParallelMCTS(workers=workers, iteration_limit=50, reuse_tree=False, seed=0)
+        search.start()
+
+        def operation():
+            search.search(initial_state=state)
+            return search.profile.iterations
+        return operation, search.close
+    return setup
+
+
+# Name to (fixture returning the operation to time, and optionally its teardown, unit of the rate)
+BENCHMARKS: Dict[str, Tuple[Fixture, str]] = {
+    'new_game': (_new_game, 'games/sec'),
+    'playout.step': (_playout(play_with_step), 'games/sec'),
+    'playout.drive': (_playout(play_with_drive), 'games/sec'),
+    'playout.batch_1000': (_batch_playout(1000), 'games/sec'),
+    'available_actions.dense': (_available_actions, 'calls/sec'),
+    'responses.board_4': (_responses(4), 'calls/sec'),
+    'responses.board_8': (_responses(8), 'calls/sec'),
+    'responses.board_16': (_responses(16), 'calls/sec'),
+    'discards.hand_10': (_discards(10), 'calls/sec'),
+    'discards.hand_12': (_discards(12), 'calls/sec'),
+    'discards.hand_14': (_discards(14), 'calls/sec'),
+    'rollouts.engine': (_rollouts(random_policy), 'rollouts/sec'),
+    'rollouts.fast': (_rollouts(FastRollout()), 'rollouts/sec'),
+    'rollouts.heuristic': (_rollouts(FastRollout(HeuristicRolloutPolicy())), 'rollouts/sec'),
+    'mcts.iterations': (_mcts_iterations, 'iterations/sec'),
+    # Root-parallel search, counting the iterations of every worker: these only scale with free cores
+    'mcts.workers_2': (_parallel_iterations(2), 'iterations/sec'),
+    'mcts.workers_4': (_parallel_iterations(4), 'iterations/sec'),
+}
+
+
+def measure(operation: Operation, min_seconds: float, repeat: int = 3) -> float:
+    """Best rate over `repeat` rounds, each making whole calls to `operation` until at least `min_seconds` have
+    passed"""
+    best = 0.0
+    for _ in range(repeat):
+        units = 0
+        start = time.perf_counter()
+        while True:
+            units += operation()
+            seconds = time.perf_counter() - start
+            if seconds >= min_seconds:
+                break
+        best = max(best, units / seconds)
+    return best
+
+
+def run_benchmarks(names: Sequence[str] = None, min_seconds: float = 0.5, repeat: int = 3,
+                   on_result: Callable[[str, Dict], None] = None) -> Dict:
+    """Run the named benchmarks (all by default), returning results in the format `save` and `compare` take"""
+    results = {}
+    for name in names or BENCHMARKS:
+        setup, unit = BENCHMARKS[name]
+        operation, teardown = setup(), None
+        if isinstance(operation, tuple):
+            operation, teardown = operation
+        try:
+            results[name] = {'rate': measure(operation, min_seconds=min_seconds, repeat=repeat), 'unit': unit}
+        finally:
+            if teardown is not None:
+                teardown()
+        if on_result is not None:
+            on_result(name, results[name])
+    return {'python': platform.python_version(), 'benchmarks': results}
+
+
+def save(results: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float, float]]:
+    """Benchmarks whose rate fell by more than `threshold` of the baseline, as (name, baseline rate, current rate)"""
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+        before = baseline['benchmarks'][name]['rate']
+        if result['rate'] < before * (1 - threshold):
+            regressions.append((name, before, result['rate']))
+    return regressions
+
+
+def format_comparison(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> str:
+    regressed = {name for name, _, _ in compare(baseline, current, threshold)}
+    lines = []
+    for name, result in current['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            lines.append(f'{name:<24} {result["rate"]:>14,.0f} {result["unit"]:<15} (new)')
+            continue
+        before = baseline['benchmarks'][name]['rate']
+        flag = '  REGRESSION' if name in regressed else ''
+        lines.append(
+            f'{name:<24} {result["rate"]:>14,.0f} {result["unit"]:<15} {result["rate"] / before - 1:+7.1%} '
+            f'vs {before:,.0f}{flag}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine, action generation and search")
+    parser.add_argument('--only', nargs='+', default=None,
+                        help="Run benchmarks whose names start with any of these, e.g. playout mcts")
+    parser.add_argument('--min-time', type=float, default=0.5, help="Seconds per timing round (best of 3)")
+    parser.add_argument('--save', help="Write the results to this JSON file, e.g. as a new baseline")
+    parser.add_argument('--baseline', help="Compare against results saved earlier, exiting 1 on a regression")
+    parser.add_argument('--results', help="Compare these saved results instead of running the benchmarks")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Fractional slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    if args.results:
+        results = load(args.results)
+    else:
+        names = [name for name in BENCHMARKS if args.only is None or name.startswith(tuple(args.only))]
+
+        def on_result(name: str, result: Dict):
+            if not args.baseline:
+                print(f'{name:<24} {result["rate"]:>14,.0f} {result["unit"]}')
+
+        results = run_benchmarks(names=names, min_seconds=args.min_time, on_result=on_result)
+    if args.save:
+        save(results, args.save)
+
+    if args.baseline:
+        baseline = load(args.baseline)
+        print(format_comparison(baseline, results, threshold=args.threshold))
+        regressions = compare(baseline, results, threshold=args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%}')
+            sys.exit(1)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,35 @@
 from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple
 
 HOUSE = 'House'
 HOTEL = 'Hotel'
 
 class Card():
+    __slots__ = ('index', 'value')
+
     def __init__(self, index, value):
         self.index = index
         self.value = value
 
+    def __reduce__(self):
+        # Cards are compared by identity, so unpickle to the same object in the receiving process's deck
+        return _deck_card, (self.index,)
+
 
 class Cashable(Card):
-    pass
+    __slots__ = ()
 
 
 class CashCard(Cashable):
+    __slots__ = ()
+
     def __repr__(self):
         return f'<CashCard (${self.value})>'
 
 
 class ActionCard(Cashable):
+    __slots__ = ('action_type', 'description')
+
     def __init__(self, index, value, action_type, description):
         super().__init__(index, value)
         self.action_type = action_type
@@ -29,10 +40,13 @@ class ActionCard(Cashable):
 
 
 class PropertyCard(Card):
+    __slots__ = ('name', 'colors', 'color_mask', 'rent', 'buildable')
+
     def __init__(self, index, value, name, colors, rent, buildable):
         super().__init__(index, value)
         self.name = name
         self.colors = colors
+        self.color_mask = color_mask(colors)
         self.rent = rent
         self.buildable = buildable
 
@@ -41,9 +55,12 @@ class PropertyCard(Card):
 
 
 class RentCard(Cashable):
+    __slots__ = ('colors', 'color_mask', 'wild')
+
     def __init__(self, index, value, colors, wild):
         super().__init__(index, value)
         self.colors = colors  # Set
+        self.color_mask = color_mask(colors)
         self.wild = wild  # Boolean - Targeting
 
     def __repr__(self):
@@ -76,6 +93,29 @@ class Color(Enum):
     def __repr__(self):
         return self.value
 
+
+# Colors of property sets as bits, so matching a card to a set is an integer `&`
+SET_COLORS = tuple(color for color in Color if color != Color.ALL)
+COLOR_BITS = {color: 1 << bit for bit, color in enumerate(SET_COLORS)}
+ALL_COLORS = (1 << len(SET_COLORS)) - 1
+_MASK_COLORS = tuple(
+    tuple(color for color in SET_COLORS if mask & COLOR_BITS[color]) for mask in range(ALL_COLORS + 1)
+)
+
+
+def color_mask(colors: Iterable[Color]) -> int:
+    """Bitmask of the set colors in `colors`, where `Color.ALL` stands for every one"""
+    mask = 0
+    for color in colors:
+        mask |= ALL_COLORS if color == Color.ALL else COLOR_BITS[color]
+    return mask
+
+
+def mask_colors(mask: int) -> Tuple[Color, ...]:
+    """The set colors in a bitmask, in `SET_COLORS` order"""
+    return _MASK_COLORS[mask]
+
+
 deck = {
     1: PropertyCard(1, 3, HOUSE, {Color.ALL}, [], False),
     2: PropertyCard(2, 3, HOUSE, {Color.ALL}, [], False),
@@ -198,4 +238,61 @@ property_set_rents = {
     Color.YELLOW: [2, 4, 6],
     Color.GREEN: [2, 4, 7],
     Color.DBLUE: [3, 8]
-}
\ No newline at end of file
+}
+
+
+def _deck_card(index: int) -> Card:
+    return deck[index]
+
+
+def _get_kind(card: Card) -> Tuple:
+    """Cards of the same kind are interchangeable under the rules (e.g. the ten Pass Go cards)"""
+    if isinstance(card, CashCard):
+        return ('cash', card.value)
+    if isinstance(card, ActionCard):
+        return ('action', card.action_type.name)
+    if isinstance(card, RentCard):
+        return ('rent', tuple(sorted(color.value for color in card.colors)), card.wild)
+    if isinstance(card, PropertyCard):
+        # Property names only matter for houses and hotels
+        name = '' if card.buildable else card.name
+        return ('property', name, tuple(sorted(color.value for color in card.colors)), card.value, tuple(card.rent))
+    raise ValueError(f"Unknown card {card}")
+
+
+CARD_KINDS = {index: _get_kind(card) for index, card in deck.items()}
+
+
+def card_kind(card: Optional[Card]) -> Optional[Tuple]:
+    return None if card is None else CARD_KINDS[card.index]
+
+
+def distinct_cards(cards: Iterable[Card]) -> Dict[Card, int]:
+    """Map the first card of each kind (in order) to how many cards of that kind there are"""
+    representatives = {}
+    counts = {}
+    for card in cards:
+        kind = CARD_KINDS[card.index]
+        if kind not in representatives:
+            representatives[kind] = card
+            counts[card] = 0
+        counts[representatives[kind]] += 1
+    return counts
+
+
+# The deck compiled into parallel tuples indexed by card index (index 0 is no card), for integer lookups in place of
+# attribute access and isinstance checks
+TYPE_CASH = 1
+TYPE_ACTION = 2
+TYPE_PROPERTY = 3
+TYPE_RENT = 4
+_TYPE_CODES = {CashCard: TYPE_CASH, ActionCard: TYPE_ACTION, PropertyCard: TYPE_PROPERTY, RentCard: TYPE_RENT}
+ACTION_TYPE_CODES = {action_type: code for code, action_type in enumerate(ActionType, start=1)}
+_CARDS = (None,) + tuple(deck[index] for index in range(1, len(deck) + 1))
+
+CARD_VALUES = tuple(0 if card is None else card.value for card in _CARDS)
+CARD_TYPES = tuple(0 if card is None else _TYPE_CODES[type(card)] for card in _CARDS)
+CARD_ACTION_TYPES = tuple(ACTION_TYPE_CODES[card.action_type] if isinstance(card, ActionCard) else 0 for card in _CARDS)
+CARD_COLOR_MASKS = tuple(getattr(card, 'color_mask', 0) for card in _CARDS)  # Colors a property or rent card covers
+CARD_BUILDABLE = tuple(isinstance(card, PropertyCard) and card.buildable for card in _CARDS)
+CARD_RENTS = tuple(tuple(card.rent) if isinstance(card, PropertyCard) else () for card in _CARDS)
@@ -0,0 +1,410 @@
+import random
+
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+from monopoly_deal.cards import *
+from monopoly_deal.game import Board, DiscardPile, Game, Hand, Player, PropertySet
+
+NUM_CARDS = len(deck)
+CARD_INDICES = tuple(range(1, NUM_CARDS + 1))
+
+# Card locations
+DECK = 1
+DISCARD = 2
+PLAYER_BASE = 3
+HAND = 0
+CASH = 1
+SETS = 2
+MAX_SETS = 24
+PLAYER_STRIDE = SETS + MAX_SETS
+
+# Each card cell packs its location above the order it arrived there
+ORDER_BITS = 24
+ORDER_MASK = (1 << ORDER_BITS) - 1
+
+COLOR_CODES = {color: code for code, color in enumerate(SET_COLORS, start=1)}  # Bit position in the color mask + 1
+SET_SIZES = {COLOR_CODES[color]: len(rents) for color, rents in property_set_rents.items()}
+
+BUILDABLE = frozenset(i for i in CARD_INDICES if CARD_BUILDABLE[i])
+HOUSES = frozenset(i for i, card in deck.items() if isinstance(card, PropertyCard) and card.name == HOUSE)
+HOTELS = frozenset(i for i, card in deck.items() if isinstance(card, PropertyCard) and card.name == HOTEL)
+
+
+def hand_location(player_index: int) -> int:
+    return PLAYER_BASE + player_index * PLAYER_STRIDE + HAND
+
+
+def cash_location(player_index: int) -> int:
+    return PLAYER_BASE + player_index * PLAYER_STRIDE + CASH
+
+
+def set_location(player_index: int, slot: int) -> int:
+    return PLAYER_BASE + player_index * PLAYER_STRIDE + SETS + slot
+
+
+class CompactGame:
+    """Game state held in one flat integer array keyed by card index.
+
+    ``cells[0]`` is an arrival clock, ``cells[1..NUM_CARDS]`` hold ``location << ORDER_BITS | arrival`` for every
+    card and the remaining ``num_players * MAX_SETS`` cells hold the color code of each property set slot (0 when
+    the slot is unused). Sorting the cards of a location by their cell reproduces the tuple order used by `Game`,
+    so conversion in both directions is lossless. ``by_location`` indexes the cards of every location in that order
+    and ``built`` counts the buildable ones; every write keeps both up to date, so no query scans the whole deck.
+    Transitions copy the state once and mutate the copy.
+
+    It is the storage behind `MutableGame`, which MCTS rollouts play out on, and behind the batch engine's
+    conversions; `play.step` and the search tree itself still run on `Game`.
+    """
+    __slots__ = ('cells', 'num_players', 'current_turn_index', 'cards_played', 'state', 'by_location', 'built')
+
+    def __init__(self, cells: array, num_players: int, current_turn_index: int, cards_played: int, state: float,
+                 by_location: List[List[int]] = None):
+        self.cells = cells
+        self.num_players = num_players
+        self.current_turn_index = current_turn_index
+        self.cards_played = cards_played
+        self.state = state
+        if by_location is None:
+            # Cards not placed yet sit at location 0
+            by_location = [[] for _ in range(PLAYER_BASE + num_players * PLAYER_STRIDE)]
+            for card in sorted(CARD_INDICES, key=cells.__getitem__):
+                by_location[cells[card] >> ORDER_BITS].append(card)
+        self.by_location = by_location
+        self.built = [sum(CARD_BUILDABLE[card] for card in cards) for cards in by_location]
+
+    @classmethod
+    def empty(cls, num_players: int):
+        cells = array('L', bytes(array('L').itemsize * (1 + NUM_CARDS + num_players * MAX_SETS)))
+        return cls(cells=cells, num_players=num_players, current_turn_index=0, cards_played=0, state=0)
+
+    @classmethod
+    def from_game(cls, game: Game):
+        num_players = len(game.players)
+        cells = [0] * (1 + NUM_CARDS + num_players * MAX_SETS)
+        by_location = [[] for _ in range(PLAYER_BASE + num_players * PLAYER_STRIDE)]
+
+        def place_all(cards, location):
+            # Cells are stamped in the order cards are placed, as `_place` would
+            cards = by_location[location] = list(cards)
+            clock = cells[0]
+            for card in cards:
+                cells[card] = (location << ORDER_BITS) | clock
+                clock += 1
+            cells[0] = clock
+
+        place_all(game.game_deck, DECK)
+        place_all((card.index for card in game.discard_pile.discarded_cards), DISCARD)
+        for player in game.players:
+            place_all((card.index for card in player.hand.cards_in_hand), hand_location(player.index))
+            place_all((card.index for card in player.board.cash_cards), cash_location(player.index))
+            base = 1 + NUM_CARDS + player.index * MAX_SETS
+            for slot, pset in enumerate(player.board.property_sets):
+                assert slot < MAX_SETS, "Too many property sets"
+                cells[base + slot] = COLOR_CODES[pset.color]
+                place_all((card.index for card in pset.cards), set_location(player.index, slot))
+        return cls(cells=array('L', cells), num_players=num_players, current_turn_index=game.current_turn_index,
+                   cards_played=game.cards_played, state=game.state, by_location=by_location)
+
+    def to_game(self) -> Game:
+        players = []
+        for index in range(self.num_players):
+            property_sets = tuple(
+                PropertySet(color=color, cards=tuple(deck[i] for i in cards))
+                for color, cards in self.property_sets(index)
+            )
+            board = Board(cash_cards=tuple(deck[i] for i in self.cash(index)), property_sets=property_sets)
+            hand = Hand(cards_in_hand=tuple(deck[i] for i in self.hand(index)))
+            players.append(Player(index=index, hand=hand, board=board))
+        return Game(
+            players=tuple(players),
+            discard_pile=DiscardPile(discarded_cards=tuple(deck[i] for i in self.discard_pile())),
+            current_turn_index=self.current_turn_index,
+            cards_played=self.cards_played,
+            game_deck=self.game_deck(),
+            state=self.state
+        )
+
+    def copy(self):
+        return CompactGame(
+            cells=array('L', self.cells),
+            num_players=self.num_players,
+            current_turn_index=self.current_turn_index,
+            cards_played=self.cards_played,
+            state=self.state,
+            by_location=[list(cards) for cards in self.by_location]
+        )
+
+    # Queries
+
+    def cards_at(self, location: int) -> Tuple[int, ...]:
+        return tuple(self.by_location[location])
+
+    def location_of(self, card: int) -> int:
+        return self.cells[card] >> ORDER_BITS
+
+    def game_deck(self) -> Tuple[int, ...]:
+        return self.cards_at(DECK)
+
+    def discard_pile(self) -> Tuple[int, ...]:
+        return self.cards_at(DISCARD)
+
+    def hand(self, player_index: int) -> Tuple[int, ...]:
+        return self.cards_at(hand_location(player_index))
+
+    def cash(self, player_index: int) -> Tuple[int, ...]:
+        return self.cards_at(cash_location(player_index))
+
+    def num_sets(self, player_index: int) -> int:
+        base = self._color_base(player_index)
+        cells = self.cells
+        count = 0
+        while count < MAX_SETS and cells[base + count]:
+            count += 1
+        return count
+
+    def set_color(self, player_index: int, slot: int) -> Color:
+        return SET_COLORS[self.cells[self._color_base(player_index) + slot] - 1]
+
+    def set_cards(self, player_index: int, slot: int) -> Tuple[int, ...]:
+        return self.cards_at(set_location(player_index, slot))
+
+    def property_sets(self, player_index: int) -> List[Tuple[Color, Tuple[int, ...]]]:
+        return [
+            (self.set_color(player_index, slot), self.set_cards(player_index, slot))
+            for slot in range(self.num_sets(player_index))
+        ]
+
+    def num_built(self, player_index: int, slot: int) -> int:
+        """Property cards in a set that count towards completing it (houses and hotels do not)"""
+        return self.built[set_location(player_index, slot)]
+
+    def is_complete(self, player_index: int, slot: int) -> bool:
+        color_code = self.cells[self._color_base(player_index) + slot]
+        return self.num_built(player_index, slot) >= SET_SIZES[color_code]
+
+    def complete_set_count(self, player_index: int) -> int:
+        cells, built = self.cells, self.built
+        base, first = self._color_base(player_index), set_location(player_index, 0)
+        count = 0
+        for slot in range(MAX_SETS):
+            color_code = cells[base + slot]
+            if not color_code:
+                break
+            if built[first + slot] >= SET_SIZES[color_code]:
+                count += 1
+        return count
+
+    def total_value(self, player_index: int) -> int:
+        first, last = cash_location(player_index), set_location(player_index, MAX_SETS - 1)
+        return sum(CARD_VALUES[card] for cards in self.by_location[first:last + 1] for card in cards)
+
+    def winner(self) -> Optional[int]:
+        # Checked after every play of a rollout, so `complete_set_count` is spelled out
+        cells, built = self.cells, self.built
+        for index in range(self.num_players):
+            base, first = self._color_base(index), set_location(index, 0)
+            count = 0
+            for slot in range(MAX_SETS):
+                color_code = cells[base + slot]
+                if not color_code:
+                    break
+                if built[first + slot] >= SET_SIZES[color_code]:
+                    count += 1
+            if count >= 3:
+                return index
+
+    def get_next_player_index(self) -> int:
+        return (self.current_turn_index + 1) % self.num_players
+
+    # Transitions, mirroring `Game`
+
+    def draw_cards(self, num_to_draw: int, player_index: int = None, as_move: bool = False,
+                   shuffle: Callable[[List[int]], None] = None):
+        game = self.copy()
+        game._draw_cards(num_to_draw=num_to_draw, player_index=player_index, as_move=as_move, shuffle=shuffle)
+        return game
+
+    def discard_card(self, card: int, player_index: int = None):
+        player_index = self.current_turn_index if player_index is None else player_index
+        assert self.location_of(card) == hand_location(player_index), \
+            "Can't discard card that player does not have in hand"
+        game = self.copy()
+        game._place(card, DISCARD)
+        return game
+
+    def play_cash_card(self, card: int):
+        game = self.copy()
+        game._assert_in_hand(card, self.current_turn_index)
+        game._place(card, cash_location(self.current_turn_index))
+        game.cards_played += 1
+        return game
+
+    def play_property_card(self, card: int, color: Color):
+        game = self.copy()
+        game._assert_in_hand(card, self.current_turn_index)
+        game._add_property_card(card=card, color=color, player_index=self.current_turn_index, is_bounty=False)
+        game.cards_played += 1
+        return game
+
+    def play_action_card(self, card: int, player_index: int = None, is_response: bool = False):
+        player_index = self.current_turn_index if player_index is None else player_index
+        game = self.copy()
+        game._assert_in_hand(card, player_index)
+        game._place(card, DISCARD)
+        game.cards_played = self.cards_played + 1 if not is_response else 0
+        return game
+
+    def steal_property_card(self, card: int, stolen_to_index: int, stolen_from_index: int):
+        game = self.copy()
+        game._steal_property_card(card=card, stolen_to_index=stolen_to_index, stolen_from_index=stolen_from_index)
+        return game
+
+    def steal_complete_set(self, slot: int, stolen_to_index: int, stolen_from_index: int):
+        game = self.copy()
+        color = self.set_color(stolen_from_index, slot)
+        new_slot = game._new_set(stolen_to_index, color)
+        for card in self.set_cards(stolen_from_index, slot):
+            game._place(card, set_location(stolen_to_index, new_slot))
+        game._remove_set(stolen_from_index, slot)
+        return game
+
+    def charge_player(self, cash_cards: Tuple[int, ...], property_cards: Tuple[int, ...],
+                      to_index: int, from_index: int):
+        game = self.copy()
+        for card in property_cards:
+            game._steal_property_card(card=card, stolen_to_index=to_index, stolen_from_index=from_index)
+        for card in cash_cards:
+            game._place(card, cash_location(to_index))
+        return game
+
+    def end_turn(self):
+        game = self.copy()
+        game.current_turn_index = self.get_next_player_index()
+        game.cards_played = 0
+        return game
+
+    def set_state(self, state: float):
+        return CompactGame(
+            cells=self.cells,
+            num_players=self.num_players,
+            current_turn_index=self.current_turn_index,
+            cards_played=self.cards_played,
+            state=state,
+            by_location=self.by_location
+        )
+
+    # In-place helpers; only ever called on a fresh copy or a `MutableGame`
+
+    def _color_base(self, player_index: int) -> int:
+        return 1 + NUM_CARDS + player_index * MAX_SETS
+
+    def _write(self, cell: int, value: int):
+        """Every in-place change to `cells` goes through here, bar the ticks of the arrival clock"""
+        cells = self.cells
+        if 0 < cell <= NUM_CARDS:
+            # Move the card between locations of the index, keeping each in arrival order
+            by_location, old, new = self.by_location, cells[cell] >> ORDER_BITS, value >> ORDER_BITS
+            by_location[old].remove(cell)
+            if CARD_BUILDABLE[cell]:
+                self.built[old] -= 1
+                self.built[new] += 1
+            cards = by_location[new]
+            position = len(cards)
+            while position and cells[cards[position - 1]] > value:
+                position -= 1
+            cards.insert(position, cell)
+        cells[cell] = value
+
+    def _place(self, card: int, location: int):
+        clock = self.cells[0]
+        assert clock <= ORDER_MASK, "Arrival clock overflow"
+        self._write(card, (location << ORDER_BITS) | clock)
+        # The clock only moves forward, so `MutableGame` restores it from its undo token instead of journaling it
+        self.cells[0] = clock + 1
+
+    def _place_all(self, cards, location: int):
+        for card in cards:
+            self._place(card, location)
+
+    def _assert_in_hand(self, card: int, player_index: int):
+        assert self.location_of(card) == hand_location(player_index), "Card is not in hand"
+
+    def _set_color(self, player_index: int, slot: int, color: Color):
+        assert slot < MAX_SETS, "Too many property sets"
+        self._write(self._color_base(player_index) + slot, COLOR_CODES[color])
+
+    def _new_set(self, player_index: int, color: Color) -> int:
+        slot = self.num_sets(player_index)
+        self._set_color(player_index, slot, color)
+        return slot
+
+    def _remove_set(self, player_index: int, slot: int):
+        cells = self.cells
+        count = self.num_sets(player_index)
+        base = self._color_base(player_index)
+        for i in range(slot, count - 1):
+            self._write(base + i, cells[base + i + 1])
+        self._write(base + count - 1, 0)
+        # Shift cards in later slots down by one slot, keeping their arrival order
+        for location in range(set_location(player_index, slot + 1), set_location(player_index, count)):
+            for card in tuple(self.by_location[location]):
+                self._write(card, ((location - 1) << ORDER_BITS) | (cells[card] & ORDER_MASK))
+
+    def _slot_containing(self, card: int, player_index: int) -> int:
+        slot = self.location_of(card) - set_location(player_index, 0)
+        if not 0 <= slot < MAX_SETS:
+            raise ValueError("No property sets contain this card.")
+        return slot
+
+    def _add_property_card(self, card: int, color: Color, player_index: int, is_bounty: bool):
+        color_code, cells, built = COLOR_CODES[color], self.cells, self.built
+        base, first, size = self._color_base(player_index), set_location(player_index, 0), SET_SIZES[color_code]
+        slots = []
+        for slot in range(MAX_SETS):
+            code = cells[base + slot]
+            if not code:
+                break
+            if code == color_code:
+                slots.append(slot)
+        if card in BUILDABLE:
+            candidates = [slot for slot in slots if built[first + slot] < size]
+        else:
+            candidates = [slot for slot in slots if built[first + slot] >= size]
+            if not is_bounty:
+                if card in HOUSES:
+                    assert len(candidates) > 0, "No complete sets to add to"
+                elif card in HOTELS:
+                    candidates = [
+                        slot for slot in candidates
+                        if any(c in HOUSES for c in self.by_location[first + slot])
+                    ]
+                    assert len(candidates) > 0, "No hotel eligible complete sets to add to"
+                else:
+                    raise ValueError("Must play a property, house or hotel")
+        slot = candidates[0] if candidates else self._new_set(player_index, color)
+        self._place(card, first + slot)
+
+    def _steal_property_card(self, card: int, stolen_to_index: int, stolen_from_index: int):
+        slot = self._slot_containing(card, stolen_from_index)
+        color = self.set_color(stolen_from_index, slot)
+        self._add_property_card(card=card, color=color, player_index=stolen_to_index, is_bounty=True)
+
+    def _draw_cards(self, num_to_draw: int, player_index: int = None, as_move: bool = False,
+                    shuffle: Callable[[List[int]], None] = None):
+        game_deck = self.by_location[DECK]
+        cards = ()
+        if num_to_draw >= len(game_deck):
+            cards = tuple(game_deck)
+            game_deck = list(self.by_location[DISCARD])
+            (shuffle or random.shuffle)(game_deck)
+            self._place_all(game_deck, DECK)
+            num_to_draw -= len(cards)
+        cards = cards + tuple(game_deck[:num_to_draw])
+
+        player_index = self.current_turn_index if player_index is None else player_index
+        self._place_all(cards, hand_location(player_index))
+        self.cards_played += 1 if as_move else 0
+
+    def __repr__(self):
+        return f'<CompactGame turn {self.current_turn_index}, state {self.state}, played {self.cards_played}>'
@@ -0,0 +1,234 @@
+import json
+import multiprocessing
+import os
+import random
+
+from glob import glob
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from monopoly_deal.actions import SwapTarget
+from monopoly_deal.batch import NUM_ACTIONS, choice_action_ids
+from monopoly_deal.features import GameEncoder, observation_size
+from monopoly_deal.game import Game
+from monopoly_deal.mcts import MCTS, State
+from monopoly_deal.play import advance, drive, new_game
+
+INDEX_SUFFIX = '.index.json'
+DATA_SUFFIX = '.rows'
+
+
+def record_dtype(num_players: int) -> np.dtype:
+    """Fixed-width row: what a player saw, what it could do, where the search went and how the game ended for it"""
+    return np.dtype([
+        ('observation', np.float32, (observation_size(num_players),)),
+        ('legal', np.bool_, (NUM_ACTIONS,)),
+        ('policy', np.float16, (NUM_ACTIONS,)),  # Half precision halves the size of rows
+        ('outcome', np.float32),  # +1 won, -1 lost, 0 out of cards
+        ('player', np.int8),
+        ('game', np.int64),  # Numbered within the shard
+    ])
+
+
+class TrajectoryWriter:
+    """Appends rows to one shard of a dataset directory; give every writing process a shard of its own.
+
+    Rows of a game are held until `end_game` fills in their outcome, then appended to the shard's data file. The
+    shard's index file, replaced atomically, says how many rows are complete, so readers never see a half-written
+    row or game.
+    """
+    def __init__(self, directory: str, shard: str, num_players: int, flush_rows: int = 4096):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, shard)
+        self.num_players = num_players
+        self.dtype = record_dtype(num_players)
+        self.flush_rows = flush_rows
+        index = read_index(self.path + INDEX_SUFFIX)
+        self.rows = index.get('rows', 0)
+        self.games = index.get('games', 0)
+        self.file = open(self.path + DATA_SUFFIX, 'r+b' if os.path.exists(self.path + DATA_SUFFIX) else 'w+b')
+        self.file.truncate(self.rows * self.dtype.itemsize)  # Drop anything written after the last commit
+        self.file.seek(0, os.SEEK_END)
+
+        self.buffer = np.zeros(flush_rows, dtype=self.dtype)
+        self.finished = 0  # Rows at the start of `buffer` from finished games
+        self.end = 0  # Rows in `buffer`, the game being played filling those after `finished`
+
+    def add(self, observation: np.ndarray, legal: np.ndarray, policy: np.ndarray, player: int):
+        if self.end == len(self.buffer):
+            self.flush()
+            if self.end == len(self.buffer):
+                # A single game longer than the buffer: grow it rather than split the game
+                self.buffer = np.concatenate([self.buffer, np.zeros(len(self.buffer), dtype=self.dtype)])
+        row = self.buffer[self.end]
+        row['observation'] = observation
+        row['legal'] = legal
+        row['policy'] = policy
+        row['player'] = player
+        row['game'] = self.games
+        self.end += 1
+
+    def end_game(self, winner: Optional[int]):
+        rows = self.buffer[self.finished:self.end]
+        rows['outcome'] = 0 if winner is None else np.where(rows['player'] == winner, 1, -1)
+        self.finished = self.end
+        self.games += 1
+        if self.finished >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Append every finished game to the shard and commit it in the index"""
+        if self.finished:
+            self.file.write(self.buffer[:self.finished].tobytes())
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.rows += self.finished
+            playing = self.end - self.finished
+            self.buffer[:playing] = self.buffer[self.finished:self.end]
+            self.finished, self.end = 0, playing
+        index = {'rows': self.rows, 'games': self.games, 'num_players': self.num_players}
+        temporary = f'{self.path}{INDEX_SUFFIX}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(index, f)
+        os.replace(temporary, self.path + INDEX_SUFFIX)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_index(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+class TrajectoryDataset:
+    """Every committed row of a dataset directory, memory mapped shard by shard.
+
+    Rows are read in place from the page cache: `shard_arrays` are zero-copy views, and `sample` gathers a random
+    minibatch straight into reusable output arrays. Call `refresh` to pick up rows committed since opening.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.shards: List[np.memmap] = []
+        self.names: List[str] = []
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.dtype = None
+        self._out = None
+        self.refresh()
+
+    def refresh(self):
+        shards, names = [], []
+        for index_path in sorted(glob(os.path.join(self.directory, '*' + INDEX_SUFFIX))):
+            index = read_index(index_path)
+            if not index.get('rows'):
+                continue
+            dtype = record_dtype(index['num_players'])
+            if self.dtype is not None and dtype != self.dtype:
+                raise ValueError(f"Shards of {self.directory} were written for different numbers of players")
+            self.dtype = dtype
+            data_path = index_path[:-len(INDEX_SUFFIX)] + DATA_SUFFIX
+            shards.append(np.memmap(data_path, dtype=dtype, mode='r', shape=(index['rows'],)))
+            names.append(os.path.basename(index_path[:-len(INDEX_SUFFIX)]))
+        self.shards, self.names = shards, names
+        self.offsets = np.concatenate([[0], np.cumsum([len(shard) for shard in shards])]).astype(np.int64)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index: int) -> np.void:
+        shard = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        return self.shards[shard][index - self.offsets[shard]]
+
+    def shard_arrays(self, field: str) -> List[np.ndarray]:
+        """Views of one field in every shard, without copying"""
+        return [shard[field] for shard in self.shards]
+
+    def sample(self, batch_size: int, rng: np.random.Generator = None) -> Dict[str, np.ndarray]:
+        """Random rows gathered into arrays that are reused by the next call; copy them to keep them"""
+        rng = rng if rng is not None else np.random.default_rng()
+        if self._out is None or len(self._out) != batch_size:
+            self._out = np.zeros(batch_size, dtype=self.dtype)
+        indices = np.sort(rng.integers(len(self), size=batch_size))  # Sorted to read each shard front to back
+        shards = np.searchsorted(self.offsets, indices, side='right') - 1
+        for shard in np.unique(shards):
+            rows = np.flatnonzero(shards == shard)
+            self._out[rows] = self.shards[shard][indices[rows] - self.offsets[shard]]
+        return {field: self._out[field] for field in self.dtype.names}
+
+
+def search_policy(mcts: MCTS, state: State, num_players: int):
+    """Search a decision, returning the legal mask and visit distribution over action ids and the choice made"""
+    root = mcts.run(state)
+    statistics = mcts.get_root_statistics(root)
+    legal = np.zeros(NUM_ACTIONS, dtype=bool)
+    policy = np.zeros(NUM_ACTIONS, dtype=np.float32)
+    for card, action in state.getPossibleActions():
+        action_ids = list(choice_action_ids(player=state.player, num_players=num_players, card=card, action=action))
+        legal[action_ids] = True
+        visits, _ = statistics.get(root.get_signature((card, action)), (0, 0))
+        policy[action_ids] += visits / len(action_ids)
+    if policy.sum() > 0:
+        policy /= policy.sum()
+    return legal, policy, mcts.get_best_choice(root, state)
+
+
+def play_self_play_game(writer: TrajectoryWriter, time_limit: int, num_players: int = 2,
+                        perfect_information: bool = False, max_nodes: int = 100000) -> Game:
+    """Play a game of MCTS against itself, adding a row for every decision to `writer`"""
+    encoder = GameEncoder(num_players=num_players, perfect_information=perfect_information)
+    game = new_game(num_players)
+    searches = {player.index: MCTS(time_limit=time_limit, max_nodes=max_nodes) for player in game.players}
+    seats = game.players
+    driver = drive(game=game)
+    player, game, actions, available_actions, is_over = advance(driver)
+    while not is_over:
+        state = State(ai_player=seats[player.index], player=player, game=game, actions=actions,
+                      available_actions=available_actions)
+        observation = encoder.encode(game, player_index=player.index)
+        while True:
+            legal, policy, (card, action) = search_policy(searches[player.index], state, num_players)
+            writer.add(observation=observation, legal=legal, policy=policy, player=player.index)
+            if not isinstance(action, SwapTarget):
+                break
+            # A Forced Deal is two decisions, the card to take and then the card to give
+            state = state.takeAction((card, action))
+        player, game, actions, available_actions, is_over = advance(driver, (card, action))
+    winner = game.winner()
+    writer.end_game(None if winner is None else winner.index)
+    return game
+
+
+def _self_play_worker(directory: str, shard: str, num_games: int, seed: int, time_limit: int, num_players: int):
+    random.seed(seed)
+    with TrajectoryWriter(directory=directory, shard=shard, num_players=num_players) as writer:
+        for _ in range(num_games):
+            play_self_play_game(writer=writer, time_limit=time_limit, num_players=num_players)
+
+
+def generate(directory: str, num_games: int, workers: int = None, time_limit: int = 100, num_players: int = 2,
+             seed: int = 0):
+    """Play self-play games over `workers` processes (all cores by default), each appending to its own shard"""
+    workers = workers or multiprocessing.cpu_count()
+    processes = []
+    for worker in range(workers):
+        games = num_games // workers + (1 if worker < num_games % workers else 0)
+        process = multiprocessing.Process(
+            target=_self_play_worker,
+            args=(directory, f'shard-{seed}-{worker}', games, seed * workers + worker, time_limit, num_players)
+        )
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            raise RuntimeError(f"Self-play worker failed with exit code {process.exitcode}")
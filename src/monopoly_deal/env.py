@@ -0,0 +1,137 @@
+from typing import Tuple
+
+import numpy as np
+
+from monopoly_deal.actions import MAX_CARDS_IN_HAND
+from monopoly_deal.batch import (
+    LOCATION_OWNER, MAX_PLAYERS, NUM_ACTIONS, OVER, BatchGame, sample_actions
+)
+from monopoly_deal.compact import CASH, DISCARD, HAND, NUM_CARDS, PLAYER_BASE, PLAYER_STRIDE
+
+NUM_PHASES = OVER + 1
+NUM_PENDING = 5  # Nothing pending, or one of the respondable actions of `batch`
+
+# Where a card is from the point of view of the player to act: hidden (deck or another hand), discarded, in their
+# hand, or in the cash pile or a set of the player `offset` seats round from them
+HIDDEN = 0
+DISCARDED = 1
+IN_HAND = 2
+NUM_ZONES = 3 + 2 * MAX_PLAYERS
+
+
+def cash_zone(offset: int) -> int:
+    return 3 + 2 * offset
+
+
+def set_zone(offset: int) -> int:
+    return 4 + 2 * offset
+
+
+CARD_FEATURES = NUM_CARDS * NUM_ZONES
+OBSERVATION_SIZE = CARD_FEATURES + NUM_PHASES + NUM_PENDING + 2 + MAX_PLAYERS
+
+# Zone of each location code when seen by its owner (offset 0), before shifting by seat
+_LOCATIONS = np.arange(PLAYER_BASE + MAX_PLAYERS * PLAYER_STRIDE)
+_PLACE = (_LOCATIONS - PLAYER_BASE) % PLAYER_STRIDE
+LOCATION_ZONE = np.where(
+    _LOCATIONS == DISCARD, DISCARDED,
+    np.where(_LOCATIONS < PLAYER_BASE, HIDDEN, np.where(_PLACE == HAND, IN_HAND, np.where(_PLACE == CASH, cash_zone(0), set_zone(0))))
+)
+LOCATION_IS_PLAYER = _LOCATIONS >= PLAYER_BASE
+
+
+def observe(batch: BatchGame) -> np.ndarray:
+    """Flat float32 observation of every game from the point of view of the player it waits on.
+
+    One-hot zone of every card, with other players' hands and the deck hidden, then the phase, the pending
+    respondable action, the amount asked for, the cards played this turn and every hand size (by seat offset).
+    """
+    num_games, num_players = batch.num_games, batch.num_players
+    observations = np.zeros((num_games, OBSERVATION_SIZE), dtype=np.float32)
+    rows = np.arange(num_games)
+    players = batch.current_player()
+
+    locations = batch.location[:, 1:]
+    zones = LOCATION_ZONE[locations]
+    offsets = (LOCATION_OWNER[locations] - players[:, None]) % num_players
+    in_play = LOCATION_IS_PLAYER[locations] & (zones != IN_HAND)
+    zones = np.where(in_play, zones + 2 * offsets, np.where((zones == IN_HAND) & (offsets != 0), HIDDEN, zones))
+    cards = observations[:, :CARD_FEATURES].reshape(num_games, NUM_CARDS, NUM_ZONES)
+    cards[rows[:, None], np.arange(NUM_CARDS), zones] = 1
+
+    position = CARD_FEATURES
+    observations[rows, position + batch.phase] = 1
+    position += NUM_PHASES
+    observations[rows, position + batch.pending] = 1
+    position += NUM_PENDING
+    observations[:, position] = batch.pending_amount / 10
+    observations[:, position + 1] = batch.cards_played / 3
+    position += 2
+    seats = (players[:, None] + np.arange(num_players)) % num_players
+    hand_sizes = (batch.location[:, None, :] == (PLAYER_BASE + seats * PLAYER_STRIDE + HAND)[:, :, None]).sum(axis=2)
+    observations[:, position:position + num_players] = hand_sizes / MAX_CARDS_IN_HAND
+    return observations
+
+
+class VectorEnv:
+    """Gym-style environment over a batch of games in lockstep, with a fixed space of `NUM_ACTIONS` action ids.
+
+    `reset()` returns observations and legal action masks; `step(actions)` takes one action id per game and returns
+    observations, masks, rewards and done flags. `players` holds the seat each observation is for. Rewards are per
+    seat: +1 for the winner and -1 for everybody else when a game is won, nothing when it runs out of cards.
+
+    With `auto_reset`, a finished game is dealt again straight away, so the observation returned with its done flag
+    is the first of the next game and `winners` records how the finished one ended. Otherwise finished games stay
+    done, with no legal actions, until `reset()`.
+    """
+    def __init__(self, num_envs: int, num_players: int = 2, seed: int = None, auto_reset: bool = True):
+        self.num_envs = num_envs
+        self.num_players = num_players
+        self.auto_reset = auto_reset
+        self.batch = BatchGame(num_games=num_envs, num_players=num_players, rng=np.random.default_rng(seed))
+        self.players = np.zeros(num_envs, dtype=np.int64)
+        self.winners = np.full(num_envs, -1, dtype=np.int64)
+        self.episode_lengths = np.zeros(num_envs, dtype=np.int64)
+
+    @property
+    def action_size(self) -> int:
+        return NUM_ACTIONS
+
+    @property
+    def observation_size(self) -> int:
+        return OBSERVATION_SIZE
+
+    def reset(self) -> Tuple[np.ndarray, np.ndarray]:
+        self.batch.deal(np.arange(self.num_envs))
+        self.winners[:] = -1
+        self.episode_lengths[:] = 0
+        return self._observe()
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        batch = self.batch
+        was_over = batch.is_over()
+        batch.step(actions)
+        self.episode_lengths[~was_over] += 1
+
+        dones = batch.is_over()
+        finished = np.flatnonzero(dones & ~was_over)
+        rewards = np.zeros((self.num_envs, self.num_players), dtype=np.float32)
+        winners = batch.winner[finished]
+        won = winners >= 0
+        rewards[finished[won]] = -1
+        rewards[finished[won], winners[won]] = 1
+        self.winners[finished] = winners
+
+        if self.auto_reset and len(finished):
+            batch.deal(finished)
+            self.episode_lengths[finished] = 0
+        observations, legal = self._observe()
+        return observations, legal, rewards, dones
+
+    def sample_actions(self, legal: np.ndarray) -> np.ndarray:
+        """Uniformly random legal action ids, to act as a baseline or to explore"""
+        return sample_actions(legal, self.batch.rng)
+
+    def _observe(self) -> Tuple[np.ndarray, np.ndarray]:
+        self.players = self.batch.current_player()
+        return observe(self.batch), self.batch.legal_actions()
@@ -0,0 +1,110 @@
+from collections import Counter
+from math import comb
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from monopoly_deal.actions import *
+from monopoly_deal.cards import *
+from monopoly_deal.game import Player
+
+
+def _set_position(player: Player, card: PropertyCard) -> int:
+    for position, pset in enumerate(player.board.property_sets):
+        if card in pset.cards:
+            return position
+    raise ValueError("No property sets contain this card.")
+
+
+def _kind_count(cards: Iterable[Card], card: Card) -> int:
+    kind = CARD_KINDS[card.index]
+    return sum(1 for other in cards if CARD_KINDS[other.index] == kind)
+
+
+def choice_signature(player: Player, card: Optional[Card], action: Action) -> Hashable:
+    """A key shared by all choices that lead to the same game up to relabelling interchangeable cards.
+
+    `player` is the player making the choice; property cards are located by the position of their set.
+    """
+    if isinstance(action, PlayAsCash):
+        signature = ('cash', card_kind(action.cash_card))
+    elif isinstance(action, PlayProperty):
+        signature = ('property', card_kind(action.property_card), action.color)
+    elif isinstance(action, Draw):
+        signature = ('draw', action.num_to_draw)
+    elif isinstance(action, Charge):
+        signature = ('charge', action.target_player.index, action.amount)
+    elif isinstance(action, StealCard):
+        target = action.target_player
+        signature = ('steal', target.index, _set_position(target, action.steal_card), card_kind(action.steal_card))
+    elif isinstance(action, StealSet):
+        target = action.target_player
+        signature = ('steal_set', target.index, target.board.property_sets.index(action.steal_set))
+    elif isinstance(action, Swap):
+        target = action.target_player
+        signature = (
+            'swap', target.index,
+            _set_position(target, action.steal_card), card_kind(action.steal_card),
+            _set_position(player, action.give_card), card_kind(action.give_card)
+        )
+    elif isinstance(action, SwapTarget):
+        target = action.target_player
+        signature = ('swap_target', target.index, _set_position(target, action.steal_card), card_kind(action.steal_card))
+    elif isinstance(action, Pay):
+        signature = (
+            'pay', action.target_player.index,
+            tuple(sorted(card_kind(cash_card) for cash_card in action.cash_cards)),
+            tuple(sorted(
+                (_set_position(player, property_card), card_kind(property_card))
+                for property_card in action.property_cards
+            ))
+        )
+    elif isinstance(action, Discard):
+        signature = ('discard', tuple(sorted(card_kind(discard) for discard in action.discard_cards)))
+    elif isinstance(action, SayNo):
+        signature = ('say_no', action.target_player.index)
+    elif isinstance(action, (EndTurn, NoResponse)):
+        signature = (type(action).__name__,)
+    else:
+        signature = ('other', id(action))
+    return card_kind(card), signature
+
+
+def multiplicity(player: Player, card: Optional[Card], action: Action) -> int:
+    """How many concrete choices share the signature of this one"""
+    count = 1 if card is None else _kind_count(player.hand.cards_in_hand, card)
+    if isinstance(action, StealCard):
+        target = action.target_player
+        pset = target.board.property_sets[_set_position(target, action.steal_card)]
+        count *= _kind_count(pset.cards, action.steal_card)
+    elif isinstance(action, Swap):
+        target = action.target_player
+        steal_set = target.board.property_sets[_set_position(target, action.steal_card)]
+        give_set = player.board.property_sets[_set_position(player, action.give_card)]
+        count *= _kind_count(steal_set.cards, action.steal_card) * _kind_count(give_set.cards, action.give_card)
+    elif isinstance(action, (Pay, Discard)):
+        if isinstance(action, Pay):
+            groups = [(player.board.cash_cards, action.cash_cards)] + [
+                (pset.cards, [card for card in action.property_cards if card in pset.cards])
+                for pset in player.board.property_sets
+            ]
+        else:
+            groups = [(player.hand.cards_in_hand, action.discard_cards)]
+        for available, chosen in groups:
+            for kind, used in Counter(CARD_KINDS[card.index] for card in chosen).items():
+                count *= comb(sum(1 for other in available if CARD_KINDS[other.index] == kind), used)
+    return count
+
+
+def collapse_actions(player: Player, available_actions: Dict[Card, List[Action]]) -> Dict[Card, List[Action]]:
+    """Keep one representative of every set of equivalent (card, action) choices"""
+    seen = set()
+    collapsed = {}
+    for card, actions in available_actions.items():
+        kept = []
+        for action in actions:
+            signature = choice_signature(player=player, card=card, action=action)
+            if signature not in seen:
+                seen.add(signature)
+                kept.append(action)
+        if kept:
+            collapsed[card] = kept
+    return collapsed
@@ -0,0 +1,130 @@
+from typing import Sequence
+
+import numpy as np
+
+from monopoly_deal.cards import CARD_KINDS, HOTEL, HOUSE, PropertyCard, deck
+from monopoly_deal.compact import COLOR_CODES, SET_COLORS, SET_SIZES
+from monopoly_deal.game import MAX_PLAYS_PER_TURN, Game
+
+KIND_IDS = {kind: i for i, kind in enumerate(sorted(set(CARD_KINDS.values())))}
+NUM_KINDS = len(KIND_IDS)
+NUM_COLORS = len(SET_COLORS)
+STATES = (0, 1, 1.5, 2, 2.5, 3, 3.5)
+
+# Layout of the block of features for each seat, seats ordered round the table from the observer
+HAND_KINDS = 0  # Cards in hand by kind, left at zero for other players without perfect information
+HAND_SIZE = HAND_KINDS + NUM_KINDS
+CASH_VALUE = HAND_SIZE + 1
+CASH_CARDS = CASH_VALUE + 1
+# Per color: properties, complete sets, houses and hotels
+PROPERTIES = CASH_CARDS + 1
+COMPLETE = PROPERTIES + NUM_COLORS
+HOUSES = COMPLETE + NUM_COLORS
+HOTELS = HOUSES + NUM_COLORS
+COMPLETE_SETS = HOTELS + NUM_COLORS
+IS_TURN = COMPLETE_SETS + 1
+SEAT_SIZE = IS_TURN + 1
+
+# Features of the whole game, after the seats
+DECK_SIZE = 0
+DISCARD_SIZE = 1
+STATE = 2  # One-hot position in `play.step`
+PLAYS_LEFT = STATE + len(STATES)
+GAME_SIZE = PLAYS_LEFT + 1
+
+# Per card index, to keep the encoding loops to list lookups
+_KIND_OF = [0] * (len(deck) + 1)
+_BUILDING_OF = [None] * (len(deck) + 1)  # Offset of the houses or hotels features
+for _index, _card in deck.items():
+    _KIND_OF[_index] = KIND_IDS[CARD_KINDS[_index]]
+    if isinstance(_card, PropertyCard) and _card.name in (HOUSE, HOTEL):
+        _BUILDING_OF[_index] = HOUSES if _card.name == HOUSE else HOTELS
+_COLOR_OF = {color: code - 1 for color, code in COLOR_CODES.items()}
+_SET_SIZE_OF = [SET_SIZES[code] for code in range(1, NUM_COLORS + 1)]
+_STATE_OF = {state: i for i, state in enumerate(STATES)}
+
+
+def observation_size(num_players: int) -> int:
+    return num_players * SEAT_SIZE + GAME_SIZE
+
+
+def encode_game(game: Game, player_index: int, out: np.ndarray, perfect_information: bool = False) -> np.ndarray:
+    """Write the features of `game` as seen by a player into `out`, a vector of `observation_size`"""
+    num_players = len(game.players)
+    # Python floats are much quicker to update one at a time than array items, so fill a list and copy it over
+    features = [0.0] * len(out)
+    for offset in range(num_players):
+        player = game.players[(player_index + offset) % num_players]
+        seat = offset * SEAT_SIZE
+        cards_in_hand = player.hand.cards_in_hand
+        if offset == 0 or perfect_information:
+            for card in cards_in_hand:
+                features[seat + HAND_KINDS + _KIND_OF[card.index]] += 1
+        features[seat + HAND_SIZE] = len(cards_in_hand)
+
+        cash_cards = player.board.cash_cards
+        features[seat + CASH_VALUE] = sum(card.value for card in cash_cards)
+        features[seat + CASH_CARDS] = len(cash_cards)
+
+        complete_sets = 0
+        for pset in player.board.property_sets:
+            color = _COLOR_OF[pset.color]
+            built = 0
+            for card in pset.cards:
+                building = _BUILDING_OF[card.index]
+                if building is None:
+                    built += 1
+                else:
+                    features[seat + building + color] += 1
+            features[seat + PROPERTIES + color] += built
+            if built >= _SET_SIZE_OF[color]:
+                features[seat + COMPLETE + color] += 1
+                complete_sets += 1
+        features[seat + COMPLETE_SETS] = complete_sets
+        features[seat + IS_TURN] = player.index == game.current_turn_index
+
+    base = num_players * SEAT_SIZE
+    features[base + DECK_SIZE] = len(game.game_deck)
+    features[base + DISCARD_SIZE] = len(game.discard_pile.discarded_cards)
+    features[base + STATE + _STATE_OF[game.state]] = 1
+    features[base + PLAYS_LEFT] = MAX_PLAYS_PER_TURN - game.cards_played
+    out[:] = features
+    return out
+
+
+class GameEncoder:
+    """Encodes games into float32 feature vectors held in a buffer that is reused from call to call.
+
+    Each player's block covers hand contents by card kind, hand size, cash, properties, complete sets, houses and
+    hotels by color and whose turn it is, starting with the observer and going round the table. Then come the deck
+    and discard pile sizes, the `play.step` state and the plays left this turn. Other players' hands are only shown
+    card by card with `perfect_information`.
+
+    The arrays returned are views of the buffer, overwritten by the next call; copy them to keep them.
+    """
+    def __init__(self, num_players: int, perfect_information: bool = False, capacity: int = 1):
+        self.num_players = num_players
+        self.perfect_information = perfect_information
+        self.size = observation_size(num_players)
+        self.buffer = np.zeros((capacity, self.size), dtype=np.float32)
+
+    def encode(self, game: Game, player_index: int = None) -> np.ndarray:
+        """Features of one game, for the player whose turn it is by default"""
+        assert len(game.players) == self.num_players, "Encoder built for a different number of players"
+        out = self.buffer[0]
+        if player_index is None:
+            player_index = game.current_turn_index
+        return encode_game(game=game, player_index=player_index, out=out,
+                           perfect_information=self.perfect_information)
+
+    def encode_batch(self, games: Sequence[Game], player_indices: Sequence[int] = None) -> np.ndarray:
+        """(games x size) features, growing the buffer when there are more games than it holds"""
+        if len(games) > len(self.buffer):
+            self.buffer = np.zeros((len(games), self.size), dtype=np.float32)
+        out = self.buffer[:len(games)]
+        for row, game in enumerate(games):
+            assert len(game.players) == self.num_players, "Encoder built for a different number of players"
+            player_index = game.current_turn_index if player_indices is None else player_indices[row]
+            encode_game(game=game, player_index=player_index, out=out[row],
+                        perfect_information=self.perfect_information)
+        return out
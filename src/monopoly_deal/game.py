@@ -1,9 +1,13 @@
 import random
 
-from itertools import combinations
-from typing import Any, Union, Tuple, Set, List, Iterable
+from typing import Any, Callable, Dict, Union, Tuple, Set, List, Iterable
 
 from monopoly_deal.cards import *
+from monopoly_deal.payments import find_minimal_payments
+from monopoly_deal.zobrist import (
+    compute_zobrist, cards_played_key, cash_key, deck_key, deck_keys, discard_key, discard_keys, hand_key,
+    property_key, property_set_keys, state_key, turn_key
+)
 
 MAX_PLAYS_PER_TURN = 3
 
@@ -25,17 +29,22 @@ def upsert_tuple(tup: Tuple, new_element: Any, old_element: Any = None):
 
 
 class PropertySet:
+    __slots__ = ('color', 'color_bit', 'cards', 'houses', 'hotels', 'num_built', 'complete')
+
     def __init__(self, color: Color, cards: Tuple[PropertyCard]):
         assert color != color.ALL, "Cannot create a wildcard color property set"
 
         self.color = color
+        self.color_bit = COLOR_BITS[color]
         self.cards = cards
 
         self.houses = [card for card in cards if card.name == HOUSE]
         self.hotels = [card for card in cards if card.name == HOTEL]
+        self.num_built = sum(1 for card in cards if card.buildable)
+        self.complete = self.num_built >= len(property_set_rents[color])
 
     def add_card(self, card: PropertyCard):
-        assert self.matches(card.colors), "Card does not match the property's colors"
+        assert self.matches_mask(card.color_mask), "Card does not match the property's colors"
         assert card not in self.cards, "Cannot add a card twice"
         return PropertySet(color=self.color, cards=append_tuple(tup=self.cards, new_element=card))
 
@@ -45,7 +54,10 @@ class PropertySet:
         return PropertySet(color=self.color, cards=new_cards)
 
     def matches(self, colors: Set[Color]):
-        return Color.ALL in colors or self.color in colors
+        return self.matches_mask(color_mask(colors))
+
+    def matches_mask(self, color_mask: int):
+        return self.color_bit & color_mask != 0
 
     def is_empty(self):
         return len(self.cards) == 0
@@ -54,8 +66,7 @@ class PropertySet:
         return [card for card in self.cards if card.buildable]
 
     def is_complete(self):
-        non_house_or_hotel_cards = self.get_built_properties()
-        return len(non_house_or_hotel_cards) >= len(property_set_rents[self.color])
+        return self.complete
 
     def can_add_house(self):
         return self.is_complete()
@@ -64,15 +75,13 @@ class PropertySet:
         return len(self.houses) > 0
 
     def get_rent_due(self):
-        non_house_or_hotel_cards = self.get_built_properties()
-
-        if len(non_house_or_hotel_cards) == 0:
+        if self.num_built == 0:
             return 0
 
         if self.is_complete():
             return property_set_rents[self.color][-1] + 3*len(self.houses) + 4*len(self.hotels)
         else:
-            return property_set_rents[self.color][len(non_house_or_hotel_cards)-1]
+            return property_set_rents[self.color][self.num_built-1]
 
     def serialize(self):
         return tuple(card.index for card in self.cards)
@@ -82,10 +91,12 @@ class PropertySet:
 
 
 class CardLocation:
-    pass
+    __slots__ = ()
 
 
 class Hand(CardLocation):
+    __slots__ = ('cards_in_hand',)
+
     def __init__(self, cards_in_hand: Tuple[Card, ...]):
         self.cards_in_hand = cards_in_hand
 
@@ -102,13 +113,87 @@ class Hand(CardLocation):
         return f'<Hand {self.cards_in_hand}>'
 
 
+class BoardIndex:
+    """Lookups over the property sets of a board, by position in `property_sets`.
+
+    Boards hand an updated index to the boards their transitions create, so it is only built from scratch for new
+    boards and when a whole set leaves (which shifts the positions after it).
+    """
+    __slots__ = ('card_positions', 'color_positions', 'num_complete', 'property_value')
+
+    def __init__(self, card_positions: Dict[int, int], color_positions: Dict[Color, Tuple[int, ...]],
+                 num_complete: int, property_value: int):
+        self.card_positions = card_positions  # Card index -> position of the set holding it
+        self.color_positions = color_positions  # Color -> positions of the sets of that color, in board order
+        self.num_complete = num_complete
+        self.property_value = property_value
+
+    @classmethod
+    def build(cls, property_sets: Tuple[PropertySet]):
+        card_positions, color_positions = {}, {}
+        for position, pset in enumerate(property_sets):
+            for card in pset.cards:
+                card_positions[card.index] = position
+            color_positions[pset.color] = color_positions.get(pset.color, ()) + (position,)
+        return cls(
+            card_positions=card_positions,
+            color_positions=color_positions,
+            num_complete=sum(1 for pset in property_sets if pset.complete),
+            property_value=sum(card.value for pset in property_sets for card in pset.cards)
+        )
+
+    def add_set(self, position: int, property_set: PropertySet):
+        card_positions = dict(self.card_positions)
+        for card in property_set.cards:
+            card_positions[card.index] = position
+        color_positions = dict(self.color_positions)
+        color_positions[property_set.color] = color_positions.get(property_set.color, ()) + (position,)
+        return BoardIndex(
+            card_positions=card_positions,
+            color_positions=color_positions,
+            num_complete=self.num_complete + property_set.complete,
+            property_value=self.property_value + sum(card.value for card in property_set.cards)
+        )
+
+    def add_card(self, position: int, card: PropertyCard, old_set: PropertySet, new_set: PropertySet):
+        card_positions = dict(self.card_positions)
+        card_positions[card.index] = position
+        return BoardIndex(
+            card_positions=card_positions,
+            color_positions=self.color_positions,
+            num_complete=self.num_complete - old_set.complete + new_set.complete,
+            property_value=self.property_value + card.value
+        )
+
+    def remove_card(self, card: PropertyCard, old_set: PropertySet, new_set: PropertySet):
+        card_positions = dict(self.card_positions)
+        del card_positions[card.index]
+        return BoardIndex(
+            card_positions=card_positions,
+            color_positions=self.color_positions,
+            num_complete=self.num_complete - old_set.complete + new_set.complete,
+            property_value=self.property_value - card.value
+        )
+
+
 class Board(CardLocation):
-    def __init__(self, cash_cards: Tuple[Cashable], property_sets: Tuple[PropertySet]):
+    __slots__ = ('cash_cards', 'property_sets', 'index', 'cash_value')
+
+    def __init__(self, cash_cards: Tuple[Cashable], property_sets: Tuple[PropertySet], index: BoardIndex = None,
+                 cash_value: int = None):
         self.cash_cards = cash_cards
         self.property_sets = property_sets
+        # Transitions pass in the index and cash value updated for the cards they moved
+        self.index = index if index is not None else BoardIndex.build(property_sets)
+        self.cash_value = cash_value if cash_value is not None else sum(card.value for card in cash_cards)
 
     def play_card_as_cash(self, card: Cashable):
-        return Board(cash_cards=append_tuple(self.cash_cards, card), property_sets=self.property_sets)
+        return Board(
+            cash_cards=append_tuple(self.cash_cards, card),
+            property_sets=self.property_sets,
+            index=self.index,
+            cash_value=self.cash_value + card.value
+        )
 
     def play_property_card(self, card: PropertyCard, color: Color, is_bounty_from_charge: bool = False):
         if card.buildable:
@@ -119,12 +204,8 @@ class Board(CardLocation):
             ]
             # If not, then create  one
             if len(existing_property_sets) == 0:
-                pset = PropertySet(color=color, cards=(card,))
-                property_sets = append_tuple(tup=self.property_sets, new_element=pset)
-            else:
-                old_pset = existing_property_sets[0]
-                pset = old_pset.add_card(card=card)
-                property_sets = upsert_tuple(tup=self.property_sets, new_element=pset, old_element=old_pset)
+                return self.add_property_set(property_set=PropertySet(color=color, cards=(card,)))
+            return self._add_to_property_set(card=card, property_set=existing_property_sets[0])
         else:
             if card.name == HOUSE:
                 existing_property_sets = [
@@ -144,60 +225,103 @@ class Board(CardLocation):
                 raise ValueError("Must play a property, house or hotel")
 
             if len(existing_property_sets) == 0 and is_bounty_from_charge:
-                pset = PropertySet(color=color, cards=(card,))
-                property_sets = append_tuple(tup=self.property_sets, new_element=pset)
-            else:
-                old_pset = existing_property_sets[0]
-                pset = old_pset.add_card(card=card)
-                property_sets = upsert_tuple(self.property_sets, new_element=pset, old_element=old_pset)
-        return Board(cash_cards=self.cash_cards, property_sets=property_sets)
+                return self.add_property_set(property_set=PropertySet(color=color, cards=(card,)))
+            return self._add_to_property_set(card=card, property_set=existing_property_sets[0])
+
+    def _add_to_property_set(self, card: PropertyCard, property_set: PropertySet):
+        position = self.property_sets.index(property_set)
+        new_pset = property_set.add_card(card=card)
+        return Board(
+            cash_cards=self.cash_cards,
+            property_sets=self.property_sets[:position] + (new_pset,) + self.property_sets[position + 1:],
+            index=self.index.add_card(position=position, card=card, old_set=property_set, new_set=new_pset),
+            cash_value=self.cash_value
+        )
 
     def lose_property_card(self, card: PropertyCard):
         pset = self.get_property_set_containing_card(card=card)
+        position = self.index.card_positions[card.index]
         new_pset = pset.remove_card(card=card)
         return Board(
             cash_cards=self.cash_cards,
-            property_sets=upsert_tuple(tup=self.property_sets, new_element=new_pset, old_element=pset)
+            property_sets=self.property_sets[:position] + (new_pset,) + self.property_sets[position + 1:],
+            index=self.index.remove_card(card=card, old_set=pset, new_set=new_pset),
+            cash_value=self.cash_value
         )
 
     def lose_property_set(self, property_set: PropertySet):
         return Board(
             cash_cards=self.cash_cards,
-            property_sets=remove_from_tuple(tup=self.property_sets, delete_element=property_set)
+            property_sets=remove_from_tuple(tup=self.property_sets, delete_element=property_set),
+            cash_value=self.cash_value
         )
 
     def add_property_set(self, property_set: PropertySet):
         return Board(
             cash_cards=self.cash_cards,
-            property_sets=append_tuple(tup=self.property_sets, new_element=property_set)
+            property_sets=append_tuple(tup=self.property_sets, new_element=property_set),
+            index=self.index.add_set(position=len(self.property_sets), property_set=property_set),
+            cash_value=self.cash_value
         )
 
     def pay_cash(self, cards: Tuple[Cashable]):
         new_cash_cards = tuple(card for card in self.cash_cards if card not in cards)
-        return Board(cash_cards=new_cash_cards, property_sets=self.property_sets)
+        assert len(new_cash_cards) == len(self.cash_cards) - len(cards), "Can only pay with cash on the board"
+        return Board(
+            cash_cards=new_cash_cards,
+            property_sets=self.property_sets,
+            index=self.index,
+            cash_value=self.cash_value - Board.get_value_of_cards(cards=cards)
+        )
 
     def get_playable_property_sets_for_card(self, card: PropertyCard):
         return [
-            pset for pset in self.property_sets if pset.matches(colors=card.colors) and not pset.is_complete()
+            pset for pset in self.get_property_sets_matching_mask(color_mask=card.color_mask)
+            if not pset.is_complete()
         ]
 
     def get_property_set_containing_card(self, card: PropertyCard):
-        for pset in self.get_property_sets_matching_colors(colors=card.colors):
-            if card in pset.cards:
-                return pset
-        raise ValueError("No property sets contain this card.")
+        position = self.index.card_positions.get(card.index)
+        if position is None:
+            raise ValueError("No property sets contain this card.")
+        return self.property_sets[position]
+
+    def get_property_set_ordinal(self, property_set: PropertySet):
+        """How many sets of the same color come before `property_set`"""
+        ordinal = 0
+        for pset in self.property_sets:
+            if pset is property_set:
+                return ordinal
+            if pset.color == property_set.color:
+                ordinal += 1
+        raise ValueError("Property set is not on this board.")
 
     def get_complete_sets(self):
+        if self.index.num_complete == 0:
+            return []
         return [pset for pset in self.property_sets if pset.is_complete()]
 
+    def count_complete_sets(self):
+        return self.index.num_complete
+
     def get_property_sets_matching_colors(self, colors: Set[Color]):
-        return [pset for pset in self.property_sets if pset.matches(colors)]
+        return self.get_property_sets_matching_mask(color_mask(colors))
+
+    def get_property_sets_matching_mask(self, color_mask: int):
+        if color_mask == ALL_COLORS:
+            return list(self.property_sets)
+        colors = mask_colors(color_mask)
+        color_positions = self.index.color_positions
+        positions = [position for color in colors for position in color_positions.get(color, ())]
+        if len(colors) > 1:
+            positions.sort()  # Keep board order across colors
+        return [self.property_sets[position] for position in positions]
 
     def get_all_property_cards(self):
         return tuple([card for pset in self.property_sets for card in pset.cards])
 
     def get_total_value(self):
-        return sum(card.value for card in self.get_all_property_cards() + self.cash_cards)
+        return self.cash_value + self.index.property_value
 
     def find_cash_to_pay_bill_up_to_amount(self, bill_amount: int):
         sorted_cash = sorted(self.cash_cards, key=lambda x: x.value, reverse=True)
@@ -211,40 +335,28 @@ class Board(CardLocation):
                 break
         return tuple(pay_with)
 
-    def find_additional_cards_to_pay_bill(self, bill_amount: int, cards_in_payment: Tuple[Card]):
-        """Return all sets of cards that can pay for bill"""
+    def find_additional_cards_to_pay_bill(self, bill_amount: int, cards_in_payment: Tuple[Card], limit: int = None,
+                                          order: str = None) -> List[Tuple[Card, ...]]:
+        """Return every set of cards that can pay for bill, in the order `find_minimal_payments` finds them"""
         tally = Board.get_value_of_cards(cards=cards_in_payment)
         eligible_cards = [
             card for card in self.cash_cards + self.get_all_property_cards()
             if card not in cards_in_payment and card.value > 0
         ]
-        potential_payments = self._powerset_with_minimum_value(iterable=eligible_cards, minimum_value_of_set=bill_amount - tally)
-        return {frozenset(tuple(cards) + cards_in_payment) for cards in potential_payments}
+        potential_payments = find_minimal_payments(cards=eligible_cards, minimum_value=bill_amount - tally,
+                                                   limit=limit, order=order)
+        payments, seen = [], set()
+        for cards in potential_payments:
+            payment = tuple(cards) + cards_in_payment
+            key = frozenset(card.index for card in payment)
+            if key not in seen:
+                seen.add(key)
+                payments.append(payment)
+        return payments
 
     def serialize(self):
         return tuple(card.index for card in self.cash_cards), tuple(pset.serialize() for pset in self.property_sets)
 
-    def _powerset_with_minimum_value(self, iterable, minimum_value_of_set: int):
-        s = list(iterable)
-        out = set()
-
-        def unique(combo, out):
-            """Filter out sets of cards that are supersets of existing payment options"""
-            # This lets us find only minimally covering payments (you should never add cards to a payment that already
-            # satisfies the charge)
-            for el in out:
-                if set(el).issubset(combo):
-                    return False
-            return True
-
-        for r in range(1, len(s) + 1):
-            out = out.union(
-                {combo for combo in combinations(s, r) if unique(combo, out)
-                    and self.get_value_of_cards(combo) >= minimum_value_of_set
-                 }
-            )
-        return out
-
     def __repr__(self):
         return f'<Board: Cash: {self.cash_cards}, Properties: {self.property_sets}>'
 
@@ -254,6 +366,8 @@ class Board(CardLocation):
 
 
 class DiscardPile(CardLocation):
+    __slots__ = ('discarded_cards',)
+
     def __init__(self, discarded_cards: Tuple[Card]):
         self.discarded_cards = discarded_cards
 
@@ -265,6 +379,8 @@ class DiscardPile(CardLocation):
 
 
 class Player:
+    __slots__ = ('index', 'hand', 'board')
+
     def __init__(self, index: int, hand: Hand, board: Board):
         self.index = index
         self.hand = hand
@@ -351,48 +467,69 @@ class Player:
         return f'<Player {self.index}, Hand: {self.hand}, Board: {self.board}'
 
 
+def _property_card_key(board: Board, player_index: int, card: PropertyCard) -> int:
+    pset = board.get_property_set_containing_card(card=card)
+    return property_key(card, player_index, pset.color, board.get_property_set_ordinal(property_set=pset))
+
+
 class Game:
+    __slots__ = ('players', 'discard_pile', 'current_turn_index', 'cards_played', 'game_deck', 'state', 'zobrist')
+
     def __init__(self, players: Tuple[Player], discard_pile: DiscardPile, current_turn_index: int,
-                 cards_played: int, game_deck: Tuple[int], state: float):
+                 cards_played: int, game_deck: Tuple[int], state: float, zobrist: int = None):
         self.players = players
         self.discard_pile = discard_pile
         self.current_turn_index = current_turn_index
         self.cards_played = cards_played
         self.game_deck = game_deck
         self.state = state
+        # Transitions pass in the hash updated for the cards they moved
+        self.zobrist = zobrist if zobrist is not None else compute_zobrist(self)
 
     def current_player(self):
         return self.players[self.current_turn_index]
 
     def winner(self):
         for player in self.players:
-            if len(player.board.get_complete_sets()) >= 3:
+            if player.board.count_complete_sets() >= 3:
                 return player
 
-    def draw_cards(self, num_to_draw: int, player: Player = None, as_move: bool = False):
+    def draw_cards(self, num_to_draw: int, player: Player = None, as_move: bool = False,
+                   shuffle: Callable[[List[int]], None] = None):
+        """Draw from the deck, rebuilding it from the discard pile with `shuffle` (`random.shuffle`) if it runs out"""
         discard_pile = self.discard_pile
         cards = tuple()
         game_deck = self.game_deck
+        cards_played = self.cards_played + (1 if as_move else 0)
+        zobrist = self.zobrist ^ cards_played_key(self.cards_played) ^ cards_played_key(cards_played)
         if num_to_draw >= len(game_deck):
             cards = tuple(deck[i] for i in game_deck)
+            zobrist ^= deck_keys(game_deck) ^ discard_keys(self.discard_pile.discarded_cards)
             game_deck = [card.index for card in self.discard_pile.discarded_cards]
-            random.shuffle(game_deck)
+            (shuffle or random.shuffle)(game_deck)
             game_deck = tuple(game_deck)
+            zobrist ^= deck_keys(game_deck)
             discard_pile = DiscardPile(discarded_cards=tuple())
             num_to_draw -= len(cards)
 
-        cards = cards + tuple(deck[game_deck[i]] for i in range(min(len(game_deck), num_to_draw)))
+        drawn = tuple(deck[game_deck[i]] for i in range(min(len(game_deck), num_to_draw)))
+        for i, card in enumerate(drawn):
+            zobrist ^= deck_key(card, len(game_deck) - 1 - i)
+        cards = cards + drawn
         game_deck = game_deck[num_to_draw:]
 
         player = player or self.current_player()
         new_player = player.draw_cards(cards=cards)
+        for card in cards:
+            zobrist ^= hand_key(card, player.index)
         return Game(
             players=upsert_tuple(tup=self.players, new_element=new_player, old_element=player),
             discard_pile=discard_pile,
             current_turn_index=self.current_turn_index,
-            cards_played=self.cards_played + (1 if as_move else 0),
+            cards_played=cards_played,
             game_deck=game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=zobrist
         )
 
     def discard_card(self, card: Card, player: Player = None):
@@ -405,44 +542,52 @@ class Game:
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=self.zobrist ^ hand_key(card, player.index) ^ discard_key(card)
         )
 
     def play_cash_card(self, card: Union[ActionCard, CashCard]):
         player = self.current_player()
         new_player = player.play_cash_card(card=card)
+        zobrist = self.zobrist ^ hand_key(card, player.index) ^ cash_key(card, player.index)
         return Game(
             players=upsert_tuple(tup=self.players, new_element=new_player, old_element=player),
             discard_pile=self.discard_pile,
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played + 1,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=zobrist ^ cards_played_key(self.cards_played) ^ cards_played_key(self.cards_played + 1)
         )
 
     def play_property_card(self, card: PropertyCard, color: Color):
         player = self.current_player()
         new_player = player.play_property_card(card=card, color=color)
+        zobrist = self.zobrist ^ hand_key(card, player.index) ^ _property_card_key(new_player.board, player.index, card)
         return Game(
             players=upsert_tuple(tup=self.players, new_element=new_player, old_element=player),
             discard_pile=self.discard_pile,
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played + 1,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=zobrist ^ cards_played_key(self.cards_played) ^ cards_played_key(self.cards_played + 1)
         )
 
     def play_action_card(self, card: ActionCard, player: Player = None, is_response: bool = False):
         player = player or self.current_player()
         player = self.players[player.index]
         new_player = player.play_action_card(card=card)
+        cards_played = self.cards_played + 1 if not is_response else 0
+        zobrist = self.zobrist ^ hand_key(card, player.index) ^ discard_key(card)
         return Game(
             players=upsert_tuple(tup=self.players, new_element=new_player, old_element=player),
             discard_pile=self.discard_pile.discard_card(card=card),
             current_turn_index=self.current_turn_index,
-            cards_played=self.cards_played + 1 if not is_response else 0,
+            cards_played=cards_played,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=zobrist ^ cards_played_key(self.cards_played) ^ cards_played_key(cards_played)
         )
 
     def steal_property_card(self, card: PropertyCard, stolen_to_player: Player, stolen_from_player: Player):
@@ -460,7 +605,12 @@ class Game:
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=(
+                self.zobrist
+                ^ _property_card_key(stolen_from_player.board, stolen_from_player.index, card)
+                ^ _property_card_key(new_stolen_to_player.board, stolen_to_player.index, card)
+            )
         )
 
     def steal_complete_set(self, property_set: PropertySet, stolen_to_player: Player, stolen_from_player: Player):
@@ -471,13 +621,20 @@ class Game:
         new_stolen_from_player = stolen_from_player.lose_property_set(property_set=property_set)
         players = upsert_tuple(tup=self.players, new_element=new_stolen_to_player, old_element=stolen_to_player)
         players = upsert_tuple(tup=players, new_element=new_stolen_from_player, old_element=stolen_from_player)
+        # Removing a set shifts the ordinals of later sets of the same color, so rehash both players' sets
+        zobrist = self.zobrist
+        for old_player, new_player in ((stolen_to_player, new_stolen_to_player),
+                                       (stolen_from_player, new_stolen_from_player)):
+            zobrist ^= property_set_keys(old_player.board.property_sets, old_player.index)
+            zobrist ^= property_set_keys(new_player.board.property_sets, new_player.index)
         return Game(
             players=players,
             discard_pile=self.discard_pile,
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=zobrist
         )
 
     def charge_player(self, cash_cards: Tuple[Cashable], property_cards: Tuple[PropertyCard],
@@ -487,12 +644,18 @@ class Game:
         from_player = self.players[from_player.index]
         from_player_new = from_player.pay_cash(cards=cash_cards)
 
+        zobrist = self.zobrist
         for card in property_cards:
             current_color = from_player_new.board.get_property_set_containing_card(card=card).color
+            zobrist ^= _property_card_key(from_player_new.board, from_player.index, card)
             from_player_new = from_player_new.lose_property_card(card=card)
             to_player_new = to_player_new.add_property_card(card=card, color=current_color)
+        for card in property_cards:
+            # Sets are only ever added or updated in place, so final positions are stable
+            zobrist ^= _property_card_key(to_player_new.board, to_player.index, card)
         for cash_card in cash_cards:
             to_player_new = to_player_new.receive_cash_card(card=cash_card)
+            zobrist ^= cash_key(cash_card, from_player.index) ^ cash_key(cash_card, to_player.index)
         players = upsert_tuple(tup=self.players, new_element=from_player_new, old_element=from_player)
         players = upsert_tuple(tup=players, new_element=to_player_new, old_element=to_player)
         return Game(
@@ -501,17 +664,24 @@ class Game:
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=zobrist
         )
 
     def end_turn(self):
+        next_player_index = self.get_next_player_index()
         return Game(
             players=self.players,
             discard_pile=self.discard_pile,
-            current_turn_index=self.get_next_player_index(),
+            current_turn_index=next_player_index,
             cards_played=0,
             game_deck=self.game_deck,
-            state=self.state
+            state=self.state,
+            zobrist=(
+                self.zobrist
+                ^ turn_key(self.current_turn_index) ^ turn_key(next_player_index)
+                ^ cards_played_key(self.cards_played) ^ cards_played_key(0)
+            )
         )
 
     def set_state(self, state: float):
@@ -521,14 +691,46 @@ class Game:
             current_turn_index=self.current_turn_index,
             cards_played=self.cards_played,
             game_deck=self.game_deck,
-            state=state
+            state=state,
+            zobrist=self.zobrist ^ state_key(self.state) ^ state_key(state)
         )
 
     def serialize(self):
         return (
-            tuple(player.serialize() for player in self.players), self.discard_pile.serialize(), self.current_turn_index.index
+            tuple(player.serialize() for player in self.players), self.discard_pile.serialize(), self.current_turn_index
         )
 
     def get_next_player_index(self):
         ind = (self.current_turn_index + 1) % len(self.players)
         return ind
+
+    def __hash__(self):
+        return self.zobrist
+
+    def position(self) -> Tuple:
+        """Everything the Zobrist key covers, ignoring the order cards were added in, so that it compares equal
+        exactly when the positions are the same"""
+        players = []
+        for player in self.players:
+            ordinals = {}
+            property_cards = set()
+            for pset in player.board.property_sets:
+                ordinal = ordinals.get(pset.color, 0)
+                ordinals[pset.color] = ordinal + 1
+                property_cards.update((pset.color, ordinal, card.index) for card in pset.cards)
+            players.append((
+                frozenset(card.index for card in player.hand.cards_in_hand),
+                frozenset(card.index for card in player.board.cash_cards),
+                frozenset(property_cards)
+            ))
+        return (
+            self.current_turn_index, self.state, self.cards_played, tuple(self.game_deck),
+            frozenset(card.index for card in self.discard_pile.discarded_cards), tuple(players)
+        )
+
+    def __eq__(self, other):
+        # The Zobrist keys, which transitions keep up to date, rule out almost every unequal pair; the full position
+        # settles the rest, so two positions whose keys collide still compare unequal
+        if not isinstance(other, Game) or self.zobrist != other.zobrist:
+            return False
+        return self is other or self.position() == other.position()
@@ -0,0 +1,100 @@
+import json
+import time
+
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Counters
+DECISIONS = 'decisions'
+TRANSITIONS = 'transitions'
+PAYMENTS_ENUMERATED = 'payments_enumerated'
+MCTS_ITERATIONS = 'mcts_iterations'
+
+# Timers, which also count their calls
+EXECUTE_ACTIONS = 'execute_actions'
+ACTION_GENERATION = 'action_generation'
+RESPONSE_GENERATION = 'response_generation'
+DISCARD_GENERATION = 'discard_generation'
+PAYMENT_ENUMERATION = 'payment_enumeration'
+MCTS_SEARCH = 'mcts_search'
+
+
+class Metrics:
+    """Named counters and timers for the engine's hot paths.
+
+    Call sites check `metrics.enabled` before touching anything, so while it is off (the default) instrumentation
+    costs an attribute lookup and nothing is formatted, timed or stored. `summary()` is what a run exports as JSON.
+    """
+    __slots__ = ('enabled', 'counters', 'timers', 'started')
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, int] = {}
+        self.timers: Dict[str, List] = {}  # Name to [calls, seconds]
+        self.started = time.perf_counter()
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [calls, seconds]
+        else:
+            timer[0] += calls
+            timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def reset(self):
+        self.counters = {}
+        self.timers = {}
+        self.started = time.perf_counter()
+
+    def summary(self) -> Dict:
+        return {
+            'seconds': time.perf_counter() - self.started,
+            'counters': dict(sorted(self.counters.items())),
+            'timers': {
+                name: {'calls': calls, 'seconds': seconds, 'mean_us': 1e6 * seconds / calls if calls else 0.0}
+                for name, (calls, seconds) in sorted(self.timers.items())
+            }
+        }
+
+    def collect(self) -> Dict:
+        """Summary of what has been counted so far, clearing it, e.g. to ship a worker's metrics back per game"""
+        summary = self.summary()
+        self.counters = {}
+        self.timers = {}
+        return summary
+
+    def merge(self, summary: Dict):
+        """Add in a `summary()` taken elsewhere, such as in a worker process"""
+        for name, amount in summary['counters'].items():
+            self.count(name, amount)
+        for name, timer in summary['timers'].items():
+            self.add_time(name, timer['seconds'], calls=timer['calls'])
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+# The process-wide metrics every instrumented call site reports to
+metrics = Metrics()
+
+
+def enable():
+    """Start collecting afresh in this process (a plain function, so it can be a pool initializer)"""
+    metrics.reset()
+    metrics.enabled = True
+
+
+def disable():
+    metrics.enabled = False
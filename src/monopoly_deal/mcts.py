@@ -1,20 +1,41 @@
-from mcts import mcts
-from typing import List, Dict
+import math
+import multiprocessing
+import random
+import time
 
-from monopoly_deal.actions import Action
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+from monopoly_deal.actions import Action, SwapTarget, get_first_level_actions
 from monopoly_deal.agents import Agent, RandomAgent
 from monopoly_deal.cards import Card
+from monopoly_deal.equivalence import choice_signature
 from monopoly_deal.game import Game, Player
+from monopoly_deal.instrumentation import MCTS_ITERATIONS, MCTS_SEARCH, metrics
 from monopoly_deal.play import step
+from monopoly_deal.rollout import fast_rollout
 
 
 class State:
-    def __init__(self, ai_player: Player, player: Player, game: Game, actions: List, available_actions: Dict):
+    __slots__ = ('ai_player', 'game', 'player', 'actions', 'available_actions', 'is_over', 'partial')
+
+    def __init__(self, ai_player: Player, player: Player, game: Game, actions: List, available_actions: Dict,
+                 is_over: bool = False, partial: Hashable = None):
         self.ai_player = ai_player
         self.game = game
         self.player = player
         self.actions = actions
         self.available_actions = available_actions
+        self.is_over = is_over
+        self.partial = partial  # Signature of a half-made choice (e.g. a Forced Deal waiting for its give card)
+
+    def get_key(self) -> int:
+        """Key shared by every route to this position: the game plus whatever is waiting to be resolved"""
+        pending = tuple(
+            choice_signature(player=player, card=card, action=action) for player, card, action in self.actions or ()
+        )
+        player_index = self.player.index if self.player is not None else None
+        return hash((self.game.zobrist, player_index, pending, self.partial))
 
     def getCurrentPlayer(self):
         if self.player.index == self.ai_player.index:
@@ -25,59 +46,477 @@ class State:
     def getPossibleActions(self):
         possible_actions = []
         for card, list_of_actions in self.available_actions.items():
-            for action in list_of_actions:
+            for action in get_first_level_actions(list_of_actions):
                 possible_actions.append((card, action))
         return possible_actions
 
     def takeAction(self, action):
         card, action = action
-        try:
-            player, game, actions, available_actions, is_over = step(
+        if isinstance(action, SwapTarget):
+            # Stay in the same position and choose which card to give next
+            return State(
+                ai_player=self.ai_player,
+                player=self.player,
                 game=self.game,
                 actions=self.actions,
-                card_to_play=card,
-                action=action
+                available_actions={card: action.expand()},
+                partial=choice_signature(player=self.player, card=card, action=action)
             )
-        except Exception:
-            import ipdb;
-            ipdb.set_trace()
+        player, game, actions, available_actions, is_over = step(
+            game=self.game,
+            actions=self.actions,
+            card_to_play=card,
+            action=action
+        )
 
         return State(
             ai_player=self.ai_player,
             player=player,
             game=game,
             actions=actions,
-            available_actions=available_actions
+            available_actions=available_actions,
+            is_over=is_over
         )
 
     def isTerminal(self):
-        return self.game.winner() is not None
+        return self.is_over or self.game.winner() is not None
 
     def getReward(self):
         winner = self.game.winner()
+        if winner is None:
+            return 0  # Ran out of cards
         if winner.index == self.ai_player.index:
             return 1
         else:
             return -1
 
 
+# Phases of a search round. Expansion time includes the engine stepping to the new position (TAKE_ACTION) and
+# listing its choices (POSSIBLE_ACTIONS), which are also reported on their own
+SELECTION = 'selection'
+EXPANSION = 'expansion'
+ROLLOUT = 'rollout'
+BACKPROPAGATION = 'backpropagation'
+TAKE_ACTION = 'take_action'
+POSSIBLE_ACTIONS = 'possible_actions'
+PHASES = (SELECTION, EXPANSION, ROLLOUT, BACKPROPAGATION, TAKE_ACTION, POSSIBLE_ACTIONS)
+
+
+class SearchProfile:
+    """Where one search spent its budget, or the sum over many searches once merged"""
+    __slots__ = ('searches', 'iterations', 'nodes_allocated', 'max_depth', 'total_depth', 'root_branching',
+                 'seconds', 'phase_seconds')
+
+    def __init__(self):
+        self.searches = 0
+        self.iterations = 0
+        self.nodes_allocated = 0
+        self.max_depth = 0
+        self.total_depth = 0  # Summed over iterations, for the mean
+        self.root_branching = 0  # Summed over searches, for the mean
+        self.seconds = 0.0
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+
+    @property
+    def mean_depth(self) -> float:
+        return self.total_depth / self.iterations if self.iterations else 0.0
+
+    @property
+    def mean_root_branching(self) -> float:
+        return self.root_branching / self.searches if self.searches else 0.0
+
+    @property
+    def iterations_per_second(self) -> float:
+        return self.iterations / self.seconds if self.seconds else 0.0
+
+    def merge(self, other: 'SearchProfile') -> 'SearchProfile':
+        self.searches += other.searches
+        self.iterations += other.iterations
+        self.nodes_allocated += other.nodes_allocated
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.total_depth += other.total_depth
+        self.root_branching += other.root_branching
+        self.seconds += other.seconds
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] += seconds
+        return self
+
+    @classmethod
+    def combine(cls, profiles: Iterable['SearchProfile']) -> 'SearchProfile':
+        combined = cls()
+        for profile in profiles:
+            combined.merge(profile)
+        return combined
+
+    def as_dict(self) -> Dict:
+        return {
+            'searches': self.searches,
+            'iterations': self.iterations,
+            'iterations_per_second': self.iterations_per_second,
+            'nodes_allocated': self.nodes_allocated,
+            'max_depth': self.max_depth,
+            'mean_depth': self.mean_depth,
+            'mean_root_branching': self.mean_root_branching,
+            'seconds': self.seconds,
+            'phase_seconds': dict(self.phase_seconds)
+        }
+
+    def report(self) -> str:
+        split = ', '.join(
+            f'{phase} {seconds / self.seconds:.0%}' for phase, seconds in self.phase_seconds.items() if self.seconds
+        )
+        return (
+            f'{self.searches} searches, {self.iterations / max(self.searches, 1):.0f} iterations each '
+            f'({self.iterations_per_second:,.0f}/sec), depth {self.mean_depth:.1f} mean / {self.max_depth} max, '
+            f'root branching {self.mean_root_branching:.1f}; {split}'
+        )
+
+    def __repr__(self):
+        return f'<SearchProfile: {self.searches} searches, {self.iterations} iterations>'
+
+
+def random_policy(state: State):
+    """Play out with uniformly random choices through the full engine (slow; `rollout.fast_rollout` is the default)"""
+    while not state.isTerminal():
+        state = state.takeAction(random.choice(state.getPossibleActions()))
+    return state.getReward()
+
+
+class Node:
+    __slots__ = ('state', 'key', 'is_terminal', 'visits', 'total_reward', 'children', 'untried')
+
+    def __init__(self, state: State, key: int):
+        self.state = state
+        self.key = key
+        self.is_terminal = state.isTerminal()
+        self.visits = 0
+        self.total_reward = 0
+        # Edges are keyed by choice signature and point at child keys in the transposition table
+        self.children: Dict[Hashable, Tuple[int, Tuple[Card, Action]]] = {}
+        # Reversed so that choices are expanded in the order they were offered
+        self.untried: List[Tuple[Card, Action]] = [] if self.is_terminal else state.getPossibleActions()[::-1]
+
+    def get_signature(self, choice: Tuple[Card, Action]):
+        card, action = choice
+        return choice_signature(player=self.state.player, card=card, action=action)
+
+
+class MCTS:
+    """UCT search over a transposition table of positions with a bounded number of nodes.
+
+    Positions reached through different move orders share one node. Nodes are kept in least-recently-visited order
+    and the oldest are evicted once the table holds more than `max_nodes`; since backpropagation refreshes the path
+    from leaf to root, descendants are always evicted before their ancestors.
+
+    With `reuse_tree` the table is kept between searches, so a later search whose position was already explored
+    (the next play of the same turn, or any transposition of it) starts from the statistics gathered so far.
+    """
+    def __init__(self, time_limit: int = None, iteration_limit: int = None,
+                 exploration_constant: float = 1 / math.sqrt(2), max_nodes: int = 100000,
+                 rollout_policy: Callable[[State], float] = fast_rollout, reuse_tree: bool = True):
+        if (time_limit is None) == (iteration_limit is None):
+            raise ValueError("Must have exactly one of a time limit (ms) or an iteration limit")
+        self.time_limit = time_limit
+        self.iteration_limit = iteration_limit
+        self.exploration_constant = exploration_constant
+        self.max_nodes = max_nodes
+        self.rollout_policy = rollout_policy
+        self.reuse_tree = reuse_tree
+        self.table: 'OrderedDict[int, Node]' = OrderedDict()
+        self.profile = SearchProfile()  # Of the latest search
+
+    def search(self, initial_state: State):
+        root = self.run(initial_state)
+        return self.get_best_choice(root, initial_state)
+
+    def search_with_profile(self, initial_state: State) -> Tuple[Tuple[Card, Action], SearchProfile]:
+        """The chosen move together with how the search that chose it went"""
+        return self.search(initial_state), self.profile
+
+    def run(self, initial_state: State) -> Node:
+        """Spend the search budget from `initial_state` and return its node"""
+        if not self.reuse_tree:
+            self.reset()
+        start = time.perf_counter()
+        profile = self.profile = SearchProfile()
+        profile.searches = 1
+        root = self._get_or_add_node(initial_state)
+        profile.root_branching = len(root.children) + len(root.untried)
+
+        if self.time_limit is not None:
+            deadline = time.time() + self.time_limit / 1000
+            while time.time() < deadline:
+                self.execute_round(root)
+        else:
+            for _ in range(self.iteration_limit):
+                self.execute_round(root)
+        profile.seconds = time.perf_counter() - start
+        if metrics.enabled:
+            metrics.add_time(MCTS_SEARCH, profile.seconds)
+            metrics.count(MCTS_ITERATIONS, profile.iterations)
+        return root
+
+    def get_root_statistics(self, root: Node) -> Dict[Hashable, Tuple[int, float]]:
+        """Visits and total reward of each explored choice at `root`, keyed by choice signature"""
+        statistics = {}
+        for signature, (key, _) in root.children.items():
+            child = self.table.get(key)
+            if child is not None and child.visits:
+                statistics[signature] = (child.visits, child.total_reward)
+        return statistics
+
+    def reset(self):
+        """Forget every position, e.g. before searching a different game"""
+        self.table.clear()
+
+    def execute_round(self, root: Node):
+        profile = self.profile
+        phase_seconds = profile.phase_seconds
+        expanding = phase_seconds[EXPANSION]
+        start = time.perf_counter()
+        path = self.select(root)
+        selected = time.perf_counter()
+        reward = self.rollout_policy(path[-1].state)
+        rolled_out = time.perf_counter()
+        self.backpropagate(path, reward)
+        phase_seconds[BACKPROPAGATION] += time.perf_counter() - rolled_out
+        phase_seconds[ROLLOUT] += rolled_out - selected
+        phase_seconds[SELECTION] += selected - start - (phase_seconds[EXPANSION] - expanding)
+
+        profile.iterations += 1
+        depth = len(path) - 1
+        profile.total_depth += depth
+        if depth > profile.max_depth:
+            profile.max_depth = depth
+
+    def select(self, root: Node) -> List[Node]:
+        path = [root]
+        seen = {root.key}
+        node = root
+        while not node.is_terminal:
+            child = None if node.untried else self.get_best_child(node, self.exploration_constant)
+            if child is None:
+                child = self.expand(node)
+            if child.key in seen:
+                break  # Came back round to a position already on this path
+            path.append(child)
+            seen.add(child.key)
+            if child.visits == 0:
+                break
+            node = child
+        return path
+
+    def expand(self, node: Node) -> Node:
+        phase_seconds = self.profile.phase_seconds
+        start = time.perf_counter()
+        choice = node.untried.pop()
+        state = node.state.takeAction(choice)
+        phase_seconds[TAKE_ACTION] += time.perf_counter() - start
+        child = self._get_or_add_node(state)
+        node.children[node.get_signature(choice)] = (child.key, choice)
+        phase_seconds[EXPANSION] += time.perf_counter() - start
+        return child
+
+    def backpropagate(self, path: List[Node], reward: float):
+        for node in reversed(path):
+            node.visits += 1
+            node.total_reward += reward
+            if node.key in self.table:
+                self.table.move_to_end(node.key)
+        while len(self.table) > self.max_nodes:
+            self.table.popitem(last=False)
+
+    def get_best_child(self, node: Node, exploration_value: float):
+        """Pick the child with the best UCT value for the player to move, or None if some choice is unexpanded"""
+        sign = node.state.getCurrentPlayer()
+        best_value = float('-inf')
+        best_nodes = []
+        for signature, (key, choice) in list(node.children.items()):
+            child = self.table.get(key)
+            if child is None:
+                # Evicted, so it has to be expanded again
+                del node.children[signature]
+                node.untried.append(choice)
+                continue
+            if child.visits == 0:
+                value = float('inf')
+            else:
+                value = sign * child.total_reward / child.visits + exploration_value * math.sqrt(
+                    2 * math.log(max(node.visits, 1)) / child.visits)
+            if value > best_value:
+                best_value = value
+                best_nodes = [child]
+            elif value == best_value:
+                best_nodes.append(child)
+        if (exploration_value and node.untried) or not best_nodes:
+            return None
+        return random.choice(best_nodes)
+
+    def get_best_choice(self, root: Node, state: State) -> Tuple[Card, Action]:
+        best_child = self.get_best_child(root, 0)
+        if best_child is not None:
+            # Hand back the caller's own objects, since the root may have been built from an equal position
+            choices = {root.get_signature(choice): choice for choice in state.getPossibleActions()}
+            for signature, (key, choice) in root.children.items():
+                if key == best_child.key:
+                    return choices.get(signature, choice)
+        return random.choice(state.getPossibleActions())
+
+    def _get_or_add_node(self, state: State) -> Node:
+        key = state.get_key()
+        node = self.table.get(key)
+        if node is None:
+            start = time.perf_counter()
+            node = Node(state=state, key=key)
+            self.profile.phase_seconds[POSSIBLE_ACTIONS] += time.perf_counter() - start
+            self.profile.nodes_allocated += 1
+            self.table[key] = node
+        return node
+
+
+def _search_worker(connection, search: MCTS):
+    """Run searches sent down `connection` until it sends None, keeping this worker's table between them"""
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        state, seed = task
+        random.seed(seed)
+        root = search.run(state)
+        connection.send((search.get_root_statistics(root), search.profile))
+    connection.close()
+
+
+class ParallelMCTS:
+    """Root-parallel search: independent searches of the same position in worker processes, merged at the root.
+
+    The workers are started once and kept warm, each with its own table (reused between decisions like `MCTS`) and
+    its own random stream. The merged choice is the one with the most visits over all workers.
+    """
+    def __init__(self, workers: int, time_limit: int = None, iteration_limit: int = None,
+                 exploration_constant: float = 1 / math.sqrt(2), max_nodes: int = 100000,
+                 rollout_policy: Callable[[State], float] = fast_rollout, reuse_tree: bool = True, seed: int = None):
+        if workers < 1:
+            raise ValueError("Need at least one worker")
+        self.workers = workers
+        self.search_options = dict(
+            time_limit=time_limit, iteration_limit=iteration_limit, exploration_constant=exploration_constant,
+            max_nodes=max_nodes, rollout_policy=rollout_policy, reuse_tree=reuse_tree
+        )
+        MCTS(**self.search_options)  # Validate the options before starting any process
+        self.rng = random.Random(seed)
+        self.connections = []
+        self.processes = []
+        self.profile = SearchProfile()  # Of the latest search, summed over workers
+
+    def start(self):
+        if len(self.processes) < self.workers and multiprocessing.current_process().daemon:
+            raise RuntimeError(
+                "Daemonic processes, such as the workers of a parallel tournament, cannot start search workers; "
+                "play the games in one process (e.g. --workers 1) or search with a single worker"
+            )
+        for _ in range(self.workers - len(self.processes)):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_search_worker, args=(worker_connection, MCTS(**self.search_options)), daemon=True
+            )
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def search_statistics(self, initial_state: State) -> Dict[Hashable, Tuple[int, float]]:
+        """Visits and total reward of each choice at the root, summed over every worker"""
+        self.start()
+        for connection in self.connections:
+            connection.send((initial_state, self.rng.getrandbits(64)))
+        merged = {}
+        self.profile = SearchProfile()
+        for connection in self.connections:
+            statistics, profile = connection.recv()
+            self.profile.merge(profile)
+            for signature, (visits, total_reward) in statistics.items():
+                merged_visits, merged_reward = merged.get(signature, (0, 0))
+                merged[signature] = (merged_visits + visits, merged_reward + total_reward)
+        return merged
+
+    def search(self, initial_state: State) -> Tuple[Card, Action]:
+        statistics = self.search_statistics(initial_state)
+        sign = initial_state.getCurrentPlayer()
+        best_choice = None
+        best_value = None
+        for choice in initial_state.getPossibleActions():
+            card, action = choice
+            signature = choice_signature(player=initial_state.player, card=card, action=action)
+            if signature not in statistics:
+                continue
+            visits, total_reward = statistics[signature]
+            value = (visits, sign * total_reward / visits)
+            if best_value is None or value > best_value:
+                best_choice, best_value = choice, value
+        if best_choice is None:
+            return random.choice(initial_state.getPossibleActions())
+        return best_choice
+
+    def search_with_profile(self, initial_state: State) -> Tuple[Tuple[Card, Action], SearchProfile]:
+        return self.search(initial_state), self.profile
+
+
 class MCTSAgent(Agent):
-    def __init__(self, player: Player, time_limit: int):
+    def __init__(self, player: Player, time_limit: int, max_nodes: int = 100000, workers: int = 1):
         self.player = player
-        self.mcts = mcts(timeLimit=time_limit)
+        if workers > 1:
+            self.mcts = ParallelMCTS(workers=workers, time_limit=time_limit, max_nodes=max_nodes)
+        else:
+            self.mcts = MCTS(time_limit=time_limit, max_nodes=max_nodes)
+        self.profiles: List[SearchProfile] = []  # One per search, in the order they were made
+
+    def close(self):
+        """Stop any search workers"""
+        if isinstance(self.mcts, ParallelMCTS):
+            self.mcts.close()
+
+    def search(self, state: State):
+        (card, action), profile = self.mcts.search_with_profile(initial_state=state)
+        self.profiles.append(profile)
+        while isinstance(action, SwapTarget):
+            # Only the card to steal has been chosen, so search again for the card to give
+            state = state.takeAction((card, action))
+            (card, action), profile = self.mcts.search_with_profile(initial_state=state)
+            self.profiles.append(profile)
+        return card, action
 
     def get_response(self, game: Game, actions: List[Action], available_responses: Dict[Card, List[Action]]):
-        card, action = self.mcts.search(initialState=State(ai_player=self.player, player=game.players[self.player.index], game=game, actions=actions, available_actions=available_responses))
+        card, action = self.search(state=State(ai_player=self.player, player=game.players[self.player.index], game=game, actions=actions, available_actions=available_responses))
         return card, action
 
     def get_discard_action(self, game: Game, actions: List[Action], discard_options: Dict[Card, List[Action]]):
-        card, action = self.mcts.search(
-            initialState=State(ai_player=self.player, player=game.players[self.player.index], game=game, actions=actions,
-                               available_actions=discard_options))
+        card, action = self.search(
+            state=State(ai_player=self.player, player=game.players[self.player.index], game=game, actions=actions,
+                        available_actions=discard_options))
         return card, action
 
     def get_action(self, game: Game, actions: List[Action], available_actions: Dict[Card, List[Action]]):
-        card, action = self.mcts.search(
-            initialState=State(ai_player=self.player, player=game.players[self.player.index], game=game, actions=actions,
-                               available_actions=available_actions))
+        card, action = self.search(
+            state=State(ai_player=self.player, player=game.players[self.player.index], game=game, actions=actions,
+                        available_actions=available_actions))
         return card, action
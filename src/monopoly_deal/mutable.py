@@ -0,0 +1,353 @@
+import random
+
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from monopoly_deal.actions import (
+    Action, Charge, Discard, Draw, EndTurn, NoResponse, Pay, PlayAsCash, PlayProperty, SayNo, StealCard, StealSet, Swap
+)
+from monopoly_deal.cards import (
+    ACTION_TYPE_CODES, CARD_ACTION_TYPES, CARD_BUILDABLE, CARD_COLOR_MASKS, CARD_KINDS, CARD_TYPES, SET_COLORS,
+    TYPE_ACTION, TYPE_PROPERTY, TYPE_RENT, ActionType, Card, property_set_rents
+)
+from monopoly_deal.compact import (
+    COLOR_CODES, DECK, DISCARD, HOTELS, HOUSES, CompactGame, cash_location, hand_location, set_location
+)
+from monopoly_deal.game import Game, Player
+
+CARDS_TO_DRAW = 2
+NO_CARD = 0  # Card ids start at 1
+
+# Kinds of move. A move is a tuple (kind, card, target player, a, b), with `a` and `b` depending on the kind: the
+# amount of a charge, the color code of a property, the card or set slot to steal, the card to give, the cash and
+# property cards of a payment or the cards of a discard
+CASH = 1
+PROPERTY = 2
+CHARGE = 3
+STEAL_CARD = 4
+STEAL_SET = 5
+SWAP = 6
+DRAW = 7
+SAY_NO = 8
+NO_RESPONSE = 9
+PAY = 10
+DISCARD_CARDS = 11
+END_TURN = 12
+RESPONDABLE = frozenset((CHARGE, STEAL_CARD, STEAL_SET, SWAP, SAY_NO))
+
+SET_RENTS = {COLOR_CODES[color]: tuple(rents) for color, rents in property_set_rents.items()}
+MASK_CODES = {
+    mask: tuple(code for code in SET_RENTS if (1 << (code - 1)) & mask) for mask in set(CARD_COLOR_MASKS) if mask
+}
+
+_PASS_GO = ACTION_TYPE_CODES[ActionType.PASS_GO]
+_FORCED_DEAL = ACTION_TYPE_CODES[ActionType.FORCED_DEAL]
+_BDAY = ACTION_TYPE_CODES[ActionType.BDAY]
+_DEAL_BREAKER = ACTION_TYPE_CODES[ActionType.DEAL_BREAKER]
+_DEBT_COLLECTOR = ACTION_TYPE_CODES[ActionType.DEBT_COLLECTOR]
+_SLY_DEAL = ACTION_TYPE_CODES[ActionType.SLY_DEAL]
+_JUST_SAY_NO = ACTION_TYPE_CODES[ActionType.JUST_SAY_NO]
+
+Move = Tuple[int, int, int, object, object]
+Play = Tuple[int, Move]  # The player making a move, and the move
+
+_write = CompactGame._write  # Without journaling
+
+
+class UndoToken:
+    __slots__ = ('journal_length', 'clock', 'current_turn_index', 'cards_played', 'state')
+
+    def __init__(self, journal_length: int, clock: int, current_turn_index: int, cards_played: int, state: float):
+        self.journal_length = journal_length
+        self.clock = clock
+        self.current_turn_index = current_turn_index
+        self.cards_played = cards_played
+        self.state = state
+
+
+class MutableGame(CompactGame):
+    """A `CompactGame` changed in place by `apply(actions)` and restored exactly by `undo(token)`.
+
+    Moves are tuples of ints read straight from the cells: `card_moves` lists those for a card and `sample_play`
+    draws one without listing the rest, so no `Game` is needed to find them. Every cell written while applying a
+    chain is journaled with its old value, so search can walk down and back up one game without copying it. Chains
+    must be undone in the reverse order they were applied.
+    """
+    __slots__ = ('journal',)
+
+    def __init__(self, cells: array, num_players: int, current_turn_index: int, cards_played: int, state: float,
+                 by_location: List[List[int]] = None):
+        super().__init__(cells=cells, num_players=num_players, current_turn_index=current_turn_index,
+                         cards_played=cards_played, state=state, by_location=by_location)
+        self.journal = array('L')  # Pairs of cell index and the value it had
+
+    @classmethod
+    def from_compact(cls, compact: CompactGame):
+        return cls(cells=array('L', compact.cells), num_players=compact.num_players,
+                   current_turn_index=compact.current_turn_index, cards_played=compact.cards_played,
+                   state=compact.state, by_location=[list(cards) for cards in compact.by_location])
+
+    # Moves
+
+    def rent_due(self, player_index: int, slot: int) -> int:
+        cards = self.by_location[set_location(player_index, slot)]
+        num_built = sum(CARD_BUILDABLE[card] for card in cards)
+        if num_built == 0:
+            return 0
+        rents = SET_RENTS[self.cells[self._color_base(player_index) + slot]]
+        if num_built >= len(rents):
+            return rents[-1] + sum(3 for card in cards if card in HOUSES) + sum(4 for card in cards if card in HOTELS)
+        return rents[num_built - 1]
+
+    def find_say_no(self, player_index: int, actions: Sequence[Play]) -> int:
+        """A Just Say No card the player holds and has not already played in `actions`, or NO_CARD"""
+        for card in self.by_location[hand_location(player_index)]:
+            if CARD_ACTION_TYPES[card] == _JUST_SAY_NO and \
+                    not any(by == player_index and move[1] == card for by, move in actions):
+                return card
+        return NO_CARD
+
+    def card_moves(self, card: int) -> List[Move]:
+        """Every move the current player can make with `card`, as `actions.get_available_actions` lists them"""
+        options, steals, gives = self._card_options(card)
+        return options + [(SWAP, card, other, stolen, given) for other, stolen in steals for given in gives]
+
+    def sample_play(self, rng: random.Random = random, can_end_turn: bool = True) -> Optional[Move]:
+        """A random card from the current player's hand and a random legal move for it, or None to end the turn
+        (one more option alongside the cards if `can_end_turn`, otherwise only once no card can be played)"""
+        cards = list(self.by_location[hand_location(self.current_turn_index)])
+        while cards or can_end_turn:
+            choice = int(rng.random() * (len(cards) + 1 if can_end_turn else len(cards)))
+            if choice == len(cards):
+                return None
+            move = self.sample_card_move(cards[choice], rng)
+            if move is not None:
+                return move
+            cards[choice] = cards[-1]
+            cards.pop()
+        return None
+
+    def sample_card_move(self, card: int, rng: random.Random = random) -> Optional[Move]:
+        """One of `card_moves(card)` at random, or None if there are none"""
+        options, steals, gives = self._card_options(card)
+        # Forced Deals are drawn straight from the product of cards to steal and cards to give
+        num_options = len(options)
+        choice = int(rng.random() * (num_options + len(steals) * len(gives)))
+        if choice < num_options:
+            return options[choice]
+        if not steals:
+            return None
+        choice -= num_options
+        other, stolen = steals[choice // len(gives)]
+        return SWAP, card, other, stolen, gives[choice % len(gives)]
+
+    def _card_options(self, card: int) -> Tuple[List[Move], List[Tuple[int, int]], List[int]]:
+        """The moves for `card` other than Forced Deals, and the cards a Forced Deal could steal and give"""
+        card_type = CARD_TYPES[card]
+        player = self.current_turn_index
+        if card_type == TYPE_PROPERTY:
+            if CARD_BUILDABLE[card]:
+                return [(PROPERTY, card, player, code, 0) for code in MASK_CODES[CARD_COLOR_MASKS[card]]], [], []
+            # Houses go on complete sets, hotels on complete sets with a house
+            return [
+                (PROPERTY, card, player, code, 0) for slot, code in self.set_slots(player)
+                if self.is_complete(player, slot) and
+                (card in HOUSES or any(built in HOUSES for built in self.by_location[set_location(player, slot)]))
+            ], [], []
+        if card_type not in (TYPE_ACTION, TYPE_RENT):
+            return [(CASH, card, player, 0, 0)], [], []
+
+        options, steals, gives = [(CASH, card, player, 0, 0)], [], []
+        opponents = [other for other in range(self.num_players) if other != player]
+        if card_type == TYPE_RENT:
+            mask = CARD_COLOR_MASKS[card]
+            rents = [
+                self.rent_due(player, slot) for slot, code in self.set_slots(player) if (1 << (code - 1)) & mask
+            ]
+            if rents:
+                options.extend((CHARGE, card, other, max(rents), 0) for other in opponents)
+            return options, steals, gives
+        action_type = CARD_ACTION_TYPES[card]
+        if action_type == _PASS_GO:
+            options.append((DRAW, card, player, CARDS_TO_DRAW, 0))
+        elif action_type in (_BDAY, _DEBT_COLLECTOR):
+            amount = 2 if action_type == _BDAY else 5
+            options.extend((CHARGE, card, other, amount, 0) for other in opponents)
+        elif action_type == _DEAL_BREAKER:
+            options.extend(
+                (STEAL_SET, card, other, slot, 0)
+                for other in opponents for slot, _ in self.set_slots(other) if self.is_complete(other, slot)
+            )
+        elif action_type in (_SLY_DEAL, _FORCED_DEAL):
+            # One card of each kind per set, as `cards.distinct_cards` picks them
+            steals = [
+                (other, stolen)
+                for other in opponents for slot, _ in self.set_slots(other) if not self.is_complete(other, slot)
+                for stolen in _distinct(self.by_location[set_location(other, slot)])
+            ]
+            if action_type == _SLY_DEAL:
+                options.extend((STEAL_CARD, card, other, stolen, 0) for other, stolen in steals)
+                steals = []
+            else:
+                gives = [
+                    given for slot, _ in self.set_slots(player) if not self.is_complete(player, slot)
+                    for given in _distinct(self.by_location[set_location(player, slot)])
+                ]
+        return options, steals, gives
+
+    def set_slots(self, player_index: int) -> List[Tuple[int, int]]:
+        """(slot, color code) of every property set the player has"""
+        cells, base = self.cells, self._color_base(player_index)
+        return [(slot, cells[base + slot]) for slot in range(self.num_sets(player_index))]
+
+    # Applying and undoing
+
+    def apply(self, actions: Sequence[Play], shuffle: Callable[[List[int]], None] = None) -> UndoToken:
+        """Carry out a settled chain of plays as `play.execute_actions` does; a chain of one END_TURN hands over to
+        the next player, who draws as `play.drive` has them do between turns"""
+        token = self.checkpoint()
+        if actions[-1][1][0] == SAY_NO:
+            rejections = 0
+            for _, move in reversed(actions):
+                if move[0] != SAY_NO:
+                    break
+                rejections += 1
+            # `execute_actions` tells responses apart by comparing `Player` objects, and the first play of a chain
+            # replaces the current player's, so every later play counts as a response, their own Just Say No
+            # included
+            if rejections % 2 == 1:
+                # Said no to: every card of the chain is spent and nothing else happens
+                for position, (player, move) in enumerate(actions):
+                    self._play_action_card(move[1], player, is_response=position > 0)
+                return token
+        # Most common moves first
+        for player, (kind, card, target, a, b) in actions:
+            if kind == CASH:
+                self._assert_in_hand(card, player)
+                self._place(card, cash_location(player))
+                self.cards_played += 1
+            elif kind == PROPERTY:
+                self._assert_in_hand(card, player)
+                self._add_property_card(card=card, color=SET_COLORS[a - 1], player_index=player, is_bounty=False)
+                self.cards_played += 1
+            elif kind == END_TURN:
+                self._end_turn(shuffle=shuffle)
+            elif kind == NO_RESPONSE:
+                pass
+            elif kind == PAY:
+                for paid in b:
+                    self._steal_property_card(card=paid, stolen_to_index=target, stolen_from_index=player)
+                for paid in a:
+                    self._place(paid, cash_location(target))
+            elif kind == CHARGE:
+                self._play_action_card(card, player, is_response=False)
+            elif kind == STEAL_CARD:
+                self._play_action_card(card, player, is_response=False)
+                self._steal_property_card(card=a, stolen_to_index=player, stolen_from_index=target)
+            elif kind == STEAL_SET:
+                self._play_action_card(card, player, is_response=False)
+                self._steal_complete_set(a, stolen_to_index=player, stolen_from_index=target)
+            elif kind == SWAP:
+                self._play_action_card(card, player, is_response=False)
+                self._steal_property_card(card=a, stolen_to_index=player, stolen_from_index=target)
+                self._steal_property_card(card=b, stolen_to_index=target, stolen_from_index=player)
+            elif kind == DRAW:
+                # As in the object engine, Pass Go draws and counts as a play without leaving the hand
+                self._draw_cards(num_to_draw=a, as_move=True, shuffle=shuffle)
+            elif kind == SAY_NO:
+                self._play_action_card(card, player, is_response=True)
+            elif kind == DISCARD_CARDS:
+                for discarded in a:
+                    self._assert_in_hand(discarded, player)
+                    self._place(discarded, DISCARD)
+            else:
+                raise ValueError(f"Cannot apply move {kind}")
+        return token
+
+    def checkpoint(self) -> UndoToken:
+        """A token that undoes everything applied from here on"""
+        return UndoToken(len(self.journal), self.cells[0], self.current_turn_index, self.cards_played, self.state)
+
+    def undo(self, token: UndoToken):
+        journal = self.journal
+        assert len(journal) >= token.journal_length, "Moves must be undone in reverse order"
+        for position in range(len(journal) - 2, token.journal_length - 2, -2):
+            # Written without journaling, but through the index like any other change
+            _write(self, journal[position], journal[position + 1])
+        del journal[token.journal_length:]
+        self.cells[0] = token.clock
+        self.current_turn_index = token.current_turn_index
+        self.cards_played = token.cards_played
+        self.state = token.state
+
+    def _write(self, cell: int, value: int):
+        journal = self.journal
+        journal.append(cell)
+        journal.append(self.cells[cell])
+        _write(self, cell, value)
+
+    def _play_action_card(self, card: int, player_index: int, is_response: bool):
+        self._assert_in_hand(card, player_index)
+        self._place(card, DISCARD)
+        self.cards_played = self.cards_played + 1 if not is_response else 0
+
+    def _steal_complete_set(self, slot: int, stolen_to_index: int, stolen_from_index: int):
+        new_slot = self._new_set(stolen_to_index, self.set_color(stolen_from_index, slot))
+        for card in self.set_cards(stolen_from_index, slot):
+            self._place(card, set_location(stolen_to_index, new_slot))
+        self._remove_set(stolen_from_index, slot)
+
+    def _end_turn(self, shuffle: Callable[[List[int]], None] = None):
+        self.current_turn_index = self.get_next_player_index()
+        self.cards_played = 0
+        if self.by_location[DECK]:
+            self._draw_cards(num_to_draw=CARDS_TO_DRAW, shuffle=shuffle)
+
+
+def _distinct(cards: Sequence[int]) -> List[int]:
+    """The first card of each kind in `cards`"""
+    kinds, distinct = set(), []
+    for card in cards:
+        if CARD_KINDS[card] not in kinds:
+            kinds.add(CARD_KINDS[card])
+            distinct.append(card)
+    return distinct
+
+
+def convert_actions(game: Game, actions: Sequence[Tuple[Player, Card, Action]]) -> Tuple[Play, ...]:
+    """A chain of `(player, card, action)` plays on `game`, as `play.execute_actions` takes them, as `MutableGame`
+    plays; (None, None, EndTurn()) becomes an END_TURN for the current player"""
+    plays = []
+    for player, card, action in actions:
+        if isinstance(action, EndTurn):
+            player_index = game.current_turn_index
+            plays.append((player_index, (END_TURN, NO_CARD, player_index, 0, 0)))
+            continue
+        if isinstance(action, Pay):
+            move = PAY, NO_CARD, action.target_player.index, tuple(card.index for card in action.cash_cards), \
+                tuple(card.index for card in action.property_cards)
+        elif isinstance(action, NoResponse):
+            move = NO_RESPONSE, NO_CARD, plays[-1][0], 0, 0
+        elif isinstance(action, Charge):
+            move = CHARGE, card.index, action.target_player.index, action.amount, 0
+        elif isinstance(action, StealCard):
+            move = STEAL_CARD, card.index, action.target_player.index, action.steal_card.index, 0
+        elif isinstance(action, StealSet):
+            slot = game.players[action.target_player.index].board.property_sets.index(action.steal_set)
+            move = STEAL_SET, card.index, action.target_player.index, slot, 0
+        elif isinstance(action, Swap):
+            move = SWAP, card.index, action.target_player.index, action.steal_card.index, action.give_card.index
+        elif isinstance(action, SayNo):
+            move = SAY_NO, card.index, action.target_player.index, 0, 0
+        elif isinstance(action, Draw):
+            move = DRAW, card.index, player.index, action.num_to_draw, 0
+        elif isinstance(action, PlayProperty):
+            move = PROPERTY, card.index, player.index, COLOR_CODES[action.color], 0
+        elif isinstance(action, PlayAsCash):
+            move = CASH, card.index, player.index, 0, 0
+        elif isinstance(action, Discard):
+            move = DISCARD_CARDS, NO_CARD, player.index, tuple(card.index for card in action.discard_cards), 0
+        else:
+            raise ValueError(f"Cannot convert {action}")
+        plays.append((player.index, move))
+    return tuple(plays)
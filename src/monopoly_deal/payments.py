@@ -0,0 +1,89 @@
+from itertools import combinations, islice, product
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from monopoly_deal.cards import Card
+from monopoly_deal.instrumentation import PAYMENT_ENUMERATION, PAYMENTS_ENUMERATED, metrics
+
+# Orderings for `find_minimal_payments`
+OVERPAY = 'overpay'  # Smallest overpayment first, then fewest cards
+FEWEST_CARDS = 'fewest_cards'  # Fewest cards first, then smallest overpayment
+
+
+def _denomination_counts(denominations: List[Tuple[int, int]], minimum_value: int) -> Iterator[Tuple[int, ...]]:
+    """Yield how many cards of each denomination make up every minimal covering payment.
+
+    `denominations` is a list of (value, number of cards) sorted by descending value. A payment is minimal when it
+    covers `minimum_value` but stops covering it once its smallest card is removed, so walking the denominations
+    from largest to smallest we can stop adding cards as soon as the payment covers the bill.
+    """
+    remaining = [0] * (len(denominations) + 1)
+    for i in range(len(denominations) - 1, -1, -1):
+        value, count = denominations[i]
+        remaining[i] = remaining[i + 1] + value * count
+
+    counts = [0] * len(denominations)
+
+    def search(i: int, total: int):
+        if i == len(denominations) or total + remaining[i] < minimum_value:
+            return
+        value, count = denominations[i]
+        # Skip this denomination entirely
+        yield from search(i + 1, total)
+        for used in range(1, count + 1):
+            total += value
+            counts[i] = used
+            if total >= minimum_value:
+                if total - value < minimum_value:
+                    yield tuple(counts)
+                break
+            yield from search(i + 1, total)
+        counts[i] = 0
+
+    yield from search(0, 0)
+
+
+def iter_minimal_payments(cards: Iterable[Card], minimum_value: int, order: str = None) -> Iterator[Tuple[Card, ...]]:
+    """Lazily yield every minimally covering payment of at least `minimum_value` from `cards`"""
+    cards = list(cards)
+    if minimum_value <= 0:
+        # Any single card settles a bill that is already covered
+        yield from ((card,) for card in cards)
+        return
+
+    buckets: Dict[int, List[Card]] = {}
+    for card in cards:
+        buckets.setdefault(card.value, []).append(card)
+    denominations = sorted(((value, len(bucket)) for value, bucket in buckets.items() if value > 0), reverse=True)
+
+    all_counts = _denomination_counts(denominations=denominations, minimum_value=minimum_value)
+    if order is not None:
+        def overpay(counts):
+            return sum(value * used for (value, _), used in zip(denominations, counts)) - minimum_value
+
+        if order == OVERPAY:
+            all_counts = sorted(all_counts, key=lambda counts: (overpay(counts), sum(counts)))
+        elif order == FEWEST_CARDS:
+            all_counts = sorted(all_counts, key=lambda counts: (sum(counts), overpay(counts)))
+        else:
+            raise ValueError(f"Unknown payment ordering {order}")
+
+    # Cards of equal value are interchangeable, so each denomination count expands into combinations per bucket
+    for counts in all_counts:
+        choices = [
+            combinations(buckets[value], used) for (value, _), used in zip(denominations, counts) if used > 0
+        ]
+        for parts in product(*choices):
+            yield tuple(card for part in parts for card in part)
+
+
+def find_minimal_payments(cards: Iterable[Card], minimum_value: int, limit: int = None,
+                          order: str = None) -> List[Tuple[Card, ...]]:
+    """Return the minimally covering payments of at least `minimum_value`, optionally ordered and capped"""
+    if not metrics.enabled:
+        return list(islice(iter_minimal_payments(cards=cards, minimum_value=minimum_value, order=order), limit))
+    start = perf_counter()
+    payments = list(islice(iter_minimal_payments(cards=cards, minimum_value=minimum_value, order=order), limit))
+    metrics.add_time(PAYMENT_ENUMERATION, perf_counter() - start)
+    metrics.count(PAYMENTS_ENUMERATED, len(payments))
+    return payments
@@ -1,13 +1,32 @@
 import logging
-from typing import Dict
+from time import perf_counter
+from typing import Callable, Dict, Generator
 
 from monopoly_deal.cards import *
 from monopoly_deal.agents import RandomAgent, Agent
 from monopoly_deal.actions import *
+from monopoly_deal.equivalence import collapse_actions
 from monopoly_deal.game import *
+from monopoly_deal.instrumentation import (
+    ACTION_GENERATION, DECISIONS, DISCARD_GENERATION, EXECUTE_ACTIONS, RESPONSE_GENERATION, TRANSITIONS, metrics
+)
 
 NUM_CARDS_TO_DRAW_IN_HAND = 5
 
+# Positions in a turn, kept in `game.state` so that a game handed back to `step` says where to resume
+STATE_DRAW = 0
+STATE_PLAY = 1
+STATE_CHOOSE_PLAY = 1.5
+STATE_RESPOND = 2
+STATE_CHOOSE_RESPONSE = 2.5
+STATE_DISCARD = 3
+STATE_CHOOSE_DISCARD = 3.5
+_STATE_END_TURN = 4  # Only ever held by the driver
+DECISION_STATES = (STATE_CHOOSE_PLAY, STATE_CHOOSE_RESPONSE, STATE_CHOOSE_DISCARD)
+
+# The player to decide, the game, the chain being resolved, what they can choose from and whether the game is over
+Decision = Tuple[Player, Game, Tuple, Dict, bool]
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -25,17 +44,19 @@ def is_rejected(actions: List[Tuple[Player, Card, Action]]):
     return reject == 1
 
 
-def execute_actions(game: Game, actions: List[Tuple[Player, Card, Action]], debug=False):
+def execute_actions(game: Game, actions: List[Tuple[Player, Card, Action]], debug=False,
+                    shuffle: Callable[[List[int]], None] = None):
+    start = perf_counter() if metrics.enabled else None
     # Check if whole thing is moot
     if is_rejected(actions=actions):
         for player, card, action in actions:
-            logger.info(f'{player.index}: played {card} but was rejected')
+            logger.info('%s: played %s but was rejected', player.index, card)
             is_response = player != game.current_player()
             game = game.play_action_card(card=card, player=player, is_response=is_response)
     else:
         # Otherwise play them out
         for player, card, action in actions:
-            logger.debug(f'{player.index} ({game.cards_played}): played {card} to drive {action}')
+            logger.debug('%s (%s): played %s to drive %s', player.index, game.cards_played, card, action)
             if isinstance(action, Pay):
                 game = game.charge_player(
                     cash_cards=action.cash_cards,
@@ -77,7 +98,7 @@ def execute_actions(game: Game, actions: List[Tuple[Player, Card, Action]], debu
                 elif isinstance(action, ChangeColor):
                     pass
                 elif isinstance(action, Draw):
-                    game = game.draw_cards(num_to_draw=action.num_to_draw, as_move=True)
+                    game = game.draw_cards(num_to_draw=action.num_to_draw, as_move=True, shuffle=shuffle)
                 elif isinstance(action, SayNo):
                     is_response = player != game.current_player()
                     game = game.play_action_card(card=card, player=player, is_response=is_response)
@@ -89,12 +110,14 @@ def execute_actions(game: Game, actions: List[Tuple[Player, Card, Action]], debu
                     for card in action.discard_cards:
                         game = game.discard_card(card=card)
 
+    if start is not None:
+        metrics.add_time(EXECUTE_ACTIONS, perf_counter() - start)
     return game
 
 
-def new_game(num_players: int):
+def new_game(num_players: int, shuffle: Callable[[List[int]], None] = None):
     game_deck = list(deck.keys())
-    random.shuffle(game_deck)
+    (shuffle or random.shuffle)(game_deck)
 
     players = []
     for index in range(num_players):
@@ -113,78 +136,154 @@ def new_game(num_players: int):
     return game
 
 
-def get_available_actions_for_player(player: Player, game: Game):
+# Shared by every game in the process; entries are checked against the objects they were generated from
+action_cache = ActionCache()
+
+
+def get_available_actions_for_player(player: Player, game: Game, cache: ActionCache = None):
+    start = perf_counter() if metrics.enabled else None
+    cache = action_cache if cache is None else cache
     card_actions = {}
-    for card in player.hand.cards_in_hand:
-        available_actions = get_available_actions(card=card, players=game.players, current_player=player)
+    # Cards of the same kind offer the same choices, so only the first of each kind is considered
+    for card in distinct_cards(player.hand.cards_in_hand):
+        available_actions = cache.get_available_actions(card=card, players=game.players, current_player=player)
         if available_actions:
             card_actions[card] = available_actions
     card_actions[None] = [EndTurn()]
+    if start is not None:
+        metrics.add_time(ACTION_GENERATION, perf_counter() - start)
     return card_actions
 
 
-def step(game: Game, card_to_play: Card, action: Action, actions: Tuple = None, debug=False):
-    # Maintain a list of valid plays in `actions`
-    # Each element is a tuple of
+def drive(game: Game, actions: Tuple = (), choice: Tuple[Card, Action] = None, debug=False,
+          shuffle: Callable[[List[int]], None] = None) -> Generator[Decision, Tuple[Card, Action], Decision]:
+    """Play `game` from its `state` as a coroutine that stops at every decision.
+
+    Each decision is yielded as `(player, game, actions, available_actions, is_over)`, with `game.state` saying
+    which kind of decision it is, and play resumes exactly where it stopped with the `(card, action)` sent back. A
+    game already waiting on a decision (states 1.5, 2.5 and 3.5) starts from its `choice`. Once the game is won or
+    the deck runs out the generator returns `(winner, game, None, None, True)`.
+    """
+    # `shuffle` orders the deck whenever it is rebuilt from the discard pile, `random.shuffle` by default
+    # `actions` is the chain being played out, each element a tuple of
     # 1. Player
     # 2. Set of cards to play (will only be one unless it's a payment)
     # 3. Action to be executed
-    while not game.winner():
-        current_player = game.current_player()
-        if game.state == 0:
-            logger.debug(f"{current_player.index} Draw cards")
-            game = game.draw_cards(num_to_draw=2)
-            game = game.set_state(1)
-        if 1 <= game.state < 3:
-            while game.cards_played < MAX_PLAYS_PER_TURN and current_player.index == game.current_player().index:
+    if game.winner():
+        return game.winner(), game, None, None, True
+    state = game.state
+    available_actions = None
+    while True:
+        if metrics.enabled:
+            metrics.count(TRANSITIONS)
+        if state == STATE_DRAW:
+            logger.debug("%s Draw cards", game.current_player().index)
+            game = game.draw_cards(num_to_draw=2, shuffle=shuffle)
+            state = STATE_PLAY
+        elif state == STATE_PLAY:
+            if game.cards_played >= MAX_PLAYS_PER_TURN:
+                state = STATE_DISCARD
+            else:
                 current_player = game.current_player()
-                if game.state == 1:
-                    logger.debug(f"{current_player.index} Get actions")
-                    available_actions = get_available_actions_for_player(player=current_player, game=game)
-                    return current_player, game.set_state(1.5), tuple(), available_actions, game.winner() is not None
-                if game.state == 1.5:
-                    logger.debug(f"{current_player.index} Take action {action}")
-                    if isinstance(action, EndTurn):
-                        logger.debug(f"{current_player.index} End turn")
-                        break
-                    actions = append_tuple(tup=actions, new_element=(current_player, card_to_play, action))
-                    game = game.set_state(2)
-                if 2 <= game.state < 3:
-                    last_action = actions[-1][2]  # Get most recent action
-                    while last_action.respondable:
-                        player = last_action.target_player
-                        if game.state == 2:
-                            logger.debug(f"{player.index} Get response to {last_action}")
-                            available_responses = get_available_responses(player=player, actions=actions)
-                            return player, game.set_state(2.5), actions, available_responses, game.winner() is not None
-                        if game.state == 2.5:
-                            actions = append_tuple(tup=actions, new_element=(player, card_to_play, action))
-                            logger.debug(f"{player.index} Respond with  {action}")
-                            game = game.set_state(2)
-                            last_action = action
-                    game = execute_actions(game, actions, debug=debug)
-                    actions = tuple()  # Reset actions
-                    game = game.set_state(1)
-                    logger.debug(f"{current_player.index} End of play")
-            game = game.set_state(3)
-        if 3 <= game.state < 4:
+                logger.debug("%s Get actions", current_player.index)
+                available_actions = get_available_actions_for_player(player=current_player, game=game)
+                state = STATE_CHOOSE_PLAY
+        elif state == STATE_CHOOSE_PLAY:
+            current_player = game.current_player()
+            if choice is None:
+                if metrics.enabled:
+                    metrics.count(DECISIONS)
+                choice = yield (current_player, game.set_state(STATE_CHOOSE_PLAY), tuple(), available_actions,
+                                game.winner() is not None)
+            (card_to_play, action), choice = choice, None
+            logger.debug("%s Take action %s", current_player.index, action)
+            if isinstance(action, EndTurn):
+                logger.debug("%s End turn", current_player.index)
+                state = STATE_DISCARD
+            else:
+                actions = append_tuple(tup=actions, new_element=(current_player, card_to_play, action))
+                state = STATE_RESPOND
+        elif state == STATE_RESPOND:
+            last_action = actions[-1][2]  # Get most recent action
+            if last_action.respondable:
+                player = last_action.target_player
+                logger.debug("%s Get response to %s", player.index, last_action)
+                start = perf_counter() if metrics.enabled else None
+                available_actions = collapse_actions(
+                    player=player,
+                    available_actions=get_available_responses(player=player, actions=actions)
+                )
+                if start is not None:
+                    metrics.add_time(RESPONSE_GENERATION, perf_counter() - start)
+                state = STATE_CHOOSE_RESPONSE
+            else:
+                game = execute_actions(game, actions, debug=debug, shuffle=shuffle)
+                actions = tuple()  # Reset actions
+                logger.debug("%s End of play", game.current_player().index)
+                state = STATE_PLAY
+        elif state == STATE_CHOOSE_RESPONSE:
+            player = actions[-1][2].target_player
+            if choice is None:
+                if metrics.enabled:
+                    metrics.count(DECISIONS)
+                choice = yield player, game.set_state(STATE_CHOOSE_RESPONSE), actions, available_actions, \
+                    game.winner() is not None
+            (card_to_play, action), choice = choice, None
+            actions = append_tuple(tup=actions, new_element=(player, card_to_play, action))
+            logger.debug("%s Respond with %s", player.index, action)
+            state = STATE_RESPOND
+        elif state == STATE_DISCARD:
             # Force a discard if player has too many cards left
             current_player = game.current_player()
             if len(current_player.hand.cards_in_hand) > MAX_CARDS_IN_HAND:
-                if game.state == 3:
-                    logger.debug(f"{current_player.index} Must discard")
-                    discard_options = get_discard_options(player=current_player)
-                    return current_player, game.set_state(3.5), tuple(), discard_options, game.winner() is not None
-                if game.state == 3.5:
-                    actions = ((current_player, None, action),)
-                    logger.debug(f"{current_player.index} Discards {action}")
-                    game = execute_actions(game, actions, debug=debug)
-
+                logger.debug("%s Must discard", current_player.index)
+                start = perf_counter() if metrics.enabled else None
+                available_actions = get_discard_options(player=current_player)
+                if start is not None:
+                    metrics.add_time(DISCARD_GENERATION, perf_counter() - start)
+                state = STATE_CHOOSE_DISCARD
+            else:
+                state = _STATE_END_TURN
+        elif state == STATE_CHOOSE_DISCARD:
+            current_player = game.current_player()
+            if choice is None:
+                if metrics.enabled:
+                    metrics.count(DECISIONS)
+                choice = yield (current_player, game.set_state(STATE_CHOOSE_DISCARD), tuple(), available_actions,
+                                game.winner() is not None)
+            (card_to_play, action), choice = choice, None
+            logger.debug("%s Discards %s", current_player.index, action)
+            game = execute_actions(game, ((current_player, None, action),), debug=debug, shuffle=shuffle)
+            state = _STATE_END_TURN
+        else:
+            logger.debug("%s Ends turn", game.current_player().index)
             game = game.end_turn()
-            logger.debug(f"{current_player.index} Ends turn")
             actions = tuple()  # Reset actions in case there were discards
-            game = game.set_state(0)
+            state = STATE_DRAW
             if len(game.game_deck) == 0:
                 logger.warning("Out of cards")
                 break
+            if game.winner():
+                break
+    game = game.set_state(STATE_DRAW)
     return game.winner(), game, None, None, True
+
+
+def advance(driver: Generator[Decision, Tuple[Card, Action], Decision],
+            choice: Tuple[Card, Action] = None) -> Decision:
+    """Start `driver`, or resume it with `choice`, returning the next decision or the result once it is over"""
+    try:
+        return next(driver) if choice is None else driver.send(choice)
+    except StopIteration as stop:
+        return stop.value
+
+
+def step(game: Game, card_to_play: Card, action: Action, actions: Tuple = None, debug=False,
+         shuffle: Callable[[List[int]], None] = None) -> Decision:
+    """Take `card_to_play` and `action` for the decision `game` is waiting on and play on to the next decision.
+
+    Stateless, so any position can be stepped from again (as search does); a game played straight through is
+    quicker with `drive`.
+    """
+    choice = (card_to_play, action) if game.state in DECISION_STATES else None
+    return advance(drive(game=game, actions=actions or tuple(), choice=choice, debug=debug, shuffle=shuffle))
@@ -0,0 +1,287 @@
+import glob
+import mmap
+import os
+import random
+
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from monopoly_deal.actions import (
+    Action, Charge, Discard, Draw, EndTurn, NoResponse, Pay, PlayAsCash, PlayProperty, SayNo, StealCard, StealSet,
+    Swap
+)
+from monopoly_deal.cards import Card, Color, deck
+from monopoly_deal.game import Game
+from monopoly_deal.play import advance, drive, new_game
+
+# A record file is MAGIC and VERSION followed by records of
+#   1 byte: opcode << PLAYER_BITS | player
+#   1 byte: payload length
+#   payload: for decisions the index of the card played (0 for none) then the operands, all single bytes
+# A game is GAME_START, then the shuffled deck and decisions in the order they happened (decks shuffled again from
+# the discard pile follow the decision that drew them), then GAME_END.
+MAGIC = b'MDGR'
+VERSION = 1
+PLAYER_BITS = 3
+PLAYER_MASK = (1 << PLAYER_BITS) - 1
+NO_WINNER = 255
+
+GAME_START = 1  # Payload: number of players
+SHUFFLE = 2  # Payload: card indices in the order they were shuffled into
+GAME_END = 3  # Payload: winning player or NO_WINNER
+
+# Decisions, by the action taken
+END_TURN = 8
+NO_RESPONSE = 9
+PLAY_AS_CASH = 10
+PLAY_PROPERTY = 11  # Color
+CHARGE = 12  # Target player, amount
+STEAL_CARD = 13  # Target player, card to steal
+STEAL_SET = 14  # Target player, position of the set on their board
+SWAP = 15  # Target player, card to steal, card to give
+PAY = 16  # Target player, number of cash cards, cash cards, property cards
+DISCARD = 17  # Cards
+DRAW = 18  # Number of cards
+SAY_NO = 19  # Target player
+
+COLORS = tuple(Color)
+COLOR_IDS = {color: i for i, color in enumerate(COLORS)}
+
+
+class Record:
+    def __init__(self, opcode: int, player: int, payload: bytes, offset: int = None):
+        self.opcode = opcode
+        self.player = player
+        self.payload = payload
+        self.offset = offset  # Position in the file, if read from one
+
+    @property
+    def is_decision(self) -> bool:
+        return self.opcode >= END_TURN
+
+    @property
+    def card(self) -> Optional[Card]:
+        return deck[self.payload[0]] if self.payload[0] else None
+
+    @property
+    def operands(self) -> bytes:
+        return self.payload[1:]
+
+    def __repr__(self):
+        return f'<Record {self.opcode} by {self.player}: {tuple(self.payload)}>'
+
+
+def encode_decision(card: Optional[Card], action: Action) -> Tuple[int, bytes]:
+    """Opcode and operands of a decision, the `card_to_play` and `action` handed to `play.step`"""
+    if isinstance(action, EndTurn):
+        return END_TURN, b''
+    if isinstance(action, NoResponse):
+        return NO_RESPONSE, b''
+    if isinstance(action, PlayAsCash):
+        return PLAY_AS_CASH, b''
+    if isinstance(action, PlayProperty):
+        return PLAY_PROPERTY, bytes((COLOR_IDS[action.color],))
+    if isinstance(action, Charge):
+        return CHARGE, bytes((action.target_player.index, action.amount))
+    if isinstance(action, StealCard):
+        return STEAL_CARD, bytes((action.target_player.index, action.steal_card.index))
+    if isinstance(action, StealSet):
+        position = action.target_player.board.property_sets.index(action.steal_set)
+        return STEAL_SET, bytes((action.target_player.index, position))
+    if isinstance(action, Swap):
+        return SWAP, bytes((action.target_player.index, action.steal_card.index, action.give_card.index))
+    if isinstance(action, Pay):
+        cards = action.cash_cards + action.property_cards
+        return PAY, bytes((action.target_player.index, len(action.cash_cards)) + tuple(card.index for card in cards))
+    if isinstance(action, Discard):
+        return DISCARD, bytes(card.index for card in action.discard_cards)
+    if isinstance(action, Draw):
+        return DRAW, bytes((action.num_to_draw,))
+    if isinstance(action, SayNo):
+        return SAY_NO, bytes((action.target_player.index,))
+    raise ValueError(f"Cannot record {action}")
+
+
+def decode_decision(record: Record, game: Game) -> Tuple[Optional[Card], Action]:
+    """The `card_to_play` and `action` a decision record stands for, in the game it was taken in"""
+    card, operands, opcode = record.card, record.operands, record.opcode
+    if opcode == END_TURN:
+        return card, EndTurn()
+    if opcode == NO_RESPONSE:
+        return card, NoResponse()
+    if opcode == PLAY_AS_CASH:
+        return card, PlayAsCash(cash_card=card)
+    if opcode == PLAY_PROPERTY:
+        return card, PlayProperty(property_card=card, color=COLORS[operands[0]])
+    if opcode == CHARGE:
+        return card, Charge(charge_player=game.players[operands[0]], amount=operands[1])
+    if opcode == STEAL_CARD:
+        return card, StealCard(steal_from_player=game.players[operands[0]], steal_card=deck[operands[1]])
+    if opcode == STEAL_SET:
+        target = game.players[operands[0]]
+        return card, StealSet(steal_from_player=target, steal_set=target.board.property_sets[operands[1]])
+    if opcode == SWAP:
+        return card, Swap(
+            steal_from_player=game.players[operands[0]],
+            steal_card=deck[operands[1]],
+            give_card=deck[operands[2]]
+        )
+    if opcode == PAY:
+        num_cash = operands[1]
+        cards = tuple(deck[index] for index in operands[2:])
+        return card, Pay(pay_to_player=game.players[operands[0]], cash_cards=cards[:num_cash],
+                         property_cards=cards[num_cash:])
+    if opcode == DISCARD:
+        return card, Discard(discard_cards=tuple(deck[index] for index in operands))
+    if opcode == DRAW:
+        return card, Draw(num_to_draw=operands[0])
+    if opcode == SAY_NO:
+        return card, SayNo(to_player=game.players[operands[0]])
+    raise ValueError(f"Unknown opcode {opcode}")
+
+
+class RecordWriter:
+    """Appends game records to a file as they are played.
+
+    Start each game with `start_game`, create it with `new_game(shuffle=writer.shuffle)` and pass the same shuffle to
+    `play.drive` (or `play.step`) so every deck order is kept, `record` each decision before stepping with it, and `end_game` after.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC + bytes((VERSION,)))
+
+    def start_game(self, num_players: int):
+        self._write(GAME_START, 0, bytes((num_players,)))
+
+    def shuffle(self, cards: List[int]):
+        random.shuffle(cards)
+        self._write(SHUFFLE, 0, bytes(cards))
+
+    def record(self, player_index: int, card: Optional[Card], action: Action):
+        opcode, operands = encode_decision(card=card, action=action)
+        self._write(opcode, player_index, bytes((0 if card is None else card.index,)) + operands)
+
+    def end_game(self, winner: Optional[int]):
+        self._write(GAME_END, 0, bytes((NO_WINNER if winner is None else winner,)))
+
+    def _write(self, opcode: int, player: int, payload: bytes):
+        assert player <= PLAYER_MASK and len(payload) < 256, "Record does not fit the format"
+        self.file.write(bytes((opcode << PLAYER_BITS | player, len(payload))) + payload)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecord:
+    def __init__(self, num_players: int, records: List[Record], winner: Optional[int], offset: int = None):
+        self.num_players = num_players
+        self.records = records  # Shuffles and decisions, in order
+        self.winner = winner
+        self.offset = offset
+
+    @property
+    def decisions(self) -> List[Record]:
+        return [record for record in self.records if record.is_decision]
+
+    @property
+    def shuffles(self) -> List[List[int]]:
+        return [list(record.payload) for record in self.records if record.opcode == SHUFFLE]
+
+    def __repr__(self):
+        return f'<GameRecord of {self.num_players} players: {len(self.decisions)} decisions, winner {self.winner}>'
+
+
+class RecordReader:
+    """Reads a record file through a memory map, parsing records only as they are iterated"""
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            self.map = b''
+        if len(self.map) and self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+
+    def __iter__(self) -> Iterator[Record]:
+        data = self.map
+        offset = len(MAGIC) + 1
+        while offset + 2 <= len(data):
+            header, length = data[offset], data[offset + 1]
+            yield Record(
+                opcode=header >> PLAYER_BITS,
+                player=header & PLAYER_MASK,
+                payload=data[offset + 2:offset + 2 + length],
+                offset=offset
+            )
+            offset += 2 + length
+
+    def games(self) -> Iterator[GameRecord]:
+        """Complete games in the file; a game cut short by a crash is skipped"""
+        records, num_players, start = None, None, None
+        for record in self:
+            if record.opcode == GAME_START:
+                records, num_players, start = [], record.payload[0], record.offset
+            elif record.opcode == GAME_END:
+                if records is not None:
+                    winner = None if record.payload[0] == NO_WINNER else record.payload[0]
+                    yield GameRecord(num_players=num_players, records=records, winner=winner, offset=start)
+                records = None
+            elif records is not None:
+                records.append(record)
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_directory(directory: str) -> Iterator[GameRecord]:
+    """Complete games in every record file of a directory, such as a recorded tournament run"""
+    for path in sorted(glob.glob(os.path.join(directory, '*.mdgr'))):
+        with RecordReader(path) as reader:
+            yield from reader.games()
+
+
+def replay_steps(game_record: GameRecord) -> Iterator[Tuple]:
+    """Replay a recorded game, yielding what `play.step` returns at its start and after every decision"""
+    orders = deque(game_record.shuffles)
+
+    def shuffle(cards: List[int]):
+        order = orders.popleft()
+        assert sorted(order) == sorted(cards), "Recorded deck does not match the cards being shuffled"
+        cards[:] = order
+
+    driver = drive(game=new_game(game_record.num_players, shuffle=shuffle), shuffle=shuffle)
+    result = advance(driver)
+    yield result
+    for record in game_record.decisions:
+        player, game, actions, available_actions, is_over = result
+        card, action = decode_decision(record=record, game=game)
+        result = advance(driver, (card, action))
+        yield result
+
+
+def replay(game_record: GameRecord, num_decisions: int = None) -> Game:
+    """The game as it was after `num_decisions` decisions, or at the end"""
+    for i, (player, game, actions, available_actions, is_over) in enumerate(replay_steps(game_record)):
+        if i == num_decisions:
+            break
+    return game
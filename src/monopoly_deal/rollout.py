@@ -0,0 +1,193 @@
+import random
+
+from typing import List, Optional, Sequence, Tuple
+
+from monopoly_deal.actions import MAX_CARDS_IN_HAND
+from monopoly_deal.cards import CARD_BUILDABLE, CARD_COLOR_MASKS, CARD_TYPES, CARD_VALUES, TYPE_PROPERTY
+from monopoly_deal.compact import DECK, SET_SIZES, cash_location, hand_location, set_location
+from monopoly_deal.game import MAX_PLAYS_PER_TURN
+from monopoly_deal.mutable import (
+    CASH, CHARGE, DISCARD_CARDS, DRAW, END_TURN, NO_CARD, NO_RESPONSE, PAY, PROPERTY, RESPONDABLE, SAY_NO, STEAL_CARD,
+    STEAL_SET, SWAP, Move, MutableGame, Play, convert_actions
+)
+from monopoly_deal.play import STATE_CHOOSE_DISCARD, STATE_CHOOSE_RESPONSE
+
+NO_PROPERTY_MOVED = frozenset((CASH, DRAW))  # Plays that cannot complete a set, so cannot win
+
+
+def board_cards(game: MutableGame, player: int) -> List[int]:
+    """The player's cash and then the cards of each property set, in order"""
+    by_location = game.by_location
+    return [card for location in range(cash_location(player), set_location(player, game.num_sets(player)))
+            for card in by_location[location]]
+
+
+class RolloutPolicy:
+    """How `play_out` picks moves: uniformly at random, sampling one legal move at a time.
+
+    Nothing is listed that is not needed: a play is a random card and then a random move for it, a payment is random
+    board cards until the bill is covered, and a discard is a random choice of cards. Subclass and override any of
+    the `choose_*` methods (or `evaluate`, for games cut short) to plug in heuristics.
+    """
+    def choose_play(self, game: MutableGame, rng: random.Random) -> Optional[Move]:
+        """A move for the current player, or None to end the turn"""
+        return game.sample_play(rng)
+
+    def should_say_no(self, game: MutableGame, player: int, move: Move, rng: random.Random) -> bool:
+        return rng.random() < 0.5
+
+    def choose_payment(self, game: MutableGame, player: int, amount: int, rng: random.Random) -> List[int]:
+        """Cards worth at least `amount` from a board that is worth more than that"""
+        cards = [card for card in board_cards(game, player) if CARD_VALUES[card]]
+        rng.shuffle(cards)
+        return settle(cards, amount)
+
+    def choose_discard(self, game: MutableGame, player: int, num_to_discard: int, rng: random.Random) -> List[int]:
+        return rng.sample(game.by_location[hand_location(player)], num_to_discard)
+
+    def evaluate(self, game: MutableGame, player: int) -> float:
+        """Reward for `player` in a game stopped before anyone won"""
+        return 0
+
+    def choose_response(self, game: MutableGame, actions: Sequence[Play], rng: random.Random) -> Play:
+        """How the target of the last play in `actions` answers it"""
+        opponent, move = actions[-1]
+        player = move[2]
+        say_no = game.find_say_no(player, actions)
+        if say_no != NO_CARD and self.should_say_no(game, player, move, rng):
+            return player, (SAY_NO, say_no, opponent, 0, 0)
+        if move[0] == CHARGE:
+            amount = move[3]
+            if amount >= game.total_value(player):
+                # Wiped out, so everything goes
+                cards = board_cards(game, player)
+            else:
+                cards = self.choose_payment(game, player, amount, rng)
+            cash = game.by_location[cash_location(player)]
+            return player, (PAY, NO_CARD, opponent, tuple(card for card in cards if card in cash),
+                            tuple(card for card in cards if card not in cash))
+        return player, (NO_RESPONSE, NO_CARD, opponent, 0, 0)
+
+
+def settle(cards: Sequence[int], amount: int) -> List[int]:
+    """Take `cards` in order until they cover `amount`, then hand back the biggest that are not needed"""
+    payment, total = [], 0
+    for card in cards:
+        payment.append(card)
+        total += CARD_VALUES[card]
+        if total >= amount:
+            break
+    for card in sorted(payment, key=CARD_VALUES.__getitem__, reverse=True):
+        if total - CARD_VALUES[card] >= amount:
+            payment.remove(card)
+            total -= CARD_VALUES[card]
+    return payment
+
+
+class HeuristicRolloutPolicy(RolloutPolicy):
+    """Random play nudged towards what people do: complete a set when a card in hand can, rarely end the turn with
+    plays left, pay with cash before loose properties before complete sets, always say no to steals and big charges,
+    and discard the cheapest cards"""
+    def __init__(self, end_turn_probability: float = 0.1):
+        self.end_turn_probability = end_turn_probability
+
+    def choose_play(self, game: MutableGame, rng: random.Random) -> Optional[Move]:
+        player = game.current_turn_index
+        sets = [(code, game.num_built(player, slot)) for slot, code in game.set_slots(player)]
+        for card in game.by_location[hand_location(player)]:
+            if CARD_TYPES[card] == TYPE_PROPERTY and CARD_BUILDABLE[card]:
+                mask = CARD_COLOR_MASKS[card]
+                for code, num_built in sets:
+                    if (1 << (code - 1)) & mask and num_built + 1 == SET_SIZES[code]:
+                        return PROPERTY, card, player, code, 0
+        return game.sample_play(rng, can_end_turn=rng.random() < self.end_turn_probability)
+
+    def should_say_no(self, game: MutableGame, player: int, move: Move, rng: random.Random) -> bool:
+        return move[0] in (STEAL_SET, STEAL_CARD, SWAP) or (move[0] == CHARGE and move[3] >= 5)
+
+    def choose_payment(self, game: MutableGame, player: int, amount: int, rng: random.Random) -> List[int]:
+        cash = sorted((card for card in game.by_location[cash_location(player)] if CARD_VALUES[card]),
+                      key=CARD_VALUES.__getitem__, reverse=True)
+        properties = sorted(
+            (game.is_complete(player, slot), CARD_VALUES[card], card)
+            for slot in range(game.num_sets(player)) for card in game.by_location[set_location(player, slot)]
+            if CARD_VALUES[card]
+        )
+        return settle(cash + [card for _, _, card in properties], amount)
+
+    def choose_discard(self, game: MutableGame, player: int, num_to_discard: int, rng: random.Random) -> List[int]:
+        return sorted(game.by_location[hand_location(player)], key=CARD_VALUES.__getitem__)[:num_to_discard]
+
+    def evaluate(self, game: MutableGame, player: int) -> float:
+        """Complete sets ahead of the best opponent, as a fraction of the three needed to win"""
+        sets = [game.complete_set_count(other) for other in range(game.num_players)]
+        best_opponent = max(count for other, count in enumerate(sets) if other != player)
+        return max(-1.0, min(1.0, (sets[player] - best_opponent) / 3))
+
+
+def resolve(game: MutableGame, actions: Tuple[Play, ...], policy: RolloutPolicy, rng: random.Random):
+    """Collect responses until the chain `actions` is settled, then carry it out"""
+    while actions[-1][1][0] in RESPONDABLE:
+        actions += (policy.choose_response(game, actions, rng),)
+    game.apply(actions, shuffle=rng.shuffle)
+
+
+def play_out(game: MutableGame, policy: RolloutPolicy, rng: random.Random = random,
+             actions: Tuple[Play, ...] = (), discarding: bool = False, max_turns: int = None) -> MutableGame:
+    """Play on in place from a play decision (or a pending chain of `actions`, or a discard when `discarding`) the
+    way `play.drive` would, until someone wins, the deck runs out or `max_turns` turns have ended. Every chain goes
+    through `game.apply`, so undoing a `game.checkpoint()` taken first takes the whole rollout back."""
+    if actions:
+        resolve(game, actions, policy, rng)
+    if game.winner() is not None:
+        return game
+    turns = 0
+    while True:
+        if not discarding:
+            while game.cards_played < MAX_PLAYS_PER_TURN:
+                move = policy.choose_play(game, rng)
+                if move is None:
+                    break
+                resolve(game, ((game.current_turn_index, move),), policy, rng)
+                # Only plays that move property can decide the game
+                if move[0] not in NO_PROPERTY_MOVED and game.winner() is not None:
+                    return game
+        discarding = False
+        player = game.current_turn_index
+        num_to_discard = len(game.by_location[hand_location(player)]) - MAX_CARDS_IN_HAND
+        if num_to_discard > 0:
+            discarded = policy.choose_discard(game, player, num_to_discard, rng)
+            game.apply(((player, (DISCARD_CARDS, NO_CARD, player, tuple(discarded), 0)),))
+        turns += 1
+        if not game.by_location[DECK] or (max_turns is not None and turns >= max_turns):
+            break
+        game.apply(((player, (END_TURN, NO_CARD, player, 0, 0)),), shuffle=rng.shuffle)
+    return game
+
+
+class FastRollout:
+    """MCTS rollout policy that plays the position out on a `MutableGame` with moves from `policy`, returning the
+    reward for the searching player. `max_turns` cuts games short, scored by `policy.evaluate`."""
+    def __init__(self, policy: RolloutPolicy = None, max_turns: int = None, rng: random.Random = None):
+        self.policy = RolloutPolicy() if policy is None else policy
+        self.max_turns = max_turns
+        self.rng = rng  # The `random` module's own generator by default
+
+    def __call__(self, state) -> float:
+        rng = random if self.rng is None else self.rng
+        while state.partial is not None and not state.isTerminal():
+            # Half way through a Forced Deal, so finish choosing it the usual way
+            state = state.takeAction(rng.choice(state.getPossibleActions()))
+        if state.isTerminal():
+            return state.getReward()
+        game = state.game
+        actions = convert_actions(game, state.actions) if game.state == STATE_CHOOSE_RESPONSE else ()
+        rollout = play_out(MutableGame.from_game(game), self.policy, rng=rng, actions=actions,
+                           discarding=game.state == STATE_CHOOSE_DISCARD, max_turns=self.max_turns)
+        winner = rollout.winner()
+        if winner is None:
+            return self.policy.evaluate(rollout, state.ai_player.index)
+        return 1 if winner == state.ai_player.index else -1
+
+
+fast_rollout = FastRollout()
@@ -1,27 +1,26 @@
-from monopoly_deal.agents import RandomAgent
-from monopoly_deal.mcts import MCTSAgent
-from monopoly_deal.play import new_game, step
+import argparse
 
+from functools import partial
 
-def sim_new_game(mcts_time_limit: int):
-    game = new_game(2)
-    agents = {player.index: RandomAgent() for player in game.players}
-    agents[0] = MCTSAgent(player=game.players[0], time_limit=mcts_time_limit)
+from monopoly_deal.agents import RandomAgent
+from monopoly_deal.mcts import MCTSAgent
+from monopoly_deal.tournament import run_tournament
 
-    # Play game
-    player, game, actions, available_actions, is_over = step(game=game, actions=tuple(), card_to_play=None, action=None)
-    while not is_over:
-        card_to_play, action = agents[player.index].get_action(game=game, actions=actions, available_actions=available_actions)
-        player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card_to_play, action=action, debug=False)
-    return game
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play MCTS against a random agent at growing time limits")
+    parser.add_argument('--search-workers', type=int, default=1,
+                        help="Processes each MCTS search runs in; above 1 the games are played one at a time")
+    args = parser.parse_args()
 
-# Prove that MCTS is working
-for time_limit in [10, 50, 100, 500]:
-    print(f"Time limit {time_limit}ms for MCTS Agent.")
-    wins = 0
-    for _ in range(10):
-       game = sim_new_game(mcts_time_limit=time_limit)
-       if game.winner().index == 0:
-           wins += 1
-    print(f'MCTS Agent won {wins} times')
+    # Prove that MCTS is working
+    for time_limit in [10, 50, 100, 500]:
+        print(f"Time limit {time_limit}ms for MCTS Agent.")
+        summary = run_tournament(
+            lineup=[partial(MCTSAgent, time_limit=time_limit, workers=args.search_workers), RandomAgent],
+            num_games=10,
+            # Searching in parallel starts processes, which tournament pool workers cannot
+            workers=1 if args.search_workers > 1 else None,
+            names=[f'MCTS {time_limit}ms', 'Random']
+        )
+        print(summary.report())
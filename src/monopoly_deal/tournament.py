@@ -0,0 +1,258 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from monopoly_deal.agents import Agent, RandomAgent
+from monopoly_deal.instrumentation import enable, metrics
+from monopoly_deal.mcts import MCTSAgent, SearchProfile
+from monopoly_deal.play import advance, drive, new_game
+from monopoly_deal.records import RecordWriter
+
+# Builds the agent for a seat; must be picklable (a class or a functools.partial of one) to cross into workers
+AgentFactory = Callable[..., Agent]
+
+
+class GameResult:
+    def __init__(self, game_index: int, seed: int, seats: Tuple[int, ...], winner: Optional[int], moves: int,
+                 seconds: float):
+        self.game_index = game_index
+        self.seed = seed
+        self.seats = seats  # Line-up position of the agent in each seat
+        self.winner = winner  # Line-up position of the winning agent, None if the deck ran out
+        self.moves = moves
+        self.seconds = seconds
+        self.metrics = None  # Summary of the game's instrumentation, when it is enabled
+        self.search_profiles: Dict[int, SearchProfile] = {}  # By line-up position, for agents that search
+
+    def __repr__(self):
+        return f'<GameResult {self.game_index}: winner {self.winner} in {self.moves} moves>'
+
+
+class TournamentSummary:
+    def __init__(self, names: Sequence[str], results: List[GameResult], seconds: float):
+        self.names = list(names)
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def games(self) -> int:
+        return len(self.results)
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def wins(self, position: int) -> int:
+        return sum(1 for result in self.results if result.winner == position)
+
+    def draws(self) -> int:
+        return sum(1 for result in self.results if result.winner is None)
+
+    def win_rate(self, position: int) -> float:
+        return self.wins(position) / self.games if self.games else 0.0
+
+    def confidence_interval(self, position: int, z: float = 1.96) -> Tuple[float, float]:
+        return wilson_interval(wins=self.wins(position), games=self.games, z=z)
+
+    def search_profile(self, position: int) -> Optional[SearchProfile]:
+        """Every search made by the agent at line-up `position` over the tournament, None if it never searched"""
+        profiles = [result.search_profiles[position] for result in self.results if position in result.search_profiles]
+        return SearchProfile.combine(profiles) if profiles else None
+
+    def report(self) -> str:
+        lines = [f'{self.games} games in {self.seconds:.1f}s ({self.games_per_second:.2f} games/sec)']
+        for position, name in enumerate(self.names):
+            low, high = self.confidence_interval(position)
+            lines.append(
+                f'{position}: {name:<16} won {self.wins(position):>5} '
+                f'({self.win_rate(position):6.1%}, 95% CI {low:6.1%} - {high:6.1%})'
+            )
+        for position, name in enumerate(self.names):
+            profile = self.search_profile(position)
+            if profile is not None:
+                lines.append(f'{position}: {name:<16} {profile.report()}')
+        if self.draws():
+            lines.append(f'Ran out of cards {self.draws()} times')
+        return '\n'.join(lines)
+
+
+def wilson_interval(wins: int, games: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a win rate, which stays sensible for few games and rates near 0 or 1"""
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    centre = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def play_game(lineup: Sequence[AgentFactory], game_index: int, seed: int, rotation: int = 0,
+              writer: RecordWriter = None) -> GameResult:
+    """Play one seeded game with line-up position (seat + rotation) % len(lineup) in each seat, recording it with
+    `writer` if given"""
+    start = time.time()
+    # Set aside anything counted before the game, so the result carries only this game's metrics
+    earlier = metrics.collect() if metrics.enabled else None
+    random.seed(seed)
+    shuffle = None
+    if writer is not None:
+        writer.start_game(len(lineup))
+        shuffle = writer.shuffle
+    game = new_game(len(lineup), shuffle=shuffle)
+    seats = tuple((seat + rotation) % len(lineup) for seat in range(len(lineup)))
+    agents = {player.index: lineup[seats[player.index]](player=player) for player in game.players}
+
+    moves = 0
+    try:
+        driver = drive(game=game, shuffle=shuffle)
+        player, game, actions, available_actions, is_over = advance(driver)
+        while not is_over:
+            card_to_play, action = agents[player.index].get_action(game=game, actions=actions, available_actions=available_actions)
+            if writer is not None:
+                writer.record(player_index=player.index, card=card_to_play, action=action)
+            player, game, actions, available_actions, is_over = advance(driver, (card_to_play, action))
+            moves += 1
+    finally:
+        for agent in agents.values():
+            agent.close()
+
+    winner = game.winner()
+    if writer is not None:
+        writer.end_game(None if winner is None else winner.index)
+    result = GameResult(
+        game_index=game_index,
+        seed=seed,
+        seats=seats,
+        winner=None if winner is None else seats[winner.index],
+        moves=moves,
+        seconds=time.time() - start
+    )
+    for index, agent in agents.items():
+        if isinstance(agent, MCTSAgent):
+            result.search_profiles[seats[index]] = SearchProfile.combine(agent.profiles)
+    if earlier is not None:
+        result.metrics = metrics.collect()
+        metrics.merge(earlier)
+    return result
+
+
+def record_path(directory: str) -> str:
+    """The record file games played in this process are appended to, one per process so that none are shared"""
+    return os.path.join(directory, f'games-{os.getpid()}.mdgr')
+
+
+def _play_game_task(task):
+    lineup, game_index, seed, rotation, record_directory = task
+    if record_directory is None:
+        return play_game(lineup, game_index, seed, rotation)
+    # Opened per game, so whatever a worker has finished is on disk when the pool shuts it down
+    with RecordWriter(record_path(record_directory)) as writer:
+        return play_game(lineup, game_index, seed, rotation, writer=writer)
+
+
+def iter_tournament(lineup: Sequence[AgentFactory], num_games: int, workers: int = None, seed: int = 0,
+                    rotate_seats: bool = True, record_directory: str = None) -> Iterator[GameResult]:
+    """Yield results as games finish, fanning them out over `workers` processes (all cores by default).
+
+    Game i is seeded with `seed + i` and, with `rotate_seats`, shifts the line-up round by i seats so that every
+    agent gets its share of going first. Pool workers are daemonic, so agents must not start processes of their own.
+    With `record_directory`, every game is recorded into a file of that directory per process (see `record_path`).
+    """
+    if record_directory is not None:
+        os.makedirs(record_directory, exist_ok=True)
+    tasks = [
+        (tuple(lineup), game_index, seed + game_index, game_index % len(lineup) if rotate_seats else 0,
+         record_directory)
+        for game_index in range(num_games)
+    ]
+    if workers == 1:
+        yield from map(_play_game_task, tasks)
+        return
+    with multiprocessing.Pool(processes=workers, initializer=enable if metrics.enabled else None) as pool:
+        yield from pool.imap_unordered(_play_game_task, tasks)
+
+
+def run_tournament(lineup: Sequence[AgentFactory], num_games: int, workers: int = None, seed: int = 0,
+                   rotate_seats: bool = True, names: Sequence[str] = None,
+                   on_result: Callable[[GameResult], None] = None, record_directory: str = None) -> TournamentSummary:
+    start = time.time()
+    results = []
+    for result in iter_tournament(lineup=lineup, num_games=num_games, workers=workers, seed=seed,
+                                  rotate_seats=rotate_seats, record_directory=record_directory):
+        results.append(result)
+        if result.metrics is not None:
+            metrics.merge(result.metrics)
+        if on_result is not None:
+            on_result(result)
+    results.sort(key=lambda result: result.game_index)
+    if names is None:
+        names = [getattr(factory, '__name__', repr(factory)) for factory in lineup]
+    return TournamentSummary(names=names, results=results, seconds=time.time() - start)
+
+
+def parse_agent(spec: str) -> AgentFactory:
+    """Agent factory from a command line spec: `random` or `mcts:<ms per move>[:<search workers>]`"""
+    name, *arguments = spec.split(':')
+    if name == 'random' and not arguments:
+        return RandomAgent
+    if name == 'mcts' and len(arguments) <= 2:
+        time_limit = int(arguments[0]) if arguments and arguments[0] else 100
+        workers = int(arguments[1]) if len(arguments) > 1 else 1
+        return partial(MCTSAgent, time_limit=time_limit, workers=workers)
+    raise ValueError(f"Unknown agent {spec}")
+
+
+def search_workers(factory: AgentFactory) -> int:
+    """Processes an agent from `factory` searches with, as set by `parse_agent`"""
+    keywords = getattr(factory, 'keywords', None) or {}
+    return keywords.get('workers', 1)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Play a batch of Monopoly Deal games between agents")
+    parser.add_argument('agents', nargs='+',
+                        help="Line-up, one spec per seat: random or mcts:<ms per move>[:<search workers>]")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes to play games in (default: all cores, or 1 if an agent searches in parallel)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-rotation', action='store_true', help="Keep each agent in its seat")
+    parser.add_argument('--quiet', action='store_true', help="Only print the summary")
+    parser.add_argument('--metrics', help="Write engine counters and timers for the run to this JSON file")
+    parser.add_argument('--record', metavar='DIRECTORY',
+                        help="Record every game into this directory, one record file per worker process")
+    args = parser.parse_args(argv)
+
+    lineup = [parse_agent(spec) for spec in args.agents]
+    workers = args.workers
+    if any(search_workers(factory) > 1 for factory in lineup):
+        # Parallel searches start processes of their own, which pool workers cannot
+        if workers not in (None, 1):
+            parser.error("agents that search in parallel need the games played in one process (--workers 1)")
+        workers = 1
+    if args.metrics:
+        enable()
+
+    def on_result(result: GameResult):
+        if not args.quiet:
+            winner = 'nobody' if result.winner is None else args.agents[result.winner]
+            print(f'Game {result.game_index} (seed {result.seed}): {winner} won in {result.moves} moves')
+
+    summary = run_tournament(lineup=lineup, num_games=args.games, workers=workers, seed=args.seed,
+                             rotate_seats=not args.no_rotation, names=args.agents, on_result=on_result,
+                             record_directory=args.record)
+    print(summary.report())
+    if args.metrics:
+        metrics.write_json(args.metrics)
+    return summary
+
+
+if __name__ == '__main__':
+    main()
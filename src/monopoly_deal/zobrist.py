@@ -0,0 +1,110 @@
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from monopoly_deal.cards import Card, Color, deck
+
+MASK64 = (1 << 64) - 1
+
+# Location codes, shifted above the card index in each key
+DISCARD = 1
+DECK_BASE = 2
+PLAYER_BASE = 256
+PLAYER_STRIDE = 256
+HAND = 0
+CASH = 1
+SETS = 2
+MAX_ORDINAL = 8
+
+# Keys for the scalar parts of a game live above every card location
+TURN = 1 << 40
+STATE = 2 << 40
+CARDS_PLAYED = 3 << 40
+
+SET_COLOR_CODES = {color: code for code, color in enumerate(color for color in Color if color != Color.ALL)}
+
+
+@lru_cache(maxsize=None)
+def _key(value: int) -> int:
+    """Deterministic 64-bit key for `value` (splitmix64), identical across processes"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def deck_key(card: Card, position: int) -> int:
+    """Key for a card `position` places from the bottom of the deck, so drawing from the top leaves the rest alone"""
+    return _key(((DECK_BASE + position) << 8) | card.index)
+
+
+def discard_key(card: Card) -> int:
+    return _key((DISCARD << 8) | card.index)
+
+
+def hand_key(card: Card, player_index: int) -> int:
+    return _key(((PLAYER_BASE + player_index * PLAYER_STRIDE + HAND) << 8) | card.index)
+
+
+def cash_key(card: Card, player_index: int) -> int:
+    return _key(((PLAYER_BASE + player_index * PLAYER_STRIDE + CASH) << 8) | card.index)
+
+
+def property_key(card: Card, player_index: int, color: Color, ordinal: int) -> int:
+    """Key for a card in the `ordinal`-th property set of `color` owned by a player"""
+    location = PLAYER_BASE + player_index * PLAYER_STRIDE + SETS + SET_COLOR_CODES[color] * MAX_ORDINAL
+    return _key(((location + min(ordinal, MAX_ORDINAL - 1)) << 8) | card.index)
+
+
+def turn_key(current_turn_index: int) -> int:
+    return _key(TURN | current_turn_index)
+
+
+def state_key(state: float) -> int:
+    return _key(STATE | int(state * 2))
+
+
+def cards_played_key(cards_played: int) -> int:
+    return _key(CARDS_PLAYED | cards_played)
+
+
+def deck_keys(game_deck: Tuple[int, ...]) -> int:
+    zobrist = 0
+    for i, index in enumerate(game_deck):
+        zobrist ^= deck_key(deck[index], len(game_deck) - 1 - i)
+    return zobrist
+
+
+def discard_keys(discarded_cards: Iterable[Card]) -> int:
+    zobrist = 0
+    for card in discarded_cards:
+        zobrist ^= discard_key(card)
+    return zobrist
+
+
+def property_set_keys(property_sets, player_index: int) -> int:
+    zobrist = 0
+    ordinals = {}
+    for pset in property_sets:
+        ordinal = ordinals.get(pset.color, 0)
+        ordinals[pset.color] = ordinal + 1
+        for card in pset.cards:
+            zobrist ^= property_key(card, player_index, pset.color, ordinal)
+    return zobrist
+
+
+def player_keys(player) -> int:
+    zobrist = property_set_keys(player.board.property_sets, player.index)
+    for card in player.hand.cards_in_hand:
+        zobrist ^= hand_key(card, player.index)
+    for card in player.board.cash_cards:
+        zobrist ^= cash_key(card, player.index)
+    return zobrist
+
+
+def compute_zobrist(game) -> int:
+    """Hash a `Game` from scratch; transitions keep `Game.zobrist` up to date incrementally"""
+    zobrist = turn_key(game.current_turn_index) ^ state_key(game.state) ^ cards_played_key(game.cards_played)
+    zobrist ^= deck_keys(game.game_deck) ^ discard_keys(game.discard_pile.discarded_cards)
+    for player in game.players:
+        zobrist ^= player_keys(player)
+    return zobrist
@@ -0,0 +1,51 @@
+import pickle
+import random
+
+import pytest
+
+from monopoly_deal.actions import *
+from monopoly_deal.cards import deck, Color
+from monopoly_deal.game import Board, Hand, Player
+from monopoly_deal.play import get_available_actions_for_player, new_game, step
+
+
+def test_actions_are_values():
+    player = Player(index=1, hand=Hand(cards_in_hand=()), board=Board((), ()))
+    same_seat = Player(index=1, hand=Hand(cards_in_hand=(deck[89],)), board=Board((), ()))
+
+    assert EndTurn() is EndTurn() and NoResponse() is NoResponse()
+    assert PlayAsCash(cash_card=deck[89]) is PlayAsCash(cash_card=deck[89])
+    assert PlayProperty(property_card=deck[65], color=Color.RED) is PlayProperty(deck[65], Color.RED)
+    assert PlayProperty(property_card=deck[65], color=Color.RED) != PlayProperty(deck[65], Color.GREEN)
+
+    charge = Charge(charge_player=player, amount=2)
+    assert charge == Charge(charge_player=same_seat, amount=2)
+    assert hash(charge) == hash(Charge(charge_player=same_seat, amount=2))
+    assert charge != Charge(charge_player=player, amount=5)
+    assert SayNo(to_player=player) != Charge(charge_player=player, amount=2)
+    assert len({Draw(2), Draw(2), Discard(discard_cards=(deck[89],))}) == 2
+
+    with pytest.raises(AttributeError):
+        charge.note = 'Actions have no instance dictionary'
+    assert pickle.loads(pickle.dumps(PlayAsCash(cash_card=deck[89]))) is PlayAsCash(cash_card=deck[89])
+    assert pickle.loads(pickle.dumps(charge)) == charge
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_action_cache_matches_fresh_actions(seed):
+    random.seed(seed)
+    cache = ActionCache()
+    player, game, actions, available_actions, is_over = step(game=new_game(2), actions=(), card_to_play=None,
+                                                             action=None)
+    while not is_over:
+        if not actions and game.state == 1.5:
+            cached = get_available_actions_for_player(player=player, game=game, cache=cache)
+            for card in cached:
+                if card is not None:
+                    fresh = get_available_actions(card=card, players=game.players, current_player=player)
+                    assert list(cached[card]) == list(fresh)
+        card = random.choice(list(available_actions))
+        action = random.choice(available_actions[card])
+        player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card,
+                                                                 action=action)
+    assert cache.hits > cache.misses
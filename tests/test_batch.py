@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+
+from monopoly_deal.actions import get_first_level_actions
+from monopoly_deal.agents import RandomAgent
+from monopoly_deal.batch import (
+    BatchGame, NUM_ACTIONS, OVER, choice_action_ids, first_of_kind, play_random, sample_actions, validate
+)
+from monopoly_deal.compact import NUM_CARDS
+from monopoly_deal.play import new_game, step
+
+
+@pytest.mark.parametrize('num_players', [2, 3])
+def test_batch_matches_reference_engine(num_players):
+    assert validate(num_games=4, num_players=num_players, seed=11) > 0
+
+
+def test_first_of_kind_keeps_lowest_card_of_each_kind():
+    cards = np.zeros((1, NUM_CARDS + 1), dtype=bool)
+    cards[0, [27, 28, 29, 89, 90, 95]] = True  # Three Pass Go, two $1 and a $2
+    assert np.flatnonzero(first_of_kind(cards)[0]).tolist() == [27, 89, 95]
+
+
+def test_loading_games_starts_their_turn():
+    games = [new_game(2) for _ in range(3)]
+    batch = BatchGame.from_games(games)
+    for row, game in enumerate(games):
+        loaded = batch.to_game(row)
+        player, opponent = loaded.players
+        assert len(player.hand.cards_in_hand) == len(game.players[0].hand.cards_in_hand) + 2
+        assert opponent.hand.serialize() == game.players[1].hand.serialize()
+        assert loaded.game_deck == game.game_deck[2:]
+
+
+def test_legal_actions_of_some_games():
+    batch = BatchGame.new(num_games=6, num_players=3, seed=1)
+    for _ in range(40):
+        batch.step(sample_actions(batch.legal_actions(), batch.rng))
+    rows = np.array([4, 1, 5])
+    assert (batch.legal_actions(rows) == batch.legal_actions()[rows]).all()
+
+
+def test_random_games_finish():
+    batch = play_random(num_games=50, num_players=3, seed=0)
+    assert (batch.phase == OVER).all()
+    assert ((batch.winner >= -1) & (batch.winner < 3)).all()
+
+    legal = batch.legal_actions()
+    assert legal.shape == (50, NUM_ACTIONS)
+    assert not legal.any()
+    assert (sample_actions(legal, batch.rng) == 0).all()
+
+
+def test_reference_choices_map_to_legal_action_ids():
+    random.seed(3)
+    agent = RandomAgent()
+    player, game, actions, available_actions, is_over = step(game=new_game(3), actions=tuple(), card_to_play=None,
+                                                             action=None)
+    checked = 0
+    while not is_over and checked < 500:
+        if game.state == 1.5:
+            legal = BatchGame.from_games([game]).legal_actions()[0]
+            for card, choices in available_actions.items():
+                for action in get_first_level_actions(choices):
+                    action_ids = choice_action_ids(player=player, num_players=3, card=card, action=action)
+                    assert legal[list(action_ids)].all()
+                    checked += 1
+        card, action = agent.get_action(game=game, actions=actions, available_actions=available_actions)
+        player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card,
+                                                                 action=action)
+    assert checked > 0
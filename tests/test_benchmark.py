@@ -0,0 +1,50 @@
+import multiprocessing
+
+from monopoly_deal.benchmark import BENCHMARKS, DRIVERS, SEEDS, _playout, compare, decisions_per_second, \
+    dense_game, load, run_benchmarks, save
+
+
+def test_drivers_run():
+    for play in DRIVERS.values():
+        assert decisions_per_second(play, num_games=1) > 0
+
+
+def test_playouts_repeat_the_same_games():
+    played = []
+
+    def play(num_players, rng):
+        played.append(rng.random())
+        return 1
+
+    operation = _playout(play)()
+    assert operation() == operation() == len(SEEDS)
+    assert played[:len(SEEDS)] == played[len(SEEDS):]
+
+
+def test_dense_game():
+    game = dense_game(num_properties=8, num_cash=3, hand=(7, 8))
+    for player in game.players:
+        assert len(player.board.get_all_property_cards()) == 8 and len(player.board.cash_cards) == 3
+    assert [card.index for card in game.players[0].hand.cards_in_hand] == [7, 8]
+
+
+def test_run_save_and_compare(tmp_path):
+    names = [name for name in BENCHMARKS if not name.startswith(('mcts', 'playout'))]
+    results = run_benchmarks(names=names, min_seconds=0.001, repeat=1)
+    assert list(results['benchmarks']) == names
+    assert all(result['rate'] > 0 for result in results['benchmarks'].values())
+
+    save(results, tmp_path / 'baseline.json')
+    baseline = load(tmp_path / 'baseline.json')
+    assert compare(baseline, results) == []
+
+    slower = {'benchmarks': {name: dict(result) for name, result in results['benchmarks'].items()}}
+    slower['benchmarks']['new_game']['rate'] *= 0.5
+    slower['benchmarks']['discards.hand_10']['rate'] *= 0.95
+    assert [name for name, _, _ in compare(baseline, slower, threshold=0.1)] == ['new_game']
+
+
+def test_parallel_search_workers_are_stopped():
+    results = run_benchmarks(names=['mcts.workers_2'], min_seconds=0.001, repeat=1)
+    assert results['benchmarks']['mcts.workers_2']['rate'] > 0
+    assert multiprocessing.active_children() == []
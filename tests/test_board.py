@@ -1,7 +1,8 @@
 import pytest
 
-from monopoly_deal.cards import deck, Color
+from monopoly_deal.cards import COLOR_BITS, deck, Color
 from monopoly_deal.game import Board
+from monopoly_deal.payments import OVERPAY
 
 def test_find_cash_to_pay_bill_up_to_amount():
     board = Board(cash_cards=(deck[99], deck[100]), property_sets=tuple())  # $3 and $2
@@ -38,3 +39,37 @@ def test_find_additional_cards_to_pay_bill():
         assert len(cards_to_pay) == 3
 
 
+def test_additional_cards_to_pay_bill_follow_the_solver_order():
+    board = Board(cash_cards=(deck[99], deck[100]), property_sets=tuple())  # $2 and $3, utility, RR and brown
+    board = board.play_property_card(card=deck[37], color=Color.UTIL)
+    board = board.play_property_card(card=deck[39], color=Color.RR)
+    board = board.play_property_card(card=deck[43], color=Color.BROWN)
+    cash_cards = board.find_cash_to_pay_bill_up_to_amount(bill_amount=8)
+
+    payment_options = board.find_additional_cards_to_pay_bill(bill_amount=8, cards_in_payment=cash_cards)
+    assert payment_options == board.find_additional_cards_to_pay_bill(bill_amount=8, cards_in_payment=cash_cards)
+    assert len(set(frozenset(cards) for cards in payment_options)) == len(payment_options) == 3
+
+    exact = board.find_additional_cards_to_pay_bill(bill_amount=8, cards_in_payment=cash_cards, limit=2,
+                                                    order=OVERPAY)
+    assert [Board.get_value_of_cards(cards) for cards in exact] == [8, 8]
+    assert all(deck[43] in cards for cards in exact)
+
+def test_board_lookups():
+    board = Board(cash_cards=(deck[99],), property_sets=tuple())
+    board = board.play_property_card(card=deck[43], color=Color.BROWN)
+    board = board.play_property_card(card=deck[37], color=Color.UTIL)
+    board = board.play_property_card(card=deck[44], color=Color.BROWN)
+    brown, util = board.property_sets
+
+    assert board.get_property_set_containing_card(card=deck[44]) is brown
+    assert board.get_property_sets_matching_colors(colors={Color.UTIL, Color.BROWN}) == [brown, util]
+    utility_or_brown = COLOR_BITS[Color.UTIL] | COLOR_BITS[Color.BROWN]
+    assert board.get_property_sets_matching_mask(color_mask=utility_or_brown) == [brown, util]
+    assert board.get_complete_sets() == [brown] and board.count_complete_sets() == 1
+    assert board.get_total_value() == deck[99].value + sum(card.value for card in brown.cards + util.cards)
+
+    board = board.lose_property_card(card=deck[44])
+    assert board.count_complete_sets() == 0
+    with pytest.raises(ValueError):
+        board.get_property_set_containing_card(card=deck[44])
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from monopoly_deal.actions import get_available_actions, PlayProperty
+from monopoly_deal.cards import ActionCard, Cashable, PropertyCard
+from monopoly_deal.compact import CompactGame
+from monopoly_deal.game import BoardIndex
+from monopoly_deal.play import new_game
+
+
+def snapshot(game):
+    return (
+        tuple(
+            (
+                player.hand.serialize(),
+                tuple(card.index for card in player.board.cash_cards),
+                tuple((pset.color, pset.serialize()) for pset in player.board.property_sets)
+            )
+            for player in game.players
+        ),
+        game.discard_pile.serialize(),
+        tuple(game.game_deck),
+        game.current_turn_index,
+        game.cards_played,
+        game.state
+    )
+
+
+def random_transition(game, compact, rng):
+    """Apply the same randomly chosen transition to a `Game` and its `CompactGame`"""
+    current = game.current_player()
+    opponent = game.players[game.get_next_player_index()]
+    hand = current.hand.cards_in_hand
+    choice = rng.choice(['draw', 'cash', 'property', 'action', 'discard', 'steal', 'steal_set', 'charge', 'end'])
+
+    if choice == 'draw':
+        num_to_draw, player, as_move = rng.randint(1, 4), rng.choice(game.players), rng.random() < 0.5
+        state = random.getstate()
+        new_game = game.draw_cards(num_to_draw=num_to_draw, player=player, as_move=as_move)
+        random.setstate(state)
+        return new_game, compact.draw_cards(num_to_draw=num_to_draw, player_index=player.index, as_move=as_move)
+    if choice == 'cash':
+        cards = [card for card in hand if isinstance(card, Cashable)]
+        if cards:
+            card = rng.choice(cards)
+            return game.play_cash_card(card=card), compact.play_cash_card(card=card.index)
+    if choice == 'property':
+        plays = [
+            action for card in hand if isinstance(card, PropertyCard)
+            for action in get_available_actions(card=card, players=game.players, current_player=current)
+            if isinstance(action, PlayProperty)
+        ]
+        if plays:
+            action = rng.choice(plays)
+            return (
+                game.play_property_card(card=action.property_card, color=action.color),
+                compact.play_property_card(card=action.property_card.index, color=action.color)
+            )
+    if choice == 'action':
+        cards = [card for card in hand if isinstance(card, ActionCard)]
+        if cards:
+            card, is_response = rng.choice(cards), rng.random() < 0.3
+            return (
+                game.play_action_card(card=card, is_response=is_response),
+                compact.play_action_card(card=card.index, is_response=is_response)
+            )
+    if choice == 'discard':
+        player = rng.choice(game.players)
+        if player.hand.cards_in_hand:
+            card = rng.choice(player.hand.cards_in_hand)
+            return (
+                game.discard_card(card=card, player=player),
+                compact.discard_card(card=card.index, player_index=player.index)
+            )
+    if choice == 'steal':
+        cards = opponent.board.get_all_property_cards()
+        if cards:
+            card = rng.choice(cards)
+            return (
+                game.steal_property_card(card=card, stolen_to_player=current, stolen_from_player=opponent),
+                compact.steal_property_card(
+                    card=card.index, stolen_to_index=current.index, stolen_from_index=opponent.index
+                )
+            )
+    if choice == 'steal_set':
+        complete_sets = opponent.board.get_complete_sets()
+        if complete_sets:
+            pset = rng.choice(complete_sets)
+            return (
+                game.steal_complete_set(property_set=pset, stolen_to_player=current, stolen_from_player=opponent),
+                compact.steal_complete_set(
+                    slot=opponent.board.property_sets.index(pset),
+                    stolen_to_index=current.index,
+                    stolen_from_index=opponent.index
+                )
+            )
+    if choice == 'charge':
+        cash_cards = tuple(card for card in opponent.board.cash_cards if rng.random() < 0.5)
+        property_cards = tuple(card for card in opponent.board.get_all_property_cards() if rng.random() < 0.5)
+        return (
+            game.charge_player(
+                cash_cards=cash_cards, property_cards=property_cards, to_player=current, from_player=opponent
+            ),
+            compact.charge_player(
+                cash_cards=tuple(card.index for card in cash_cards),
+                property_cards=tuple(card.index for card in property_cards),
+                to_index=current.index,
+                from_index=opponent.index
+            )
+        )
+    if choice == 'end':
+        return game.end_turn(), compact.end_turn()
+    return game, compact
+
+
+def test_round_trip_new_game():
+    game = new_game(3)
+    assert snapshot(CompactGame.from_game(game).to_game()) == snapshot(game)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_transitions_match_game(seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    game = new_game(2)
+    compact = CompactGame.from_game(game)
+    for _ in range(300):
+        game, compact = random_transition(game, compact, rng)
+        assert snapshot(compact.to_game()) == snapshot(game)
+        assert snapshot(CompactGame.from_game(game).to_game()) == snapshot(game)
+        assert compact.winner() == (game.winner().index if game.winner() else None)
+        # The location index kept up by every write matches one sorted from the cells
+        rebuilt = CompactGame(cells=compact.cells, num_players=compact.num_players, current_turn_index=0,
+                              cards_played=0, state=0)
+        assert compact.by_location == rebuilt.by_location and compact.built == rebuilt.built
+        for player in game.players:
+            assert compact.total_value(player.index) == player.board.get_total_value()
+            # The index carried from board to board matches one built from scratch
+            index, rebuilt = player.board.index, BoardIndex.build(player.board.property_sets)
+            assert index.card_positions == rebuilt.card_positions
+            assert index.color_positions == rebuilt.color_positions
+            assert index.num_complete == rebuilt.num_complete
+            assert index.property_value == rebuilt.property_value
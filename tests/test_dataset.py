@@ -0,0 +1,65 @@
+import numpy as np
+
+from monopoly_deal.batch import NUM_ACTIONS
+from monopoly_deal.dataset import DATA_SUFFIX, TrajectoryDataset, TrajectoryWriter, generate
+from monopoly_deal.features import observation_size
+
+
+def add_rows(writer, num_rows, player=0):
+    for i in range(num_rows):
+        legal = np.zeros(NUM_ACTIONS, dtype=bool)
+        legal[i] = True
+        writer.add(observation=np.full(observation_size(2), i, dtype=np.float32), legal=legal,
+                   policy=legal.astype(np.float32), player=(player + i) % 2)
+
+
+def test_rows_are_committed_a_game_at_a_time(tmp_path):
+    directory = str(tmp_path)
+    writer = TrajectoryWriter(directory=directory, shard='a', num_players=2, flush_rows=4)
+    add_rows(writer, 3)
+    writer.end_game(winner=1)
+    add_rows(writer, 3)  # Fills the buffer, flushing the first game only
+    assert len(TrajectoryDataset(directory)) == 3
+
+    writer.end_game(winner=None)
+    writer.close()
+    dataset = TrajectoryDataset(directory)
+    assert len(dataset) == 6
+    assert dataset.shard_arrays('outcome')[0].tolist() == [-1, 1, -1, 0, 0, 0]
+    assert dataset[4]['observation'][0] == 1
+    assert dataset[4]['legal'].nonzero()[0].tolist() == [1]
+
+
+def test_reopened_shards_drop_uncommitted_rows(tmp_path):
+    directory = str(tmp_path)
+    with TrajectoryWriter(directory=directory, shard='a', num_players=2) as writer:
+        add_rows(writer, 2)
+        writer.end_game(winner=0)
+    with open(tmp_path / ('a' + DATA_SUFFIX), 'ab') as f:
+        f.write(b'torn write')
+    with TrajectoryWriter(directory=directory, shard='a', num_players=2) as writer:
+        add_rows(writer, 2)
+        writer.end_game(winner=0)
+    with TrajectoryWriter(directory=directory, shard='b', num_players=2) as writer:
+        add_rows(writer, 5)
+        writer.end_game(winner=1)
+
+    dataset = TrajectoryDataset(directory)
+    assert len(dataset) == 9
+    assert dataset.shard_arrays('game')[0].tolist() == [0, 0, 1, 1]
+
+    batch = dataset.sample(16, rng=np.random.default_rng(0))
+    assert batch['observation'].shape == (16, observation_size(2))
+    assert batch['policy'].shape == (16, NUM_ACTIONS)
+    assert (batch['policy'].argmax(axis=1) == batch['observation'][:, 0]).all()
+
+
+def test_self_play_workers_write_their_own_shards(tmp_path):
+    directory = str(tmp_path)
+    generate(directory=directory, num_games=2, workers=2, time_limit=2)
+    dataset = TrajectoryDataset(directory)
+    assert len(dataset.names) == 2
+    rows = dataset.sample(32)
+    assert np.allclose(rows['policy'].astype(np.float32).sum(axis=1), 1, atol=1e-2)
+    assert not (rows['policy'] > 0)[~rows['legal']].any()
+    assert set(np.unique(rows['outcome'])) <= {-1, 0, 1}
@@ -0,0 +1,48 @@
+import random
+
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from monopoly_deal.actions import DiscardOptions
+from monopoly_deal.cards import deck, CARD_KINDS
+
+
+def kinds_of(discard):
+    return tuple(sorted(Counter(CARD_KINDS[card.index] for card in discard.discard_cards).items()))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_options_cover_distinct_combinations(seed):
+    rng = random.Random(seed)
+    hand = rng.sample(list(deck.values()), rng.randint(8, 14))
+    num_to_discard = len(hand) - 7
+    options = DiscardOptions(cards=tuple(hand), num_to_discard=num_to_discard)
+
+    expected = {
+        tuple(sorted(Counter(CARD_KINDS[card.index] for card in combo).items()))
+        for combo in combinations(hand, num_to_discard)
+    }
+    found = [kinds_of(options[i]) for i in range(len(options))]
+    assert len(found) == len(set(found)) == len(expected)
+    assert set(found) == expected
+    assert all(len(option.discard_cards) == num_to_discard for option in options)
+    assert kinds_of(options.sample(rng)) in expected
+    with pytest.raises(IndexError):
+        options[len(options)]
+
+
+def test_best_options_are_ranked():
+    hand = (deck[27], deck[28], deck[89], deck[95], deck[100], deck[106], deck[108], deck[12], deck[63])
+    options = DiscardOptions(cards=hand, num_to_discard=2)
+
+    def value(card):
+        return card.value
+
+    best = options.best(k=5, card_score=value)
+    totals = [sum(card.value for card in option.discard_cards) for option in best]
+    assert totals == sorted(totals)
+    assert totals[0] == 2  # Two Pass Go cards
+    assert totals == sorted(sum(card.value for card in option.discard_cards) for option in options)[:5]
+    assert len({kinds_of(option) for option in options.best(k=len(options) + 5, card_score=value)}) == len(options)
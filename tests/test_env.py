@@ -0,0 +1,63 @@
+import numpy as np
+
+from monopoly_deal.batch import NUM_ACTIONS
+from monopoly_deal.compact import NUM_CARDS
+from monopoly_deal.env import CARD_FEATURES, HIDDEN, IN_HAND, NUM_PENDING, NUM_PHASES, NUM_ZONES, OBSERVATION_SIZE, \
+    VectorEnv
+
+
+def card_zones(observations):
+    return observations[:, :CARD_FEATURES].reshape(len(observations), NUM_CARDS, NUM_ZONES).argmax(axis=2)
+
+
+def test_reset_deals_hidden_hands():
+    env = VectorEnv(num_envs=8, seed=0)
+    observations, legal = env.reset()
+    assert observations.shape == (8, OBSERVATION_SIZE)
+    assert legal.shape == (8, NUM_ACTIONS)
+    assert legal.any(axis=1).all()
+
+    zones = card_zones(observations)
+    assert ((zones == IN_HAND).sum(axis=1) == 7).all()  # Five dealt and two drawn at the start of the turn
+    assert ((zones == HIDDEN).sum(axis=1) == NUM_CARDS - 7).all()
+
+
+def test_auto_reset_keeps_games_going():
+    env = VectorEnv(num_envs=16, num_players=3, seed=1)
+    observations, legal = env.reset()
+    finished = 0
+    for _ in range(400):
+        observations, legal, rewards, dones = env.step(env.sample_actions(legal))
+        assert legal.any(axis=1).all()
+        won = rewards.max(axis=1) > 0
+        assert (rewards[won].sum(axis=1) == -1).all()  # One winner, two losers
+        assert (rewards[~dones] == 0).all()
+        finished += dones.sum()
+    assert finished > 0
+
+
+def test_without_auto_reset_games_stay_done():
+    env = VectorEnv(num_envs=4, seed=2, auto_reset=False)
+    observations, legal = env.reset()
+    dones = np.zeros(4, dtype=bool)
+    for _ in range(2000):
+        observations, legal, rewards, dones = env.step(env.sample_actions(legal))
+        if dones.all():
+            break
+    assert dones.all()
+    assert not legal.any()
+    assert ((env.winners >= -1) & (env.winners < 2)).all()
+
+
+def test_amount_asked_for_is_only_set_while_a_charge_is_pending():
+    env = VectorEnv(num_envs=64, seed=3)
+    observations, legal = env.reset()
+    pending = CARD_FEATURES + NUM_PHASES
+    charged = 0
+    for _ in range(300):
+        observations, legal, rewards, dones = env.step(env.sample_actions(legal))
+        nothing_pending = observations[:, pending] == 1
+        amounts = observations[:, pending + NUM_PENDING]
+        assert (amounts[nothing_pending] == 0).all()
+        charged += (amounts > 0).sum()
+    assert charged > 0
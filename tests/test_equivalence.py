@@ -0,0 +1,58 @@
+from monopoly_deal.actions import get_discard_options, Discard, PlayAsCash, StealCard
+from monopoly_deal.cards import deck, distinct_cards, Color
+from monopoly_deal.equivalence import choice_signature, collapse_actions, multiplicity
+from monopoly_deal.game import Board, Hand, Player, Game, DiscardPile
+from monopoly_deal.play import get_available_actions_for_player
+
+
+def make_game(hand_cards, opponent_board=Board((), ())):
+    player = Player(index=0, hand=Hand(cards_in_hand=tuple(hand_cards)), board=Board((), ()))
+    opponent = Player(index=1, hand=Hand(cards_in_hand=tuple()), board=opponent_board)
+    return Game(
+        players=(player, opponent),
+        discard_pile=DiscardPile(discarded_cards=tuple()),
+        current_turn_index=0,
+        cards_played=0,
+        game_deck=tuple(),
+        state=1
+    )
+
+
+def test_distinct_cards():
+    counts = distinct_cards([deck[27], deck[89], deck[28], deck[90], deck[95], deck[29]])
+    assert counts == {deck[27]: 3, deck[89]: 2, deck[95]: 1}
+
+
+def test_available_actions_offer_one_card_per_kind():
+    game = make_game([deck[27], deck[28], deck[29], deck[89], deck[90]])  # Three Pass Go and two $1 cards
+    available_actions = get_available_actions_for_player(player=game.players[0], game=game)
+    assert set(available_actions.keys()) == {deck[27], deck[89], None}
+
+    action = available_actions[deck[27]][0]
+    assert isinstance(action, PlayAsCash)
+    assert multiplicity(player=game.players[0], card=deck[27], action=action) == 3
+
+
+def test_equivalent_steals_collapse():
+    opponent_board = Board((), ()).play_property_card(card=deck[43], color=Color.BROWN)
+    game = make_game([deck[20]], opponent_board=opponent_board)
+    player, opponent = game.players
+    steal = StealCard(steal_from_player=opponent, steal_card=deck[43])
+    assert multiplicity(player=player, card=deck[20], action=steal) == 1
+
+    wild_board = opponent_board.play_property_card(card=deck[65], color=Color.BROWN)
+    opponent = Player(index=1, hand=opponent.hand, board=wild_board)
+    assert choice_signature(player, deck[20], StealCard(opponent, deck[43])) != \
+        choice_signature(player, deck[20], StealCard(opponent, deck[65]))
+
+
+def test_discards_collapse_by_kind():
+    hand = [deck[27], deck[28], deck[29], deck[30], deck[89], deck[90], deck[95], deck[100], deck[106]]
+    player = Player(index=0, hand=Hand(cards_in_hand=tuple(hand)), board=Board((), ()))
+    collapsed = list(get_discard_options(player=player)[None])
+
+    # Two of: 4 Pass Go, 2 x $1, $2, $3, $5 -> 12 distinct pairs by kind instead of 36 combinations
+    assert len(collapsed) == 12
+    assert len(collapse_actions(player=player, available_actions={None: collapsed})[None]) == 12
+    assert sum(multiplicity(player=player, card=None, action=discard) for discard in collapsed) == 36
+    assert all(isinstance(discard, Discard) for discard in collapsed)
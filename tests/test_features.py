@@ -0,0 +1,66 @@
+import numpy as np
+
+from monopoly_deal.cards import CARD_KINDS, Color, deck
+from monopoly_deal.features import (
+    CASH_VALUE, COMPLETE, COMPLETE_SETS, GAME_SIZE, HAND_KINDS, HAND_SIZE, HOUSES, IS_TURN, KIND_IDS, PLAYS_LEFT,
+    PROPERTIES, SEAT_SIZE, GameEncoder, observation_size
+)
+from monopoly_deal.compact import COLOR_CODES
+from monopoly_deal.game import Board, DiscardPile, Game, Hand, Player
+
+BROWN = COLOR_CODES[Color.BROWN] - 1
+
+
+def make_game():
+    board = Board(cash_cards=(deck[99], deck[100]), property_sets=())  # $2 and $3
+    board = board.play_property_card(card=deck[43], color=Color.BROWN)
+    board = board.play_property_card(card=deck[44], color=Color.BROWN)
+    board = board.play_property_card(card=deck[1], color=Color.BROWN)  # A house on the complete set
+    player = Player(index=0, hand=Hand(cards_in_hand=(deck[27], deck[28], deck[89])), board=Board((), ()))
+    opponent = Player(index=1, hand=Hand(cards_in_hand=(deck[29],)), board=board)
+    return Game(
+        players=(player, opponent),
+        discard_pile=DiscardPile(discarded_cards=()),
+        current_turn_index=0,
+        cards_played=1,
+        game_deck=tuple(range(45, 55)),
+        state=1
+    )
+
+
+def test_encodes_hands_and_boards_from_the_observer():
+    features = GameEncoder(num_players=2).encode(make_game(), player_index=0)
+    assert len(features) == observation_size(2) == 2 * SEAT_SIZE + GAME_SIZE
+
+    pass_go = KIND_IDS[CARD_KINDS[27]]
+    assert features[HAND_KINDS + pass_go] == 2
+    assert features[HAND_SIZE] == 3
+    assert features[IS_TURN] == 1
+
+    opponent = SEAT_SIZE
+    assert features[opponent + HAND_KINDS:opponent + HAND_SIZE].sum() == 0  # Hidden without perfect information
+    assert features[opponent + HAND_SIZE] == 1
+    assert features[opponent + CASH_VALUE] == 5
+    assert features[opponent + PROPERTIES + BROWN] == 2
+    assert features[opponent + COMPLETE + BROWN] == 1
+    assert features[opponent + HOUSES + BROWN] == 1
+    assert features[opponent + COMPLETE_SETS] == 1
+    assert features[2 * SEAT_SIZE + PLAYS_LEFT] == 2
+
+
+def test_perfect_information_shows_every_hand():
+    features = GameEncoder(num_players=2, perfect_information=True).encode(make_game(), player_index=1)
+    assert features[HAND_KINDS + KIND_IDS[CARD_KINDS[29]]] == 1
+    assert features[SEAT_SIZE + HAND_KINDS:SEAT_SIZE + HAND_SIZE].sum() == 3
+
+
+def test_batches_reuse_the_buffer():
+    encoder = GameEncoder(num_players=2)
+    game = make_game()
+    batch = encoder.encode_batch([game, game, game], player_indices=[0, 1, 0])
+    assert batch.shape == (3, encoder.size)
+    assert np.array_equal(batch[0], batch[2])
+    assert np.array_equal(batch[1], GameEncoder(num_players=2).encode(game, player_index=1))
+
+    buffer = encoder.buffer
+    assert encoder.encode_batch([game, game]).base is buffer
@@ -0,0 +1,56 @@
+import json
+import random
+
+from monopoly_deal.agents import RandomAgent
+from monopoly_deal.instrumentation import (
+    ACTION_GENERATION, DECISIONS, EXECUTE_ACTIONS, MCTS_ITERATIONS, TRANSITIONS, Metrics, disable, enable, metrics
+)
+from monopoly_deal.mcts import MCTS, State
+from monopoly_deal.play import new_game, step
+from monopoly_deal.tournament import play_game, run_tournament
+
+
+def test_nothing_is_collected_while_disabled():
+    disable()
+    metrics.reset()
+    play_game(lineup=(RandomAgent, RandomAgent), game_index=0, seed=0)
+    assert metrics.counters == {} and metrics.timers == {}
+
+
+def test_counters_and_timers(tmp_path):
+    enable()
+    try:
+        result = play_game(lineup=(RandomAgent, RandomAgent), game_index=0, seed=0)
+        counters, timers = result.metrics['counters'], result.metrics['timers']
+        assert counters[DECISIONS] == result.moves + 1  # The last decision is left unanswered
+        assert counters[TRANSITIONS] > counters[DECISIONS]
+        assert timers[ACTION_GENERATION]['calls'] > 0 and timers[EXECUTE_ACTIONS]['seconds'] > 0
+
+        random.seed(0)
+        player, game, actions, available_actions, is_over = step(game=new_game(2), actions=tuple(),
+                                                                 card_to_play=None, action=None)
+        MCTS(iteration_limit=20).search(State(ai_player=player, player=player, game=game, actions=actions,
+                                              available_actions=available_actions))
+        assert metrics.counters[MCTS_ITERATIONS] == 20
+
+        metrics.write_json(tmp_path / 'metrics.json')
+        assert json.loads((tmp_path / 'metrics.json').read_text())['counters'][MCTS_ITERATIONS] == 20
+    finally:
+        disable()
+
+
+def test_tournament_merges_game_metrics():
+    enable()
+    try:
+        summary = run_tournament(lineup=(RandomAgent, RandomAgent), num_games=3, workers=1)
+        decisions = [result.metrics['counters'][DECISIONS] for result in summary.results]
+        assert metrics.counters[DECISIONS] == sum(decisions)
+    finally:
+        disable()
+    # A game won on the last play of a turn ends without another decision to leave unanswered
+    assert all(count - result.moves in (0, 1) for count, result in zip(decisions, summary.results))
+
+    merged = Metrics()
+    merged.merge(summary.results[0].metrics)
+    merged.merge(summary.results[1].metrics)
+    assert merged.counters[DECISIONS] == decisions[0] + decisions[1]
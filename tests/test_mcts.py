@@ -0,0 +1,102 @@
+import pickle
+import random
+
+import pytest
+
+from monopoly_deal.cards import deck
+from monopoly_deal import mcts
+from monopoly_deal.mcts import EXPANSION, MCTS, PHASES, TAKE_ACTION, ParallelMCTS, SearchProfile, State
+from monopoly_deal.play import new_game, step
+
+
+def initial_state(seed):
+    random.seed(seed)
+    player, game, actions, available_actions, is_over = step(
+        game=new_game(2), actions=tuple(), card_to_play=None, action=None
+    )
+    return State(ai_player=player, player=player, game=game, actions=actions, available_actions=available_actions)
+
+
+def test_search_returns_available_choice():
+    state = initial_state(seed=3)
+    card, action = MCTS(iteration_limit=30).search(initial_state=state)
+    assert (card, action) in state.getPossibleActions()
+
+
+def test_table_is_bounded():
+    state = initial_state(seed=4)
+    search = MCTS(iteration_limit=200, max_nodes=25)
+    card, action = search.search(initial_state=state)
+    assert len(search.table) <= 25
+    assert state.get_key() in search.table
+    assert (card, action) in state.getPossibleActions()
+
+
+def test_engine_errors_reach_the_caller(monkeypatch):
+    def broken_step(**kwargs):
+        raise ValueError('broken engine')
+
+    state = initial_state(seed=3)
+    monkeypatch.setattr(mcts, 'step', broken_step)
+    with pytest.raises(ValueError, match='broken engine'):
+        state.takeAction(state.getPossibleActions()[0])
+
+def test_equal_positions_share_a_key():
+    state = initial_state(seed=5)
+    copy = State(ai_player=state.ai_player, player=state.player, game=state.game, actions=state.actions,
+                 available_actions=state.available_actions)
+    assert state.get_key() == copy.get_key()
+
+
+def test_tree_is_reused_between_searches():
+    state = initial_state(seed=6)
+    search = MCTS(iteration_limit=100)
+    choice = search.search(initial_state=state)
+    next_state = state.takeAction(choice)
+    explored = search.table[next_state.get_key()].visits
+    assert explored > 0
+
+    search.search(initial_state=next_state)
+    assert search.table[next_state.get_key()].visits == explored + 100
+
+    search = MCTS(iteration_limit=100, reuse_tree=False)
+    search.search(initial_state=state)
+    search.search(initial_state=next_state)
+    assert search.table[next_state.get_key()].visits == 100
+
+
+def test_parallel_search_merges_workers():
+    state = initial_state(seed=7)
+    with ParallelMCTS(workers=2, iteration_limit=50, seed=0) as search:
+        statistics = search.search_statistics(initial_state=state)
+        assert 50 < sum(visits for visits, _ in statistics.values()) <= 100
+        assert search.profile.searches == 2 and search.profile.iterations == 100
+        assert search.search(initial_state=state) in state.getPossibleActions()
+    assert not search.processes
+
+
+def test_search_profile():
+    state = initial_state(seed=9)
+    search = MCTS(iteration_limit=40)
+    choice, profile = search.search_with_profile(initial_state=state)
+    assert choice in state.getPossibleActions()
+    assert profile.iterations == 40 and profile.searches == 1
+    assert profile.nodes_allocated == len(search.table)
+    assert profile.root_branching == len(state.getPossibleActions())
+    assert 1 <= profile.mean_depth <= profile.max_depth
+    assert set(profile.phase_seconds) == set(PHASES)
+    assert 0 < profile.phase_seconds[TAKE_ACTION] <= profile.phase_seconds[EXPANSION]
+    assert sum(profile.phase_seconds[phase] for phase in PHASES[:4]) <= profile.seconds
+
+    _, again = search.search_with_profile(initial_state=state)
+    merged = SearchProfile.combine([profile, again])
+    assert merged.searches == 2 and merged.iterations == 80
+    assert merged.nodes_allocated == len(search.table)  # The second search reused the tree
+    assert merged.as_dict()['max_depth'] == max(profile.max_depth, again.max_depth)
+
+
+def test_cards_unpickle_to_the_deck():
+    state = initial_state(seed=8)
+    game = pickle.loads(pickle.dumps(state.game))
+    assert all(card is deck[card.index] for card in game.players[0].hand.cards_in_hand)
+    assert game == state.game
@@ -0,0 +1,158 @@
+import random
+
+from collections import Counter
+
+import pytest
+
+from monopoly_deal.actions import MAX_CARDS_IN_HAND, Charge, EndTurn, NoResponse, SayNo, SwapTarget, \
+    get_available_actions, get_available_responses, get_discard_options
+from monopoly_deal.benchmark import dense_game
+from monopoly_deal.cards import deck
+from monopoly_deal.compact import CompactGame
+from monopoly_deal.game import MAX_PLAYS_PER_TURN, Game, Hand, Player
+from monopoly_deal.mutable import MutableGame, convert_actions
+from monopoly_deal.play import execute_actions, get_available_actions_for_player, new_game
+
+
+def random_move(game, rng):
+    """A resolved chain for the player whose turn it is: a play and random responses, a discard or the end of turn"""
+    player = game.current_player()
+    if len(player.hand.cards_in_hand) > MAX_CARDS_IN_HAND:
+        return ((player, None, rng.choice(get_discard_options(player=player)[None])),)
+    available_actions = get_available_actions_for_player(player=player, game=game)
+    card = rng.choice(list(available_actions))
+    if game.cards_played >= MAX_PLAYS_PER_TURN or card is None:
+        return ((None, None, EndTurn()),)
+    action = rng.choice(available_actions[card])
+    if isinstance(action, SwapTarget):
+        action = rng.choice(action.expand())
+    move = ((player, card, action),)
+    while move[-1][2].respondable:
+        responder = move[-1][2].target_player
+        responses = get_available_responses(player=responder, actions=move)
+        card = rng.choice(list(responses))
+        move += ((responder, card, rng.choice(responses[card])),)
+    return move
+
+
+def apply_to_game(game, move):
+    if isinstance(move[0][2], EndTurn):
+        game = game.end_turn()
+        return game.draw_cards(num_to_draw=2) if game.game_deck else game
+    return execute_actions(game, move)
+
+
+def game_snapshot(game):
+    return (
+        tuple(
+            (
+                player.hand.serialize(),
+                tuple(card.index for card in player.board.cash_cards),
+                tuple((pset.color, pset.serialize()) for pset in player.board.property_sets)
+            )
+            for player in game.players
+        ),
+        game.discard_pile.serialize(),
+        tuple(game.game_deck),
+        game.current_turn_index,
+        game.cards_played
+    )
+
+
+def snapshot(compact):
+    by_location = tuple(tuple(cards) for cards in compact.by_location)
+    return (tuple(compact.cells), by_location, tuple(compact.built), compact.current_turn_index, compact.cards_played,
+            compact.state)
+
+
+@pytest.mark.parametrize('seed,num_players', [(0, 2), (1, 2), (2, 3), (3, 4)])
+def test_apply_matches_game_and_undo_restores_it(seed, num_players):
+    rng = random.Random(seed)
+    random.seed(seed)
+    game = new_game(num_players)
+    mutable = MutableGame.from_compact(CompactGame.from_game(game))
+    history = []
+    for _ in range(300):
+        if game.winner() or not (game.game_deck or game.discard_pile.discarded_cards):
+            break
+        move = random_move(game, rng)
+        before = snapshot(mutable)
+        plays = convert_actions(game, move)
+        state = random.getstate()
+        game = apply_to_game(game, move)
+        random.setstate(state)
+        token = mutable.apply(plays)
+        assert game_snapshot(mutable.to_game()) == game_snapshot(game)
+
+        mutable.undo(token)
+        assert snapshot(mutable) == before
+        random.setstate(state)
+        history.append((before, mutable.apply(plays)))
+
+    # Unwinding the whole game returns to where it started, one move at a time
+    for before, token in reversed(history):
+        mutable.undo(token)
+        assert snapshot(mutable) == before
+    assert len(mutable.journal) == 0
+
+
+def test_moves_must_be_undone_in_reverse_order():
+    random.seed(5)
+    game = new_game(2)
+    mutable = MutableGame.from_compact(CompactGame.from_game(game))
+    first = mutable.apply(convert_actions(game, ((None, None, EndTurn()),)))
+    second = mutable.apply(convert_actions(game.end_turn(), ((None, None, EndTurn()),)))
+    mutable.undo(first)
+    with pytest.raises(AssertionError):
+        mutable.undo(second)
+
+
+def card_moves_from_actions(game, card):
+    player = game.current_player()
+    actions = []
+    for action in get_available_actions(card=card, players=game.players, current_player=player):
+        actions.extend(action.expand() if isinstance(action, SwapTarget) else [action])
+    return Counter(convert_actions(game, ((player, card, action),))[0][1] for action in actions)
+
+
+@pytest.mark.parametrize('seed,num_players', [(4, 2), (5, 3)])
+def test_card_moves_match_available_actions(seed, num_players):
+    rng = random.Random(seed)
+    random.seed(seed)
+    game = new_game(num_players)
+    for _ in range(300):
+        if game.winner() or not (game.game_deck or game.discard_pile.discarded_cards):
+            break
+        mutable = MutableGame.from_compact(CompactGame.from_game(game))
+        for card in game.current_player().hand.cards_in_hand:
+            assert Counter(mutable.card_moves(card.index)) == card_moves_from_actions(game, card)
+        game = apply_to_game(game, random_move(game, rng))
+
+
+@pytest.mark.parametrize('responses', [
+    # The reviewer's chain: a charge, said no to, said no to back, and let go
+    ((1, SayNo), (0, SayNo), (1, NoResponse)),
+    ((1, SayNo),),
+    ((1, SayNo), (0, SayNo), (1, SayNo)),
+])
+def test_said_no_chains_count_plays_like_the_engine(responses):
+    # The engine sees every play after the first as a response, so any Just Say No resets the plays made this turn
+    game = dense_game(num_properties=4, num_cash=2, hand=(7, 14))
+    players = (game.players[0], Player(index=1, hand=Hand(cards_in_hand=(deck[15], deck[16])),
+                                       board=game.players[1].board))
+    game = Game(players=players, discard_pile=game.discard_pile, current_turn_index=0, cards_played=1,
+                game_deck=(), state=0)
+    chain = ((players[0], deck[7], Charge(charge_player=players[1], amount=2)),)
+    say_no_cards = {0: [deck[14]], 1: [deck[15], deck[16]]}
+    for player_index, response in responses:
+        if response is SayNo:
+            chain += ((players[player_index], say_no_cards[player_index].pop(0),
+                       SayNo(to_player=players[1 - player_index])),)
+        else:
+            chain += ((players[player_index], None, NoResponse()),)
+
+    mutable = MutableGame.from_compact(CompactGame.from_game(game))
+    mutable.apply(convert_actions(game, chain))
+    executed = execute_actions(game, chain)
+    assert game_snapshot(mutable.to_game()) == game_snapshot(executed)
+    assert mutable.cards_played == executed.cards_played == 0
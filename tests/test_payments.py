@@ -0,0 +1,49 @@
+import random
+
+from itertools import combinations
+
+import pytest
+
+from monopoly_deal.cards import deck
+from monopoly_deal.game import Board
+from monopoly_deal.payments import find_minimal_payments, OVERPAY, FEWEST_CARDS
+
+
+def brute_force_minimal_payments(cards, minimum_value):
+    covering = [
+        frozenset(combo) for r in range(1, len(cards) + 1) for combo in combinations(cards, r)
+        if Board.get_value_of_cards(combo) >= minimum_value
+    ]
+    return {combo for combo in covering if not any(other < combo for other in covering)}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    valuable_cards = [card for card in deck.values() if card.value > 0]
+    cards = rng.sample(valuable_cards, rng.randint(0, 11))
+    minimum_value = rng.randint(1, 15)
+
+    payments = find_minimal_payments(cards=cards, minimum_value=minimum_value)
+    assert len(payments) == len(set(frozenset(payment) for payment in payments))
+    assert {frozenset(payment) for payment in payments} == brute_force_minimal_payments(cards, minimum_value)
+
+
+def test_ordering_and_limit():
+    cards = [deck[89], deck[90], deck[95], deck[100], deck[106]]  # $1, $1, $2, $3, $5
+    payments = find_minimal_payments(cards=cards, minimum_value=4, order=OVERPAY)
+    overpayments = [Board.get_value_of_cards(payment) - 4 for payment in payments]
+    assert overpayments == sorted(overpayments)
+    assert overpayments[0] == 0
+
+    payments = find_minimal_payments(cards=cards, minimum_value=4, order=FEWEST_CARDS)
+    assert payments[0] == (deck[106],)
+
+    assert len(find_minimal_payments(cards=cards, minimum_value=4, limit=2)) == 2
+
+
+def test_large_board_is_fast():
+    cards = [card for card in deck.values() if card.value > 0][:40]
+    payments = find_minimal_payments(cards=cards, minimum_value=5, limit=100, order=OVERPAY)
+    assert len(payments) == 100
+    assert all(Board.get_value_of_cards(payment) == 5 for payment in payments)
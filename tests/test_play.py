@@ -0,0 +1,49 @@
+import json
+import os
+import random
+
+import pytest
+
+from monopoly_deal.benchmark import random_choice
+from monopoly_deal.play import DECISION_STATES, advance, drive, new_game, step
+
+# Every decision of a few seeded random games as [player, Zobrist key, length of the pending chain], recorded from the
+# re-entrant `step` as it was before it became a shim over `drive`
+with open(os.path.join(os.path.dirname(__file__), 'data', 'step_positions.json')) as f:
+    RECORDED_GAMES = json.load(f)
+
+
+def play_with_step(seed, num_players):
+    random.seed(seed)
+    rng = random.Random(seed)
+    player, game, actions, available_actions, is_over = step(game=new_game(num_players), actions=tuple(),
+                                                             card_to_play=None, action=None)
+    positions = []
+    while not is_over:
+        assert game.state in DECISION_STATES
+        positions.append([player.index, game.zobrist, len(actions)])
+        card, action = random_choice(rng, available_actions)
+        player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card,
+                                                                 action=action)
+    return positions, player, game
+
+
+def play_with_drive(seed, num_players):
+    random.seed(seed)
+    rng = random.Random(seed)
+    driver = drive(game=new_game(num_players))
+    player, game, actions, available_actions, is_over = advance(driver)
+    positions = []
+    while not is_over:
+        positions.append([player.index, game.zobrist, len(actions)])
+        player, game, actions, available_actions, is_over = advance(driver, random_choice(rng, available_actions))
+    return positions, player, game
+
+
+@pytest.mark.parametrize('play', [play_with_step, play_with_drive])
+@pytest.mark.parametrize('recorded', RECORDED_GAMES, ids=lambda recorded: f"seed {recorded['seed']}")
+def test_decisions_match_the_recorded_engine(play, recorded):
+    positions, winner, game = play(recorded['seed'], recorded['num_players'])
+    assert positions == recorded['positions']
+    assert (winner.index if winner is not None else None) == recorded['winner']
+    assert game.zobrist == recorded['final']
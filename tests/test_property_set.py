@@ -1,6 +1,9 @@
 import pytest
 
-from monopoly_deal.cards import Color, deck
+from monopoly_deal.cards import (
+    ACTION_TYPE_CODES, ALL_COLORS, CARD_ACTION_TYPES, CARD_COLOR_MASKS, CARD_TYPES, CARD_VALUES, COLOR_BITS, TYPE_CASH,
+    ActionType, Color, color_mask, deck, mask_colors
+)
 from monopoly_deal.game import PropertySet
 
 
@@ -14,6 +17,17 @@ def test_property_set_matches():
     assert not pset.matches(colors=deck[54].colors)  # Red card
     assert not pset.matches(colors=deck[67].colors)  # Non Brown wild card
 
+
+def test_property_set_matches_mask():
+    pset = PropertySet(color=Color.BROWN, cards=(deck[43], ))
+
+    assert pset.matches_mask(color_mask=deck[44].color_mask)  # Another brown card
+    assert pset.matches_mask(color_mask=deck[65].color_mask)  # Full wild card
+    assert pset.matches_mask(color_mask=deck[73].color_mask)  # Brown wild card
+
+    assert not pset.matches_mask(color_mask=deck[54].color_mask)  # Red card
+    assert not pset.matches_mask(color_mask=deck[67].color_mask)  # Non Brown wild card
+
 def test_add_card():
     pset = PropertySet(color=Color.BROWN, cards=(deck[43],))
 
@@ -61,4 +75,11 @@ def test_get_rent_due():
     assert pset.get_rent_due() == (deck[43].rent[1] + 6)
 
     pset = PropertySet(color=Color.BROWN, cards=(deck[43], deck[44], deck[1], deck[4])) # Complete set with house and hotel
-    assert pset.get_rent_due() == (deck[43].rent[1] + 3 + 4)
\ No newline at end of file
+    assert pset.get_rent_due() == (deck[43].rent[1] + 3 + 4)
+
+def test_color_masks():
+    assert mask_colors(deck[73].color_mask) == (Color.LBLUE, Color.BROWN)
+    assert deck[65].color_mask == ALL_COLORS == color_mask({Color.ALL})
+    assert CARD_COLOR_MASKS[43] == COLOR_BITS[Color.BROWN]
+    assert CARD_VALUES[108] == 10 and CARD_TYPES[108] == TYPE_CASH
+    assert CARD_ACTION_TYPES[27] == ACTION_TYPE_CODES[ActionType.PASS_GO]
@@ -0,0 +1,65 @@
+import random
+
+from monopoly_deal.agents import RandomAgent
+from monopoly_deal.play import new_game, step
+from monopoly_deal.records import SHUFFLE, RecordReader, RecordWriter, replay, replay_steps
+from monopoly_deal.tournament import play_game
+
+
+def record_game(writer, seed, num_players=2):
+    """Play a random game into `writer`, returning the hash of the game after every step"""
+    random.seed(seed)
+    agent = RandomAgent()
+    writer.start_game(num_players)
+    game = new_game(num_players, shuffle=writer.shuffle)
+    player, game, actions, available_actions, is_over = step(game=game, actions=tuple(), card_to_play=None,
+                                                             action=None, shuffle=writer.shuffle)
+    hashes = [game.zobrist]
+    while not is_over:
+        card, action = agent.get_action(game=game, actions=actions, available_actions=available_actions)
+        writer.record(player_index=player.index, card=card, action=action)
+        player, game, actions, available_actions, is_over = step(game=game, actions=actions, card_to_play=card,
+                                                                 action=action, shuffle=writer.shuffle)
+        hashes.append(game.zobrist)
+    winner = game.winner()
+    writer.end_game(None if winner is None else winner.index)
+    return hashes
+
+
+def test_replay_rebuilds_every_position(tmp_path):
+    path = str(tmp_path / 'games.mdgr')
+    with RecordWriter(path) as writer:
+        played = [record_game(writer, seed=seed, num_players=2 + seed % 2) for seed in range(6)]
+
+    with RecordReader(path) as reader:
+        games = list(reader.games())
+        assert len(games) == 6
+        for hashes, game_record in zip(played, games):
+            replayed = [game.zobrist for player, game, actions, available_actions, is_over in replay_steps(game_record)]
+            assert replayed == hashes
+            assert replay(game_record, num_decisions=3).zobrist == hashes[3]
+
+
+def test_records_are_compact_and_appendable(tmp_path):
+    path = str(tmp_path / 'games.mdgr')
+    for seed in range(2):
+        with RecordWriter(path) as writer:
+            result = play_game([RandomAgent, RandomAgent], game_index=seed, seed=seed, writer=writer)
+
+    with RecordReader(path) as reader:
+        games = list(reader.games())
+        assert len(games) == 2
+        assert len(games[-1].decisions) == result.moves
+        assert sum(1 for record in reader if record.opcode == SHUFFLE) >= 2
+    assert (tmp_path / 'games.mdgr').stat().st_size < 2 * 2000
+
+
+def test_unfinished_games_are_skipped(tmp_path):
+    path = str(tmp_path / 'games.mdgr')
+    with RecordWriter(path) as writer:
+        record_game(writer, seed=0)
+        writer.start_game(2)
+        writer.shuffle(list(range(1, 109)))
+
+    with RecordReader(path) as reader:
+        assert len(list(reader.games())) == 1
@@ -0,0 +1,168 @@
+import random
+
+import pytest
+
+from monopoly_deal.actions import Charge, Discard, Draw, EndTurn, NoResponse, Pay, PlayAsCash, PlayProperty, SayNo, \
+    StealCard, StealSet, Swap
+from monopoly_deal.cards import CARD_BUILDABLE, CARD_TYPES, CARD_VALUES, SET_COLORS, TYPE_CASH, deck
+from monopoly_deal.mcts import MCTS, State
+from monopoly_deal.mutable import CASH, CHARGE, DISCARD_CARDS, DRAW, END_TURN, NO_RESPONSE, PAY, PROPERTY, SAY_NO, \
+    STEAL_CARD, STEAL_SET, SWAP, MutableGame, convert_actions
+from monopoly_deal.play import STATE_CHOOSE_DISCARD, STATE_CHOOSE_RESPONSE, execute_actions, new_game, step
+from monopoly_deal.rollout import FastRollout, HeuristicRolloutPolicy, RolloutPolicy, play_out, settle
+
+
+def random_states(num_states, max_depth):
+    """Positions reached by random play, covering play, response and discard decisions"""
+    states = []
+    for seed in range(num_states):
+        random.seed(seed)
+        rng = random.Random(seed)
+        player, game, actions, available_actions, is_over = step(game=new_game(2), actions=tuple(), card_to_play=None,
+                                                                 action=None)
+        for _ in range(rng.randrange(max_depth + 1)):
+            if is_over:
+                break
+            card = rng.choice(list(available_actions))
+            player, game, actions, available_actions, is_over = step(
+                game=game, actions=actions, card_to_play=card, action=rng.choice(available_actions[card])
+            )
+        states.append(State(ai_player=game.players[0], player=player, game=game, actions=actions,
+                            available_actions=available_actions, is_over=is_over))
+    return states
+
+
+def assert_consistent(game: MutableGame):
+    assert not game.by_location[0]
+    assert sorted(card for cards in game.by_location for card in cards) == sorted(deck)
+    assert game.built == [sum(CARD_BUILDABLE[card] for card in cards) for cards in game.by_location]
+
+
+class RecordingGame(MutableGame):
+    """Keeps every chain a rollout applies, with the random state it was shuffled from and the position after it"""
+    __slots__ = ('chains',)
+
+    def apply(self, actions, shuffle=None):
+        state = shuffle.__self__.getstate() if shuffle is not None else None
+        token = super().apply(actions, shuffle=shuffle)
+        self.chains.append((actions, state, snapshot(self.to_game())))
+        return token
+
+
+def snapshot(game):
+    return (
+        tuple(
+            (
+                player.hand.serialize(),
+                tuple(card.index for card in player.board.cash_cards),
+                tuple((pset.color, pset.serialize()) for pset in player.board.property_sets)
+            )
+            for player in game.players
+        ),
+        game.discard_pile.serialize(),
+        tuple(game.game_deck),
+        game.current_turn_index,
+        game.cards_played
+    )
+
+
+def engine_actions(game, plays):
+    """A chain of `MutableGame` plays as the `(player, card, action)` chain `play.execute_actions` takes"""
+    players = game.players
+    actions = []
+    for player, (kind, card, target, a, b) in plays:
+        if kind == END_TURN:
+            return ((None, None, EndTurn()),)
+        action = {
+            CASH: lambda: PlayAsCash(cash_card=deck[card]),
+            PROPERTY: lambda: PlayProperty(property_card=deck[card], color=SET_COLORS[a - 1]),
+            CHARGE: lambda: Charge(charge_player=players[target], amount=a),
+            STEAL_CARD: lambda: StealCard(steal_from_player=players[target], steal_card=deck[a]),
+            STEAL_SET: lambda: StealSet(steal_from_player=players[target],
+                                        steal_set=players[target].board.property_sets[a]),
+            SWAP: lambda: Swap(steal_from_player=players[target], steal_card=deck[a], give_card=deck[b]),
+            DRAW: lambda: Draw(num_to_draw=a),
+            SAY_NO: lambda: SayNo(to_player=players[target]),
+            NO_RESPONSE: lambda: NoResponse(),
+            PAY: lambda: Pay(pay_to_player=players[target], cash_cards=tuple(deck[paid] for paid in a),
+                             property_cards=tuple(deck[paid] for paid in b)),
+            DISCARD_CARDS: lambda: Discard(discard_cards=tuple(deck[discarded] for discarded in a)),
+        }[kind]()
+        actions.append((players[player], deck.get(card), action))
+    return tuple(actions)
+
+
+@pytest.mark.parametrize('policy', [RolloutPolicy(), HeuristicRolloutPolicy()])
+def test_play_out_keeps_every_card_and_undoes(policy):
+    states = [state for state in random_states(num_states=60, max_depth=150) if not state.isTerminal()]
+    assert {STATE_CHOOSE_RESPONSE, STATE_CHOOSE_DISCARD} <= {state.game.state for state in states}
+    rng = random.Random(0)
+    for state in states:
+        game = MutableGame.from_game(state.game)
+        assert_consistent(game)
+        start, token = snapshot(game.to_game()), game.checkpoint()
+        actions = convert_actions(state.game, state.actions) if state.game.state == STATE_CHOOSE_RESPONSE else ()
+        play_out(game, policy, rng=rng, actions=actions, discarding=state.game.state == STATE_CHOOSE_DISCARD)
+        assert_consistent(game)
+        assert game.winner() is not None or not game.game_deck()
+        game.undo(token)
+        assert_consistent(game)
+        assert snapshot(game.to_game()) == start
+
+
+@pytest.mark.parametrize('policy', [RolloutPolicy(), HeuristicRolloutPolicy()])
+def test_play_out_follows_the_engine(policy):
+    # Every chain a rollout applies, carried out by the engine from the same position, ends in the same position
+    rng = random.Random(1)
+    for state in [state for state in random_states(num_states=60, max_depth=150) if not state.isTerminal()]:
+        game = RecordingGame.from_game(state.game)
+        game.chains = []
+        actions = convert_actions(state.game, state.actions) if state.game.state == STATE_CHOOSE_RESPONSE else ()
+        play_out(game, policy, rng=rng, actions=actions, discarding=state.game.state == STATE_CHOOSE_DISCARD)
+
+        engine = state.game
+        for plays, random_state, expected in game.chains:
+            shuffle = None
+            if random_state is not None:
+                replay = random.Random()
+                replay.setstate(random_state)
+                shuffle = replay.shuffle
+            chain = engine_actions(engine, plays)
+            if isinstance(chain[0][2], EndTurn):
+                engine = engine.end_turn()
+                engine = engine.draw_cards(num_to_draw=2, shuffle=shuffle) if engine.game_deck else engine
+            else:
+                engine = execute_actions(engine, chain, shuffle=shuffle)
+            assert snapshot(engine) == expected
+        assert game.winner() == (engine.winner().index if engine.winner() else None)
+
+
+def test_from_game_matches_the_engine():
+    for state in random_states(num_states=20, max_depth=100):
+        game = MutableGame.from_game(state.game)
+        for index, player in enumerate(state.game.players):
+            assert game.complete_set_count(index) == player.board.count_complete_sets()
+        assert game.winner() == (state.game.winner().index if state.game.winner() else None)
+
+
+def test_settle_drops_cards_not_needed():
+    one = next(index for index in deck if CARD_TYPES[index] == TYPE_CASH and CARD_VALUES[index] == 1)
+    five = next(index for index in deck if CARD_TYPES[index] == TYPE_CASH and CARD_VALUES[index] == 5)
+    assert settle([one, five], amount=4) == [five]
+    assert settle([one, five], amount=6) == [one, five]
+
+
+def test_fast_rollout_rewards():
+    rollout = FastRollout(rng=random.Random(1))
+    cut_short = FastRollout(HeuristicRolloutPolicy(), max_turns=1, rng=random.Random(1))
+    for state in random_states(num_states=20, max_depth=50):
+        assert rollout(state) in (-1, 0, 1)
+        assert -1 <= cut_short(state) <= 1
+
+
+def test_search_with_heuristic_rollouts():
+    state = random_states(num_states=1, max_depth=0)[0]
+    card, action = MCTS(iteration_limit=30, rollout_policy=FastRollout(HeuristicRolloutPolicy())).search(
+        initial_state=state
+    )
+    assert (card, action) in state.getPossibleActions()
@@ -0,0 +1,37 @@
+import random
+
+from monopoly_deal.actions import ChainedActions, PlayAsCash, Swap, SwapOptions, SwapTarget, get_available_actions, \
+    get_first_level_actions
+from monopoly_deal.cards import deck, Color
+from monopoly_deal.game import Board, Hand, Player
+
+
+def test_swap_options_factorize_forced_deal():
+    own_board = Board((), ()).play_property_card(card=deck[43], color=Color.BROWN)
+    own_board = own_board.play_property_card(card=deck[54], color=Color.RED)
+    opponent_board = Board((), ()).play_property_card(card=deck[60], color=Color.GREEN)
+    opponent_board = opponent_board.play_property_card(card=deck[61], color=Color.GREEN)
+    opponent_board = opponent_board.play_property_card(card=deck[37], color=Color.UTIL)
+    player = Player(index=0, hand=Hand(cards_in_hand=(deck[23],)), board=own_board)
+    opponent = Player(index=1, hand=Hand(cards_in_hand=tuple()), board=opponent_board)
+
+    actions = get_available_actions(card=deck[23], players=(player, opponent), current_player=player)
+    swaps = [action for action in actions if isinstance(action, Swap)]
+    # Green cards are interchangeable, so steal one of (green, utility) and give one of (brown, red)
+    assert len(actions) == 1 + 4
+    assert {(swap.steal_card.index, swap.give_card.index) for swap in swaps} == {
+        (60, 43), (60, 54), (37, 43), (37, 54)
+    }
+
+    first_level = get_first_level_actions(actions)
+    targets = [action for action in first_level if isinstance(action, SwapTarget)]
+    assert len(first_level) == 1 + 2
+    assert [swap.give_card.index for swap in targets[0].expand()] == [43, 54]
+    assert isinstance(random.choice(actions), (PlayAsCash, Swap))
+
+
+def test_swap_options_without_own_properties():
+    options = SwapOptions(steal_options=[(None, deck[60])], give_cards=[])
+    assert len(options) == 0
+    assert options.targets() == []
+    assert len(ChainedActions([PlayAsCash(cash_card=deck[23])], options)) == 1
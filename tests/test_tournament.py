@@ -0,0 +1,58 @@
+from functools import partial
+
+import pytest
+
+from monopoly_deal.agents import RandomAgent
+from monopoly_deal.mcts import MCTSAgent
+from monopoly_deal.records import read_directory
+from monopoly_deal.tournament import parse_agent, run_tournament, search_workers, wilson_interval
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(wins=5, games=10)
+    assert low < 0.5 < high
+    assert wilson_interval(wins=0, games=10)[0] == 0.0
+    assert wilson_interval(wins=10, games=10)[1] == 1.0
+    assert high - low > wilson_interval(wins=50, games=100)[1] - wilson_interval(wins=50, games=100)[0]
+
+
+def test_results_do_not_depend_on_workers():
+    serial = run_tournament(lineup=[RandomAgent, RandomAgent], num_games=6, workers=1, seed=3)
+    parallel = run_tournament(lineup=[RandomAgent, RandomAgent], num_games=6, workers=2, seed=3)
+    assert [(r.seed, r.seats, r.winner, r.moves) for r in serial.results] == \
+        [(r.seed, r.seats, r.winner, r.moves) for r in parallel.results]
+    assert [result.seats for result in serial.results[:2]] == [(0, 1), (1, 0)]
+    assert serial.wins(0) + serial.wins(1) + serial.draws() == 6
+
+
+def test_search_profiles_are_collected_per_agent():
+    lineup = (RandomAgent, partial(MCTSAgent, time_limit=2))
+    summary = run_tournament(lineup=lineup, num_games=2, workers=1, names=['random', 'mcts'])
+    assert summary.search_profile(0) is None
+    profile = summary.search_profile(1)
+    assert profile.searches == sum(result.search_profiles[1].searches for result in summary.results) > 0
+    assert 'iterations each' in summary.report()
+
+
+def test_tournaments_record_every_game(tmp_path):
+    summary = run_tournament(lineup=[RandomAgent, RandomAgent], num_games=4, workers=2, seed=5,
+                             record_directory=str(tmp_path))
+    games = list(read_directory(str(tmp_path)))
+    assert sorted(len(game.decisions) for game in games) == sorted(result.moves for result in summary.results)
+    # Winners are recorded by seat, results by line-up position
+    assert sorted(str(game.winner) for game in games) == \
+        sorted(str(None if result.winner is None else result.seats.index(result.winner)) for result in summary.results)
+
+
+def test_parallel_search_agents():
+    factory = parse_agent('mcts:5:2')
+    assert factory.keywords == {'time_limit': 5, 'workers': 2} and search_workers(factory) == 2
+    assert search_workers(parse_agent('mcts')) == search_workers(RandomAgent) == 1
+    with pytest.raises(ValueError):
+        parse_agent('random:2')
+
+    summary = run_tournament(lineup=[factory, RandomAgent], num_games=1, workers=1)
+    assert summary.search_profile(0).searches > 0
+    # Pool workers cannot start the search's own processes
+    with pytest.raises(RuntimeError):
+        run_tournament(lineup=[factory, RandomAgent], num_games=1, workers=2)
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from monopoly_deal.agents import RandomAgent
+from monopoly_deal.cards import deck, Color
+from monopoly_deal.game import Board, DiscardPile, Game, Hand, Player
+from monopoly_deal.play import new_game, step
+from monopoly_deal.zobrist import compute_zobrist
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_incremental_hash_matches_full_hash(seed):
+    random.seed(seed)
+    game = new_game(2)
+    agent = RandomAgent()
+    player, game, actions, available_actions, is_over = step(game=game, actions=tuple(), card_to_play=None, action=None)
+    while not is_over:
+        assert game.zobrist == compute_zobrist(game)
+        card, action = agent.get_action(game=game, actions=actions, available_actions=available_actions)
+        player, game, actions, available_actions, is_over = step(
+            game=game, actions=actions, card_to_play=card, action=action
+        )
+    assert game.zobrist == compute_zobrist(game)
+
+
+def test_transpositions_are_equal():
+    player = Player(index=0, hand=Hand(cards_in_hand=(deck[89], deck[95], deck[43])), board=Board((), ()))
+    opponent = Player(index=1, hand=Hand(cards_in_hand=tuple()), board=Board((), ()))
+    game = Game(
+        players=(player, opponent),
+        discard_pile=DiscardPile(discarded_cards=tuple()),
+        current_turn_index=0,
+        cards_played=0,
+        game_deck=(100, 101),
+        state=1
+    )
+    first = game.play_cash_card(card=deck[89]).play_cash_card(card=deck[95])
+    second = game.play_cash_card(card=deck[95]).play_cash_card(card=deck[89])
+    assert first == second
+    assert hash(first) == hash(second)
+    assert len({first, second}) == 1
+
+    assert first != game
+    assert first != first.set_state(2)
+    assert game.serialize()[-1] == 0
+
+    # A different position that happens to share the key is still a different position
+    collision = Game(players=first.players, discard_pile=first.discard_pile, current_turn_index=1,
+                     cards_played=first.cards_played, game_deck=first.game_deck, state=first.state, zobrist=first.zobrist)
+    assert hash(collision) == hash(first)
+    assert collision != first
+    assert len({first, collision}) == 2
+
+
+def test_stolen_sets_are_rehashed():
+    board = Board((), ())
+    for card, color in ((deck[43], Color.BROWN), (deck[44], Color.BROWN), (deck[1], Color.BROWN),
+                        (deck[54], Color.RED), (deck[55], Color.RED)):
+        board = board.play_property_card(card=card, color=color)
+    brown_set = board.property_sets[0]
+    player = Player(index=0, hand=Hand(cards_in_hand=tuple()), board=Board((), ()))
+    opponent = Player(index=1, hand=Hand(cards_in_hand=tuple()), board=board)
+    game = Game(
+        players=(player, opponent),
+        discard_pile=DiscardPile(discarded_cards=tuple()),
+        current_turn_index=0,
+        cards_played=0,
+        game_deck=tuple(),
+        state=1
+    )
+    game = game.steal_complete_set(property_set=brown_set, stolen_to_player=player, stolen_from_player=opponent)
+    assert game.zobrist == compute_zobrist(game)
+    game = game.steal_property_card(card=deck[54], stolen_to_player=player, stolen_from_player=opponent)
+    assert game.zobrist == compute_zobrist(game)